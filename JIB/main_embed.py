@@ -4,6 +4,8 @@ load_dotenv(dotenv_path="/data/ephemeral/home/QA/.env")
 from langchain_community.vectorstores import FAISS
 from langchain_upstage import UpstageEmbeddings
 from modules.loader import load_paragraphs_from_txt_dir
+import modules.repo_path  # noqa: F401 (저장소 루트의 src 패키지를 import 경로에 추가)
+from src.modules.vector_store.lazy_docstore import save_faiss
 
 TXT_DIR = "/data/ephemeral/home/QA/data"
 SAVE_DIR = "/data/ephemeral/home/QA/faiss_store"
@@ -16,6 +18,7 @@ embedding = UpstageEmbeddings(model="solar-embedding-1-large")
 
 # 3. LangChain 방식으로 벡터 저장소 생성 및 저장
 vectorstore = FAISS.from_texts(texts=paragraphs, embedding=embedding)
-vectorstore.save_local(SAVE_DIR)
+# index.faiss + docs.sqlite로 저장 (pickle 없이 load_lazy_faiss로 로드)
+save_faiss(vectorstore, SAVE_DIR)
 
 print(f" 총 {len(paragraphs)}개의 문단을 저장했습니다.")
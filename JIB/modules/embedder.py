@@ -1,43 +1,66 @@
 # embedder.py (Upstage + LangChain 호환 버전)
 
 import os
+from functools import lru_cache
 from dotenv import load_dotenv
 from typing import List
+from langchain.docstore.document import Document
 from langchain_upstage import UpstageEmbeddings
 import numpy as np
 import faiss
-import pickle
+
+import modules.repo_path  # noqa: F401 (저장소 루트의 src 패키지를 import 경로에 추가)
+from src.modules.embedding.executor import EmbeddingExecutor
+from src.modules.vector_store.lazy_docstore import load_lazy_faiss, write_docstore
 
 load_dotenv(dotenv_path="/data/ephemeral/home/QA/.env")
 
+FAISS_STORE_DIR = "/data/ephemeral/home/QA/faiss_store"
+
 # 1. Upstage 임베딩 모델 로드
-model = UpstageEmbeddings(model="solar-embedding-1-large")
+model = UpstageEmbeddings(model="solar-embedding-1-large", embed_batch_size=100)
 
-# 2. 문단(청크) 리스트를 벡터로 임베딩
+# 배치 분할(문단 수/문자 수), 동시 요청, 429/5xx 백오프(Retry-After 우선), 400/413 배치 분할은 공용 실행기를 사용
+executor = EmbeddingExecutor(model, max_batch_size=100, max_batch_chars=40_000, max_workers=4)
+
+# 2. 문단(청크) 리스트를 배치 단위로 동시에 임베딩 (입력 순서 유지)
 def embed_chunks(chunks: List[str]) -> np.ndarray:
-    embeddings = model.embed_documents(chunks)
+    embeddings = executor.embed_documents(chunks)
     return np.array(embeddings)
 
 # 3. FAISS 벡터 저장소에 저장 (LangChain 호환 포맷)
-def save_embeddings_to_faiss(embeddings: np.ndarray, chunks: List[str], save_dir: str):
+def save_embeddings_to_faiss(embeddings: np.ndarray, chunks: List[str], save_dir: str, index_description: str = "Flat",
+                             ef_search: int = None, nprobe: int = None):
+    # index_description: faiss.index_factory 문자열
+    #   "Flat"(원본 float32), "SQfp16"(1/2), "SQ8"(1/4), "PQ64"(벡터당 64바이트), "PQ64,RFlat"(PQ + 정확한 재정렬)
+    #   "PCA256,Flat"처럼 앞에 PCA를 붙이면 축소 행렬이 index.faiss에 함께 저장되고, 검색 시 쿼리에도 자동 적용됨
+    #   "HNSW32"(그래프 탐색, ef_search로 정확도/속도 조절), "IVF1024,Flat"(군집 탐색, nprobe로 조절)처럼
+    #   근사 탐색 구조를 쓰면 문단 수가 늘어도 검색 시간이 거의 늘지 않음. ef_search/nprobe는 index.faiss에 함께 저장됨
     os.makedirs(save_dir, exist_ok=True)
+    embeddings = np.ascontiguousarray(embeddings, dtype=np.float32)
     dim = embeddings.shape[1]
-    index = faiss.IndexFlatL2(dim)
+    index = faiss.index_factory(dim, index_description)
+    if not index.is_trained:
+        index.train(embeddings)
     index.add(embeddings)
+    params = faiss.ParameterSpace()
+    if ef_search is not None:
+        params.set_index_parameter(index, "efSearch", ef_search)
+    if nprobe is not None:
+        params.set_index_parameter(index, "nprobe", nprobe)
     faiss.write_index(index, os.path.join(save_dir, "index.faiss"))
 
-    # ✅ LangChain이 요구하는 구조: (texts, metadatas)
-    metadatas = [{} for _ in chunks]
-    with open(os.path.join(save_dir, "index.pkl"), "wb") as f:
-        pickle.dump((chunks, metadatas), f)
+    # 원문은 pickle 대신 벡터 위치를 키로 하는 SQLite 문서 저장소(docs.sqlite)에 저장
+    write_docstore(save_dir, ((str(i), Document(page_content=chunk)) for i, chunk in enumerate(chunks)))
 
     print(f"✅ FAISS 저장소 및 원문 저장 완료: {save_dir}")
 
 # 4. 검색 함수
+@lru_cache(maxsize=None)
+def _load_store(folder_path: str):
+    # index.faiss는 메모리 매핑으로 열고, 문단은 검색된 것만 읽음 (프로세스당 한 번만 로드)
+    return load_lazy_faiss(folder_path, model)
+
 def load_faiss_and_search(query: str, top_k: int = 5):
-    index = faiss.read_index("/data/ephemeral/home/QA/faiss_store/index.faiss")
-    with open("/data/ephemeral/home/QA/faiss_store/index.pkl", "rb") as f:
-        texts, _ = pickle.load(f)  # ✅ 구조 맞게 언패킹
-    query_vec = np.array([model.embed_query(query)])
-    D, I = index.search(query_vec, top_k)
-    return [texts[i] for i in I[0]]
+    store = _load_store(FAISS_STORE_DIR)
+    return [doc.page_content for doc in store.similarity_search(query, k=top_k)]
@@ -1,49 +1,72 @@
 # modules/loader.py
 
 from pathlib import Path
-from typing import List
+from typing import Iterable, Iterator, List
 import fitz  # PyMuPDF
 
+import modules.repo_path  # noqa: F401 (저장소 루트의 src 패키지를 import 경로에 추가)
+from src.modules.loader.streaming import iter_file_blocks, iter_paragraphs as split_paragraphs
+
+
+def iter_paragraphs(pieces: Iterable[str]) -> Iterator[str]:
+    """
+    연속된 텍스트 조각을 두 줄 개행("\n\n") 기준의 문단으로 나누어 하나씩 반환합니다 (streaming.iter_paragraphs).
+    문단 앞뒤 공백은 지우고, 빈 문단은 건너뜁니다.
+    """
+    for paragraph in split_paragraphs(pieces):
+        if paragraph.strip():
+            yield paragraph.strip()
+
+
+def iter_txt_paragraphs(txt_path) -> Iterator[str]:
+    """
+    텍스트 파일을 나누어 읽으며 문단을 하나씩 반환합니다. 파일 크기와 관계없이 일정한 메모리를 사용합니다.
+    """
+    yield from iter_paragraphs(iter_file_blocks(str(txt_path)))
+
+
+def iter_pdf_paragraphs(pdf_path) -> Iterator[str]:
+    """
+    PDF를 한 페이지씩 읽으며 문단을 하나씩 반환합니다. 페이지 사이는 한 줄 개행으로 이어 붙입니다.
+    """
+    doc = fitz.open(pdf_path)
+    try:
+        yield from iter_paragraphs(page.get_text() + "\n" for page in doc)
+    finally:
+        doc.close()
+
+
+def iter_paragraphs_from_txt_dir(txt_dir: str) -> Iterator[str]:
+    """load_paragraphs_from_txt_dir의 스트리밍 버전입니다."""
+    for file in Path(txt_dir).glob("*.txt"):
+        yield from iter_txt_paragraphs(file)
+
+
+def iter_all_documents_from_dir(data_dir: str) -> Iterator[str]:
+    """load_all_documents_from_dir의 스트리밍 버전입니다."""
+    for path in Path(data_dir).glob("*"):
+        if path.suffix == ".txt":
+            yield from iter_txt_paragraphs(path)
+        elif path.suffix == ".pdf":
+            yield from iter_pdf_paragraphs(path)
+
+
 def load_paragraphs_from_txt_dir(txt_dir: str) -> List[str]:
     """
     주어진 디렉토리에서 .txt 파일들을 읽고, 문단 단위로 분리하여 리스트로 반환합니다.
     문단 구분은 두 줄 개행("\n\n")을 기준으로 합니다.
     """
-    all_paragraphs = []
-    for file in Path(txt_dir).glob("*.txt"):
-        with open(file, "r", encoding="utf-8") as f:
-            chunks = [p.strip() for p in f.read().split("\n\n") if p.strip()]
-            all_paragraphs.extend(chunks)
-    return all_paragraphs
+    return list(iter_paragraphs_from_txt_dir(txt_dir))
 
 def load_pdf_to_paragraphs(pdf_path: str) -> List[str]:
     """
     단일 PDF 파일을 열어 텍스트를 추출하고 문단 단위로 분리하여 반환합니다.
     문단 구분은 두 줄 개행("\n\n")을 기준으로 합니다.
     """
-    doc = fitz.open(pdf_path)
-    full_text = "\n".join([page.get_text() for page in doc])
-    doc.close()
-    paragraphs = [p.strip() for p in full_text.split("\n\n") if p.strip()]
-    return paragraphs
+    return list(iter_pdf_paragraphs(pdf_path))
 
 def load_all_documents_from_dir(data_dir: str) -> List[str]:
     """
     주어진 디렉토리 내의 모든 .txt 및 .pdf 파일을 로드하여 문단 단위 리스트로 반환합니다.
     """
-    all_paragraphs = []
-
-    for path in Path(data_dir).glob("*"):
-        if path.suffix == ".txt":
-            with open(path, "r", encoding="utf-8") as f:
-                chunks = [p.strip() for p in f.read().split("\n\n") if p.strip()]
-                all_paragraphs.extend(chunks)
-
-        elif path.suffix == ".pdf":
-            doc = fitz.open(path)
-            full_text = "\n".join([page.get_text() for page in doc])
-            doc.close()
-            chunks = [p.strip() for p in full_text.split("\n\n") if p.strip()]
-            all_paragraphs.extend(chunks)
-
-    return all_paragraphs
+    return list(iter_all_documents_from_dir(data_dir))
@@ -0,0 +1,9 @@
+# modules/repo_path.py
+
+import os
+import sys
+
+# JIB 스크립트는 JIB 디렉터리에서 실행되므로, 저장소 루트의 공용 모듈(src.modules...)을 쓰려면 루트를 경로에 추가합니다.
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+if REPO_ROOT not in sys.path:
+    sys.path.insert(0, REPO_ROOT)
@@ -3,19 +3,18 @@
 from dotenv import load_dotenv
 load_dotenv(dotenv_path="/data/ephemeral/home/QA/.env")
 
-from langchain_community.vectorstores import FAISS
+import modules.repo_path  # noqa: F401 (저장소 루트의 src 패키지를 import 경로에 추가)
+from src.modules.vector_store.lazy_docstore import load_lazy_faiss
 from langchain_upstage import UpstageEmbeddings, ChatUpstage
 from langchain.chains import RetrievalQA
 
 # 1. 업스테이지 임베딩 모델 로드
 embedding = UpstageEmbeddings(model="solar-embedding-1-large")
 
-# 2. FAISS 벡터 저장소 로드
-vectorstore = FAISS.load_local(
+# 2. FAISS 벡터 저장소 로드 (index.faiss는 메모리 매핑, 문단은 검색된 것만 읽음)
+vectorstore = load_lazy_faiss(
     folder_path="/data/ephemeral/home/QA/faiss_store",
     embeddings=embedding,
-    allow_dangerous_deserialization=True
-    
 )
 print(type(vectorstore))
 # 3. 리트리버 + QA 체인 구성
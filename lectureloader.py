@@ -5,6 +5,8 @@ from langchain.schema import Document
 from langchain.document_loaders import CSVLoader
 from langchain.text_splitter import RecursiveCharacterTextSplitter
 
+from src.modules.loader.dedup import deduplicate_documents
+
 
 class LectureLoader(CSVLoader):
     def fill_between_non_nan(self, df, column):
@@ -51,4 +53,5 @@ class LectureLoader(CSVLoader):
         splitter = RecursiveCharacterTextSplitter(chunk_size=1000, chunk_overlap=500)
         split_docs = splitter.split_documents(docs)
 
-        return split_docs
+        # 겹침이 큰 분할(1000/500)과 빈 칸을 앞 값으로 채운 행 때문에 생기는 중복 청크를 제거합니다.
+        return deduplicate_documents(split_docs)
@@ -7,15 +7,41 @@ from src.modules.model.chat import get_response
 from src.modules.prompt.template import get_vacation_messages, get_timetable_messages, get_legal_messages
 
 from src.modules.router.question_router import route_question
-from src.modules.vector_store.search import handle_vacation_search, handle_timetable_search, handle_legal_search
-from src.modules.vector_store.vector_store import ChromaStore, VectorStore
+from src.modules.vector_store.search import (handle_vacation_search, handle_timetable_search, handle_legal_search,
+                                             handle_etc_search)
+from src.modules.vector_store.sharded_store import ShardedStore, check_domain_collections
+from src.modules.vector_store.vector_store import ChromaStore
+from src.modules.vector_store.versioned_store import IndexVersions, VersionedStore
 
 
-def main(vector_store):
+@st.cache_resource
+def get_vector_store(store_path: str) -> VersionedStore:
+    """
+    Streamlit은 상호작용마다 스크립트를 다시 실행하므로, 임베딩 래퍼(쿼리 캐시 포함)와
+    벡터 스토어를 프로세스 단위로 한 번만 생성해 재사용합니다.
+    문서는 init()에서 도메인(카테고리)별 컬렉션에 나누어 저장되며, 질문은 라우팅된 컬렉션만 검색합니다.
+    store_path 아래의 현재 버전(CURRENT)을 열며, init()이 새 버전을 게시하면 다음 요청부터 새 버전을 사용합니다.
+    도메인별 컬렉션에 청크가 없으면(init() 이전 스토어 등) RuntimeError를 발생시킵니다 (check_domain_collections 참고).
+    """
+    versions = IndexVersions(store_path)
+    check_domain_collections(versions.current_path())
+    embeddings = Embedding()
+    return VersionedStore(
+        versions,
+        lambda path: ShardedStore(
+            lambda domain: ChromaStore(embeddings, persist_directory=path, collection_name=domain)
+        ),
+    )
+
+
+def main(vector_store: VersionedStore):
     st.title("AI 부트캠프 매니저 QA봇")
     question = st.text_input("질문을 입력하세요", "카드 발급은 어떻게 하나요?")
 
     if st.button("Get Answer"):
+        # 요청 사이에만 버전을 교체하고, 이 요청은 끝날 때까지 같은 버전의 스토어로 처리합니다.
+        vector_store.refresh()
+        store = vector_store.store
         with st.spinner("카테고리 라우팅 중..."):
             category = route_question(question)
         st.write(f"**예측된 카테고리:** {category}")
@@ -23,22 +49,24 @@ def main(vector_store):
         with st.spinner("답변 생성 중..."):
 
             if category == "vacation":
-                context_text, attached_files = handle_vacation_search(vector_store, question)
+                context_text, attached_files = handle_vacation_search(store, question)
                 messages = get_vacation_messages(context_text, "", question)
             elif category == "timetable":
-                context_text, attached_files = handle_timetable_search(vector_store, question)
+                context_text, attached_files = handle_timetable_search(store, question)
                 messages = get_timetable_messages(context_text, attached_files, question)
             elif category == "legal":
-                context_text, attached_files = handle_legal_search(vector_store, question)
+                context_text, attached_files = handle_legal_search(store, question)
                 messages = get_legal_messages(context_text, attached_files, question)
             else:
-                # etc인 경우 기본 검색 + 기본 프롬프트
+                # etc인 경우 모든 도메인에서 검색 + 기본 프롬프트
+                context_text, attached_files = handle_etc_search(store, question)
                 messages = [
                     (
                         "system",
                         "당신은 학원 QA 봇입니다. (기본)"
                         "질문자는 \"AI+Lab_7기(Upstage_AI+6기)\"입니다."
                     ),
+                    ("system", f"참고할 문서:\n{context_text}"),
                     ("human", f"질문:\n\n{question}"),
                 ]
 
@@ -50,10 +78,13 @@ def main(vector_store):
 if __name__ == "__main__":
     load_dotenv()
     configure_upstage_api()
-    embeddings = Embedding()
     store_path = "src/chroma"
 
-    vector_store: VectorStore = ChromaStore(embeddings.model, persist_directory=store_path)
+    try:
+        vector_store = get_vector_store(store_path)
+    except RuntimeError as e:
+        st.error(str(e))
+        st.stop()
 
     main(vector_store)
 
@@ -0,0 +1,132 @@
+import argparse
+import time
+from typing import Dict, List, Optional, Tuple
+
+import faiss
+import numpy as np
+
+from src.benchmark.synthetic import generate_corpus, generate_queries
+from src.modules.embedding.hashing import HashingEmbeddings
+from src.modules.vector_store.faiss_index import build_index
+
+# (이름, build_index 인자) 목록. 기준선(Flat)은 항상 첫 번째로 측정합니다.
+COMPRESSION_CONFIGS = [
+    ("flat", {}),
+    ("fp16", {"compression": "fp16"}),
+    ("sq8", {"compression": "sq8"}),
+    ("sq8+rerank", {"compression": "sq8", "rerank": True}),
+    ("pq64", {"compression": "pq", "pq_m": 64}),
+    ("pq64+rerank", {"compression": "pq", "pq_m": 64, "rerank": True}),
+    ("pq128+rerank", {"compression": "pq", "pq_m": 128, "rerank": True}),
+]
+
+PROJECTION_CONFIGS = [
+    ("flat", {}),
+    ("pca1024", {"projection_dim": 1024}),
+    ("pca512", {"projection_dim": 512}),
+    ("pca256", {"projection_dim": 256}),
+    ("pca512+sq8", {"projection_dim": 512, "compression": "sq8"}),
+    ("pca256+sq8", {"projection_dim": 256, "compression": "sq8"}),
+]
+
+# 근사 탐색 구조별 recall@k와 QPS. 검색 폭(ef_search, nprobe)을 바꿔 가며 정확도/속도 균형을 비교합니다.
+ANN_CONFIGS = [
+    ("flat", {}),
+    ("hnsw32,ef16", {"index_type": "hnsw", "ef_search": 16}),
+    ("hnsw32,ef64", {"index_type": "hnsw", "ef_search": 64}),
+    ("hnsw32,ef256", {"index_type": "hnsw", "ef_search": 256}),
+    ("hnsw32+sq8,ef64", {"index_type": "hnsw", "compression": "sq8", "ef_search": 64}),
+    ("ivf,nprobe1", {"index_type": "ivf", "nprobe": 1}),
+    ("ivf,nprobe8", {"index_type": "ivf", "nprobe": 8}),
+    ("ivf,nprobe32", {"index_type": "ivf", "nprobe": 32}),
+    ("ivf+sq8,nprobe8", {"index_type": "ivf", "compression": "sq8", "nprobe": 8}),
+]
+
+SUITES = {
+    "compression": COMPRESSION_CONFIGS,
+    "projection": PROJECTION_CONFIGS,
+    "ann": ANN_CONFIGS,
+}
+
+
+def load_vectors(num_docs: int, num_queries: int, dimension: int,
+                 index_path: Optional[str] = None) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    (문서 벡터, 쿼리 벡터)를 반환합니다.
+
+    index_path가 주어지면 저장된 IndexFlat에서 실제 임베딩을 복원하고, 문서 벡터 일부를 쿼리로 사용합니다.
+    없으면 합성 코퍼스를 HashingEmbeddings로 임베딩합니다.
+    """
+    if index_path:
+        index = faiss.read_index(index_path)
+        documents = index.reconstruct_n(0, index.ntotal)
+        rng = np.random.default_rng(0)
+        queries = documents[rng.choice(len(documents), size=min(num_queries, len(documents)), replace=False)]
+        return documents, queries
+
+    embeddings = HashingEmbeddings(dimension=dimension)
+    corpus = generate_corpus(num_docs)
+    documents = embeddings.embed_array([doc.page_content for doc in corpus])
+    queries = embeddings.embed_array([query for query, _ in generate_queries(corpus, num_queries)])
+    return documents, queries
+
+
+def evaluate(index: faiss.Index, queries: np.ndarray, ground_truth: np.ndarray, k: int) -> Dict[str, float]:
+    """
+    인덱스 크기, 기준선 대비 recall@k, 단건 쿼리 지연시간과 배치 QPS를 측정합니다.
+    """
+    latencies = []
+    for query in queries:
+        start = time.perf_counter()
+        index.search(query.reshape(1, -1), k)
+        latencies.append((time.perf_counter() - start) * 1000)
+
+    start = time.perf_counter()
+    _, ids = index.search(queries, k)
+    batch_seconds = time.perf_counter() - start
+
+    recall = np.mean([len(set(found) & set(expected)) / k for found, expected in zip(ids, ground_truth)])
+    return {
+        "bytes": len(faiss.serialize_index(index)),
+        "recall": float(recall),
+        "p50_ms": float(np.median(latencies)),
+        "qps": len(queries) / batch_seconds,
+    }
+
+
+def run(configs: List[Tuple[str, dict]], documents: np.ndarray, queries: np.ndarray, k: int) -> None:
+    baseline = faiss.IndexFlatL2(documents.shape[1])
+    baseline.add(documents)
+    _, ground_truth = baseline.search(queries, k)
+
+    print(f"문서 {len(documents)}개, 쿼리 {len(queries)}개, 차원 {documents.shape[1]}, k={k}")
+    print(f"{'config':<16}{'size(MB)':>10}{'ratio':>8}{'recall@k':>10}{'p50(ms)':>10}{'QPS':>10}{'build(s)':>10}")
+    baseline_bytes = None
+    for name, params in configs:
+        start = time.perf_counter()
+        index = build_index(documents, **params)
+        index.add(documents)
+        build_seconds = time.perf_counter() - start
+        result = evaluate(index, queries, ground_truth, k)
+        baseline_bytes = baseline_bytes or result["bytes"]
+        print(f"{name:<16}{result['bytes'] / 2 ** 20:>10.2f}{baseline_bytes / result['bytes']:>8.1f}"
+              f"{result['recall']:>10.3f}{result['p50_ms']:>10.2f}{result['qps']:>10.0f}{build_seconds:>10.2f}",
+              flush=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Faiss 인덱스 설정별 메모리/recall/지연시간을 측정합니다.")
+    parser.add_argument("--docs", type=int, default=10_000)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=4)
+    parser.add_argument("--dimension", type=int, default=4096)
+    parser.add_argument("--suite", choices=sorted(SUITES), default="compression")
+    parser.add_argument("--index", default=None, help="실제 임베딩이 저장된 index.faiss 경로 (예: JIB/faiss_store/index.faiss)")
+    args = parser.parse_args()
+
+    documents, queries = load_vectors(args.docs, args.queries, args.dimension, args.index)
+    run(SUITES[args.suite], documents, queries, args.k)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,49 @@
+import random
+from typing import List, Tuple
+
+from langchain_core.documents import Document
+
+# 실제 코퍼스(휴가/시간표/강의/슬랙/법령)와 비슷한 어휘 분포를 흉내 내기 위한 도메인 단어
+DOMAIN_WORDS = {
+    "vacation": ["휴가", "신청서", "출석", "결석", "공결", "증빙", "서류", "제출", "승인", "매니저"],
+    "timetable": ["시간표", "강의", "실습", "오전", "오후", "특강", "프로젝트", "발표", "멘토링", "자습"],
+    "lecture": ["온라인", "강좌", "머신러닝", "딥러닝", "자연어", "파이썬", "통계", "수강", "챕터", "영상"],
+    "slack": ["슬랙", "채널", "공지", "스레드", "멘션", "알림", "질문", "답변", "이모지", "워크스페이스"],
+    "legal": ["훈련", "수강생", "내일배움카드", "지원금", "고용노동부", "규정", "제1조", "자부담", "환급", "출결"],
+}
+
+
+def _random_word(rng: random.Random) -> str:
+    return "".join(chr(0xAC00 + rng.randrange(11172)) for _ in range(rng.randint(1, 4)))
+
+
+def generate_corpus(num_docs: int, words_per_doc: int = 80, seed: int = 42) -> List[Document]:
+    """
+    벤치마크용 한국어 합성 문서를 생성합니다. 각 문서에는 domain, search_date 메타데이터가 붙습니다.
+    """
+    rng = random.Random(seed)
+    domains = list(DOMAIN_WORDS)
+    documents = []
+    for i in range(num_docs):
+        domain = domains[i % len(domains)]
+        vocabulary = DOMAIN_WORDS[domain]
+        words = [rng.choice(vocabulary) if rng.random() < 0.3 else _random_word(rng) for _ in range(words_per_doc)]
+        date = f"2025{rng.randint(1, 6):02d}{rng.randint(1, 28):02d}"
+        documents.append(Document(page_content=" ".join(words),
+                                  metadata={"domain": domain, "search_date": date, "source": f"synthetic-{i}"}))
+    return documents
+
+
+def generate_queries(documents: List[Document], num_queries: int, seed: int = 7) -> List[Tuple[str, int]]:
+    """
+    코퍼스 문서 일부를 잘라 변형한 (쿼리, 원본 문서 위치) 목록을 생성합니다.
+    """
+    rng = random.Random(seed)
+    queries = []
+    for _ in range(num_queries):
+        position = rng.randrange(len(documents))
+        words = documents[position].page_content.split()
+        start = rng.randrange(max(1, len(words) - 12))
+        snippet = [w for w in words[start:start + 12] if rng.random() > 0.2]
+        queries.append((" ".join(snippet), position))
+    return queries
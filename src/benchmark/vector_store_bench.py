@@ -0,0 +1,67 @@
+import argparse
+import statistics
+import tempfile
+import time
+from typing import Callable, List
+
+from src.benchmark.synthetic import generate_corpus, generate_queries
+from src.modules.embedding.embedding import Embedding
+from src.modules.embedding.hashing import HashingEmbeddings
+from src.modules.vector_store.vector_store import ChromaStore, Faiss, NumpyStore, VectorStore
+
+
+def measure_queries(store: VectorStore, queries: List[str], k: int) -> List[float]:
+    """
+    쿼리별 검색 지연시간(ms) 목록을 반환합니다.
+    """
+    latencies = []
+    for query in queries:
+        start = time.perf_counter()
+        store.similarity_search(query, k=k)
+        latencies.append((time.perf_counter() - start) * 1000)
+    return latencies
+
+
+def run(name: str, factory: Callable[[], VectorStore], documents, queries: List[str], k: int) -> None:
+    store = factory()
+    start = time.perf_counter()
+    store.add_documents(documents)
+    build_seconds = time.perf_counter() - start
+
+    latencies = sorted(measure_queries(store, queries, k))
+    p95 = latencies[int(len(latencies) * 0.95) - 1] if len(latencies) >= 20 else latencies[-1]
+    print(f"[{name}] 문서 {len(documents)}개 인덱싱: {build_seconds:.2f}s ({len(documents) / build_seconds:.0f} docs/s)")
+    print(f"[{name}] 검색 {len(queries)}회: p50 {statistics.median(latencies):.2f}ms, p95 {p95:.2f}ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="오프라인 임베딩으로 벡터 스토어 인덱싱/검색 지연시간을 측정합니다.")
+    parser.add_argument("--docs", type=int, default=10_000)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=4)
+    parser.add_argument("--dimension", type=int, default=4096)
+    parser.add_argument("--stores", default="numpy,faiss,chroma")
+    args = parser.parse_args()
+
+    documents = generate_corpus(args.docs)
+    queries = [query for query, _ in generate_queries(documents, args.queries)]
+    # 캐시 조회 비용이 측정에 섞이지 않도록 디스크 캐시는 끕니다.
+    embeddings = Embedding(model=HashingEmbeddings(dimension=args.dimension), cache_path=None)
+
+    start = time.perf_counter()
+    embeddings.embed_documents([doc.page_content for doc in documents[:1000]])
+    print(f"[embedding] HashingEmbeddings({args.dimension}): "
+          f"{min(1000, len(documents)) / (time.perf_counter() - start):.0f} docs/s")
+
+    stores = args.stores.split(",")
+    if "numpy" in stores:
+        run("numpy", lambda: NumpyStore(embeddings), documents, queries, args.k)
+    if "faiss" in stores:
+        run("faiss", lambda: Faiss(embeddings), documents, queries, args.k)
+    if "chroma" in stores:
+        with tempfile.TemporaryDirectory() as directory:
+            run("chroma", lambda: ChromaStore(embeddings, persist_directory=directory), documents, queries, args.k)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,243 @@
+import hashlib
+import os
+import re
+import sqlite3
+import threading
+import time
+import unicodedata
+from array import array
+from collections import OrderedDict
+from typing import Dict, List, Optional, Sequence, Tuple
+
+DEFAULT_CACHE_PATH = os.path.join(os.path.dirname(__file__), "..", "..", "cache", "embedding_cache.sqlite")
+# 기간 제한(max_age)을 적용하는 최소 간격(초). 개수 제한은 추적 중인 항목 수가 max_entries를 넘을 때만 적용합니다.
+EVICT_INTERVAL = 60 * 60
+
+
+def normalize_query(text: str) -> str:
+    """
+    쿼리 캐시 키를 위해 유니코드(NFKC)와 공백을 정규화합니다.
+    """
+    text = unicodedata.normalize("NFKC", text)
+    return re.sub(r"\s+", " ", text).strip()
+
+
+def content_hash(text: str) -> str:
+    """
+    텍스트 내용의 sha256 해시를 반환합니다. 캐시 키로 사용됩니다.
+    """
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+class EmbeddingCache:
+    """
+    임베딩 벡터를 로컬 SQLite 파일에 저장하는 영속 캐시입니다.
+
+    키는 (모델명, 텍스트 sha256 해시)이며, 벡터는 float32 바이트로 저장합니다.
+    max_entries를 넘거나 max_age(초) 동안 사용되지 않은 항목은 evict() 시 제거됩니다.
+    set_many는 항목 수를 따로 세어 두고, max_entries를 넘었거나 EVICT_INTERVAL이 지났을 때만 evict()를 호출합니다.
+    """
+
+    def __init__(self, path: str = DEFAULT_CACHE_PATH, max_entries: Optional[int] = 500_000,
+                 max_age: Optional[float] = 60 * 60 * 24 * 30):
+        """
+        Args:
+            path (str): SQLite 파일 경로.
+            max_entries (Optional[int]): 보관할 최대 벡터 개수. None이면 제한하지 않습니다.
+            max_age (Optional[float]): 마지막 사용 후 보관 기간(초). None이면 제한하지 않습니다.
+        """
+        self.path = path
+        self.max_entries = max_entries
+        self.max_age = max_age
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS embeddings (
+                model TEXT NOT NULL,
+                hash TEXT NOT NULL,
+                vector BLOB NOT NULL,
+                last_access REAL NOT NULL,
+                PRIMARY KEY (model, hash)
+            )
+            """
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_embeddings_last_access ON embeddings (last_access)")
+        self._conn.commit()
+        # 저장된 항목 수의 상한. 덮어쓴 항목도 더하므로 실제보다 클 수 있고, evict()에서 다시 셉니다.
+        (self._count,) = self._conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()
+        self._last_evict = time.monotonic()
+
+    def get_many(self, model: str, texts: Sequence[str]) -> List[Optional[List[float]]]:
+        """
+        텍스트 목록에 대한 캐시된 벡터를 입력 순서대로 반환합니다. 없는 항목은 None입니다.
+        """
+        hashes = [content_hash(text) for text in texts]
+        found: Dict[str, List[float]] = {}
+        unique_hashes = list(dict.fromkeys(hashes))
+        now = time.time()
+
+        with self._lock:
+            # SQLite 바인딩 변수 개수 제한을 피하기 위해 나누어 조회합니다.
+            for start in range(0, len(unique_hashes), 500):
+                chunk = unique_hashes[start:start + 500]
+                placeholders = ",".join("?" * len(chunk))
+                rows = self._conn.execute(
+                    f"SELECT hash, vector FROM embeddings WHERE model = ? AND hash IN ({placeholders})",
+                    [model, *chunk],
+                ).fetchall()
+                for h, blob in rows:
+                    found[h] = array("f", blob).tolist()
+
+            if found:
+                self._conn.executemany(
+                    "UPDATE embeddings SET last_access = ? WHERE model = ? AND hash = ?",
+                    [(now, model, h) for h in found],
+                )
+                self._conn.commit()
+
+            results = [found.get(h) for h in hashes]
+            hit_count = sum(1 for r in results if r is not None)
+            self.hits += hit_count
+            self.misses += len(results) - hit_count
+        return results
+
+    def set_many(self, model: str, texts: Sequence[str], vectors: Sequence[Sequence[float]]) -> None:
+        """
+        텍스트와 벡터 쌍을 캐시에 저장하고, 용량/기간 제한을 적용합니다.
+        """
+        if len(texts) != len(vectors):
+            raise ValueError("texts와 vectors의 길이가 다릅니다.")
+        now = time.time()
+        rows = [(model, content_hash(text), array("f", vector).tobytes(), now)
+                for text, vector in zip(texts, vectors)]
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO embeddings (model, hash, vector, last_access) VALUES (?, ?, ?, ?)",
+                rows,
+            )
+            self._conn.commit()
+            self._count += len(rows)
+            due = (self.max_entries is not None and self._count > self.max_entries) or \
+                (self.max_age is not None and time.monotonic() - self._last_evict > EVICT_INTERVAL)
+        if due:
+            self.evict()
+
+    def evict(self) -> int:
+        """
+        max_age보다 오래 사용되지 않은 항목과 max_entries를 초과한 오래된 항목을 제거합니다.
+        제거된 항목 수를 반환합니다.
+        """
+        removed = 0
+        with self._lock:
+            self._last_evict = time.monotonic()
+            if self.max_age is not None:
+                cursor = self._conn.execute(
+                    "DELETE FROM embeddings WHERE last_access < ?", (time.time() - self.max_age,)
+                )
+                removed += cursor.rowcount
+            if self.max_entries is not None:
+                (count,) = self._conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()
+                overflow = count - self.max_entries
+                if overflow > 0:
+                    cursor = self._conn.execute(
+                        "DELETE FROM embeddings WHERE rowid IN "
+                        "(SELECT rowid FROM embeddings ORDER BY last_access ASC LIMIT ?)",
+                        (overflow,),
+                    )
+                    removed += cursor.rowcount
+                    count -= cursor.rowcount
+                self._count = count
+            if removed:
+                self._conn.commit()
+        return removed
+
+    def stats(self) -> Dict[str, float]:
+        """
+        캐시 적중/실패 횟수와 적중률, 저장된 항목 수를 반환합니다.
+        """
+        with self._lock:
+            (count,) = self._conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+            "entries": count,
+        }
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+class QueryEmbeddingCache:
+    """
+    서빙 경로에서 사용하는 프로세스 내 쿼리 임베딩 캐시입니다.
+
+    최대 max_size개의 항목을 LRU 방식으로 보관하며, ttl(초)이 지난 항목은 다시 임베딩합니다.
+    키는 normalize_query()로 정규화된 쿼리 문자열입니다.
+    """
+
+    def __init__(self, max_size: int = 1024, ttl: Optional[float] = 60 * 60):
+        """
+        Args:
+            max_size (int): 보관할 최대 쿼리 수.
+            ttl (Optional[float]): 항목 유효 기간(초). None이면 만료되지 않습니다.
+        """
+        self.max_size = max_size
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[str, Tuple[float, List[float]]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[List[float]]:
+        """
+        정규화된 쿼리에 대한 벡터를 반환합니다. 없거나 만료되었으면 None을 반환합니다.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and self.ttl is not None and time.monotonic() - entry[0] > self.ttl:
+                del self._entries[key]
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def set(self, key: str, vector: List[float]) -> None:
+        """
+        정규화된 쿼리와 벡터를 저장하고, 용량을 넘으면 가장 오래 사용되지 않은 항목을 제거합니다.
+        """
+        with self._lock:
+            self._entries[key] = (time.monotonic(), vector)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, float]:
+        """
+        캐시 적중/실패 횟수와 적중률, 보관 중인 항목 수를 반환합니다.
+        """
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / total if total else 0.0,
+                "entries": len(self._entries),
+            }
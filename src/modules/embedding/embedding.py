@@ -1,27 +1,160 @@
+import asyncio
+import os
+from typing import List, Optional
+
 from langchain_chroma import Chroma
+from langchain_core.embeddings import Embeddings
 from langchain_upstage import UpstageEmbeddings
 
-class Embedding:
-    def __init__(self):
-        self.model = UpstageEmbeddings(model="solar-embedding-1-large")
+from src.modules.embedding.cache import EmbeddingCache, QueryEmbeddingCache, DEFAULT_CACHE_PATH, normalize_query
+from src.modules.embedding.executor import EmbeddingExecutor, aembed_queries, embed_queries
+from src.modules.embedding.hashing import HashingEmbeddings
+
+
+def create_embedding_model(model_name: str = "solar-embedding-1-large", backend: Optional[str] = None) -> Embeddings:
+    """
+    임베딩 백엔드를 생성합니다.
+
+    backend가 없으면 EMBEDDING_BACKEND 환경 변수(upstage | hashing, 기본값 upstage)를 사용합니다.
+    hashing은 네트워크 없이 동작하는 오프라인 백엔드로, 차원은 EMBEDDING_DIMENSION(기본 4096)을 따릅니다.
+    """
+    backend = backend or os.getenv("EMBEDDING_BACKEND", "upstage")
+    if backend == "upstage":
+        # 실행기가 나눈 배치 하나가 API 요청 하나가 되도록 모델의 내부 배치 크기를 맞춥니다.
+        return UpstageEmbeddings(model=model_name, embed_batch_size=100)
+    if backend == "hashing":
+        return HashingEmbeddings(dimension=int(os.getenv("EMBEDDING_DIMENSION", "4096")))
+    raise ValueError(f"지원하지 않는 임베딩 백엔드입니다: {backend}")
+
+
+class Embedding(Embeddings):
+    """
+    Upstage 임베딩 모델을 감싸는 캐싱 래퍼입니다.
+
+    문서 임베딩은 (모델명, 내용 해시) 키로 로컬 디스크 캐시에 저장되므로,
+    변경되지 않은 청크는 다시 임베딩 API로 전송되지 않습니다.
+    캐시에 없는 청크는 EmbeddingExecutor를 통해 배치 단위로 동시에 임베딩됩니다.
+    쿼리 임베딩은 프로세스 내 LRU/TTL 캐시에 보관되어 반복 질문은 API를 호출하지 않습니다.
+    LangChain Embeddings 인터페이스를 구현하므로 벡터 스토어에 그대로 주입할 수 있습니다.
+    """
 
-    def embed_documents(self, texts):
-        # Implement the logic to embed documents using Upstage API
-        pass
+    def __init__(self, model_name: str = "solar-embedding-1-large", cache_path: Optional[str] = DEFAULT_CACHE_PATH,
+                 model: Optional[Embeddings] = None, cache: Optional[EmbeddingCache] = None,
+                 executor: Optional[EmbeddingExecutor] = None,
+                 query_cache: Optional[QueryEmbeddingCache] = None, backend: Optional[str] = None):
+        """
+        Args:
+            model_name (str): 임베딩 모델 이름. 캐시 키의 일부로 사용됩니다.
+            cache_path (Optional[str]): 캐시 SQLite 파일 경로. None이면 디스크 캐시를 사용하지 않습니다.
+            model (Optional[Embeddings]): 실제 임베딩을 수행할 모델. 없으면 backend에 맞춰 생성합니다.
+            cache (Optional[EmbeddingCache]): 외부에서 주입할 캐시 인스턴스.
+            executor (Optional[EmbeddingExecutor]): 문서 임베딩 실행기. 없으면 기본 설정으로 생성합니다.
+            query_cache (Optional[QueryEmbeddingCache]): 쿼리 임베딩 캐시. 없으면 기본 설정으로 생성합니다.
+            backend (Optional[str]): model이 없을 때 사용할 백엔드 (upstage | hashing).
+        """
+        self.model = model if model is not None else create_embedding_model(model_name, backend)
+        if isinstance(self.model, HashingEmbeddings):
+            # 오프라인 벡터가 Upstage 벡터와 같은 캐시 키를 쓰지 않도록 이름을 구분합니다.
+            model_name = f"hashing-{self.model.dimension}"
+        self.model_name = model_name
+        if cache is None and cache_path:
+            cache = EmbeddingCache(cache_path)
+        self.cache = cache
+        self.executor = executor if executor is not None else EmbeddingExecutor(self.model)
+        self.query_cache = query_cache if query_cache is not None else QueryEmbeddingCache()
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        """
+        문서 목록을 임베딩합니다. 캐시에 없는 텍스트만 임베딩 API로 전송합니다.
+        """
+        texts = list(texts)
+        if self.cache is None:
+            return self.executor.embed_documents(texts)
+
+        # 문서(passage)와 쿼리 벡터는 서로 다른 모델로 생성되므로 캐시 키를 구분합니다.
+        cache_key = f"{self.model_name}:passage"
+        vectors = self.cache.get_many(cache_key, texts)
+
+        missing_texts = list(dict.fromkeys(text for text, vector in zip(texts, vectors) if vector is None))
+        if missing_texts:
+            new_vectors = self.executor.embed_documents(missing_texts)
+            self.cache.set_many(cache_key, missing_texts, new_vectors)
+            embedded = dict(zip(missing_texts, new_vectors))
+            vectors = [vector if vector is not None else embedded[text] for text, vector in zip(texts, vectors)]
+        return vectors
+
+    def embed_query(self, text: str) -> List[float]:
+        """
+        쿼리 텍스트를 임베딩합니다. 정규화된 쿼리가 캐시에 있으면 API를 호출하지 않습니다.
+        """
+        query = normalize_query(text)
+        vector = self.query_cache.get(query)
+        if vector is None:
+            vector = self.model.embed_query(query)
+            self.query_cache.set(query, vector)
+        return vector
+
+    def embed_queries(self, texts: List[str]) -> List[List[float]]:
+        """
+        여러 쿼리를 한 번에 임베딩합니다. 캐시에 없는 쿼리만 모아 모델에 한 번 요청합니다.
+        """
+        queries = [normalize_query(text) for text in texts]
+        vectors = {query: self.query_cache.get(query) for query in dict.fromkeys(queries)}
+        missing = [query for query, vector in vectors.items() if vector is None]
+        if missing:
+            for query, vector in zip(missing, embed_queries(self.model, missing, self.executor.max_workers)):
+                self.query_cache.set(query, vector)
+                vectors[query] = vector
+        return [vectors[query] for query in queries]
+
+    async def aembed_documents(self, texts: List[str]) -> List[List[float]]:
+        """
+        embed_documents의 비동기 버전입니다. 캐시 조회와 배치/재시도 실행기는 블로킹이므로 스레드에서 실행합니다.
+        """
+        return await asyncio.to_thread(self.embed_documents, texts)
+
+    async def aembed_query(self, text: str) -> List[float]:
+        """
+        embed_query의 비동기 버전입니다. 캐시에 없으면 모델의 비동기 API(aembed_query)로 임베딩합니다.
+        """
+        query = normalize_query(text)
+        vector = self.query_cache.get(query)
+        if vector is None:
+            vector = await self.model.aembed_query(query)
+            self.query_cache.set(query, vector)
+        return vector
+
+    async def aembed_queries(self, texts: List[str]) -> List[List[float]]:
+        """
+        embed_queries의 비동기 버전입니다. 캐시에 없는 쿼리만 모아 동시에 임베딩합니다.
+        """
+        queries = [normalize_query(text) for text in texts]
+        vectors = {query: self.query_cache.get(query) for query in dict.fromkeys(queries)}
+        missing = [query for query, vector in vectors.items() if vector is None]
+        if missing:
+            for query, vector in zip(missing, await aembed_queries(self.model, missing)):
+                self.query_cache.set(query, vector)
+                vectors[query] = vector
+        return [vectors[query] for query in queries]
+
+    def cache_stats(self) -> dict:
+        """
+        문서 디스크 캐시와 쿼리 캐시의 적중/실패 통계를 반환합니다.
+        """
+        return {
+            "documents": self.cache.stats() if self.cache is not None else {},
+            "queries": self.query_cache.stats(),
+        }
 
-    def embed_query(self, text):
-        # Implement the logic to embed a query using Upstage API
-        pass
 
 def load_vector_store_once(store_path):
     """
     FAISS 벡터스토어를 한 번 로드하여 반환합니다.
     """
-    embeddings = UpstageEmbeddings(model="solar-embedding-1-large")
+    embeddings = Embedding()
 
     return Chroma(
         embedding_function=embeddings,
         persist_directory=store_path,
         collection_name="chroma",
     )
-
@@ -0,0 +1,173 @@
+import asyncio
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional, Sequence, Tuple
+
+from langchain_core.embeddings import Embeddings
+
+# 재시도 대상 HTTP 상태 코드 (요청 한도 초과 및 서버 오류)
+RETRYABLE_STATUS_CODES = {408, 409, 429, 500, 502, 503, 504}
+# 요청 크기 초과로 판단되어 배치를 반으로 나눠 재시도하는 상태 코드
+SPLITTABLE_STATUS_CODES = {400, 413}
+
+
+def get_status_code(error: Exception) -> Optional[int]:
+    """
+    openai/httpx/requests 계열 예외에서 HTTP 상태 코드를 추출합니다. 없으면 None을 반환합니다.
+    """
+    status = getattr(error, "status_code", None)
+    if status is None:
+        response = getattr(error, "response", None)
+        status = getattr(response, "status_code", None)
+    try:
+        return int(status) if status is not None else None
+    except (TypeError, ValueError):
+        return None
+
+
+def get_retry_after(error: Exception) -> Optional[float]:
+    """
+    응답의 Retry-After 헤더(초)를 반환합니다. 없으면 None을 반환합니다.
+    """
+    response = getattr(error, "response", None)
+    headers = getattr(response, "headers", None) or {}
+    value = headers.get("retry-after") or headers.get("Retry-After")
+    try:
+        return float(value) if value is not None else None
+    except (TypeError, ValueError):
+        return None
+
+
+def embed_queries(model: Embeddings, texts: Sequence[str], max_workers: int = 4) -> List[List[float]]:
+    """
+    여러 쿼리를 한 번에 임베딩합니다.
+
+    모델이 embed_queries()를 제공하면(Embedding 래퍼, HashingEmbeddings) 한 번의 호출로 처리하고,
+    그렇지 않으면 embed_query를 스레드 풀에서 동시에 실행하여 전체 지연시간을 요청 하나 수준으로 맞춥니다.
+    결과는 입력 순서대로 반환됩니다.
+    """
+    texts = list(texts)
+    if hasattr(model, "embed_queries"):
+        return model.embed_queries(texts)
+    if len(texts) <= 1:
+        return [model.embed_query(text) for text in texts]
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(texts))) as pool:
+        return list(pool.map(model.embed_query, texts))
+
+
+async def aembed_queries(model: Embeddings, texts: Sequence[str]) -> List[List[float]]:
+    """
+    embed_queries의 비동기 버전입니다. 모델이 aembed_queries()를 제공하면 그대로 사용하고,
+    그렇지 않으면 aembed_query를 동시에 실행합니다 (UpstageEmbeddings는 비동기 HTTP 클라이언트를 사용).
+    """
+    texts = list(texts)
+    if hasattr(model, "aembed_queries"):
+        return await model.aembed_queries(texts)
+    return list(await asyncio.gather(*(model.aembed_query(text) for text in texts)))
+
+
+class EmbeddingExecutor:
+    """
+    문서 임베딩 요청을 크기 기준 배치로 나누어 제한된 스레드 풀에서 동시에 실행합니다.
+
+    429/5xx 응답은 지수 백오프(Retry-After 헤더 우선)로 재시도하고,
+    400/413 응답을 받은 배치는 반으로 나누어 다시 요청합니다.
+    결과 벡터는 항상 입력 순서대로 반환됩니다.
+    UPSTAGE_API_BASE(또는 base_url)로 로컬 가짜 임베딩 서버를 가리키면 네트워크 없이 검증할 수 있습니다
+    (src/test/embedding_executor_test.py 참고).
+    """
+
+    def __init__(self, model: Embeddings, max_batch_size: int = 100, max_batch_chars: int = 40_000,
+                 max_workers: int = 4, max_retries: int = 5, base_delay: float = 1.0, max_delay: float = 30.0):
+        """
+        Args:
+            model (Embeddings): 실제 임베딩을 수행할 모델.
+            max_batch_size (int): 한 요청에 담을 최대 텍스트 수.
+            max_batch_chars (int): 한 요청에 담을 최대 문자 수.
+            max_workers (int): 동시에 실행할 요청 수.
+            max_retries (int): 재시도 가능한 오류에 대한 최대 재시도 횟수.
+            base_delay (float): 백오프 기본 대기 시간(초).
+            max_delay (float): 백오프 최대 대기 시간(초).
+        """
+        self.model = model
+        self.max_batch_size = max_batch_size
+        self.max_batch_chars = max_batch_chars
+        self.max_workers = max_workers
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.retries = 0
+        self.splits = 0
+        self._lock = threading.Lock()
+
+    def make_batches(self, texts: Sequence[str]) -> List[Tuple[int, List[str]]]:
+        """
+        텍스트 목록을 (시작 위치, 배치) 목록으로 나눕니다.
+        배치는 max_batch_size개, max_batch_chars 문자를 넘지 않습니다.
+        """
+        batches = []
+        start = 0
+        current: List[str] = []
+        current_chars = 0
+        for i, text in enumerate(texts):
+            if current and (len(current) >= self.max_batch_size or current_chars + len(text) > self.max_batch_chars):
+                batches.append((start, current))
+                start, current, current_chars = i, [], 0
+            current.append(text)
+            current_chars += len(text)
+        if current:
+            batches.append((start, current))
+        return batches
+
+    def embed_documents(self, texts: Sequence[str]) -> List[List[float]]:
+        """
+        텍스트 목록을 배치 단위로 동시에 임베딩하고, 입력 순서대로 벡터를 반환합니다.
+        """
+        texts = list(texts)
+        if not texts:
+            return []
+        batches = self.make_batches(texts)
+        results: List[Optional[List[float]]] = [None] * len(texts)
+
+        if len(batches) == 1 or self.max_workers <= 1:
+            for start, batch in batches:
+                results[start:start + len(batch)] = self._embed_batch(batch)
+            return results
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            futures = [(start, batch, pool.submit(self._embed_batch, batch)) for start, batch in batches]
+            for start, batch, future in futures:
+                results[start:start + len(batch)] = future.result()
+        return results
+
+    def _embed_batch(self, batch: List[str]) -> List[List[float]]:
+        """
+        하나의 배치를 임베딩합니다. 재시도 가능한 오류는 백오프 후 재시도합니다.
+        """
+        attempt = 0
+        while True:
+            try:
+                vectors = self.model.embed_documents(batch)
+                if len(vectors) != len(batch):
+                    raise ValueError(f"임베딩 결과 개수가 다릅니다: 요청 {len(batch)}개, 응답 {len(vectors)}개")
+                return vectors
+            except Exception as e:
+                status = get_status_code(e)
+                if status in SPLITTABLE_STATUS_CODES and len(batch) > 1:
+                    with self._lock:
+                        self.splits += 1
+                    middle = len(batch) // 2
+                    return self._embed_batch(batch[:middle]) + self._embed_batch(batch[middle:])
+                if status not in RETRYABLE_STATUS_CODES or attempt >= self.max_retries:
+                    raise
+                delay = get_retry_after(e)
+                if delay is None:
+                    delay = min(self.max_delay, self.base_delay * (2 ** attempt))
+                    delay = delay * (0.5 + random.random() / 2)
+                attempt += 1
+                with self._lock:
+                    self.retries += 1
+                print(f"임베딩 요청 실패(status={status}), {delay:.1f}초 후 재시도합니다. ({attempt}/{self.max_retries})")
+                time.sleep(delay)
@@ -0,0 +1,79 @@
+from typing import List, Sequence, Tuple
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+_FNV_OFFSET = np.uint64(0xCBF29CE484222325)
+_FNV_PRIME = np.uint64(0x100000001B3)
+_MIX_CONSTANT = np.uint64(0xFF51AFD7ED558CCD)
+
+
+class HashingEmbeddings(Embeddings):
+    """
+    네트워크 없이 동작하는 결정적(deterministic) 임베딩 백엔드입니다.
+
+    텍스트의 문자 n-gram을 해싱하여 고정 차원 벡터에 누적(feature hashing)한 뒤 L2 정규화합니다.
+    한국어는 음절 단위 n-gram만으로도 어휘 겹침을 잘 반영하므로, 벤치마크/CI에서
+    UpstageEmbeddings 대신 주입하여 인덱싱·검색 지연시간을 측정하는 용도로 사용합니다.
+    같은 입력은 프로세스나 머신이 달라도 항상 같은 벡터가 됩니다.
+    """
+
+    def __init__(self, dimension: int = 4096, ngram_range: Tuple[int, int] = (1, 3), lowercase: bool = True):
+        """
+        Args:
+            dimension (int): 벡터 차원. 기본값은 solar-embedding-1-large와 같은 4096입니다.
+            ngram_range (Tuple[int, int]): 사용할 문자 n-gram 길이의 (최소, 최대) 범위.
+            lowercase (bool): 해싱 전에 소문자로 변환할지 여부.
+        """
+        if dimension <= 0:
+            raise ValueError("dimension은 0보다 커야 합니다.")
+        self.dimension = dimension
+        self.ngram_range = ngram_range
+        self.lowercase = lowercase
+
+    def _ngram_hashes(self, codes: np.ndarray, n: int) -> np.ndarray:
+        """
+        코드포인트 배열에서 길이 n인 모든 n-gram의 64비트 해시를 계산합니다 (FNV-1a + 비트 믹싱).
+        """
+        count = len(codes) - n + 1
+        hashes = np.full(count, _FNV_OFFSET ^ np.uint64(n), dtype=np.uint64)
+        for offset in range(n):
+            hashes ^= codes[offset:offset + count]
+            hashes *= _FNV_PRIME
+        hashes ^= hashes >> np.uint64(33)
+        hashes *= _MIX_CONSTANT
+        hashes ^= hashes >> np.uint64(33)
+        return hashes
+
+    def embed_array(self, texts: Sequence[str]) -> np.ndarray:
+        """
+        텍스트 목록을 (len(texts), dimension) float32 배열로 임베딩합니다.
+        """
+        vectors = np.zeros((len(texts), self.dimension), dtype=np.float32)
+        dimension = np.uint64(self.dimension)
+        min_n, max_n = self.ngram_range
+        for row, text in enumerate(texts):
+            text = " ".join(text.split())
+            if self.lowercase:
+                text = text.lower()
+            codes = np.frombuffer(text.encode("utf-32-le"), dtype=np.uint32).astype(np.uint64)
+            for n in range(min_n, max_n + 1):
+                if len(codes) < n:
+                    break
+                hashes = self._ngram_hashes(codes, n)
+                buckets = (hashes % dimension).astype(np.int64)
+                # 최상위 비트로 부호를 정해 해시 충돌로 인한 편향을 상쇄합니다.
+                signs = 1.0 - 2.0 * (hashes >> np.uint64(63)).astype(np.float32)
+                vectors[row] += np.bincount(buckets, weights=signs, minlength=self.dimension).astype(np.float32)
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        return vectors / norms
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return self.embed_array(texts).tolist()
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.embed_array([text])[0].tolist()
+
+    def embed_queries(self, texts: List[str]) -> List[List[float]]:
+        return self.embed_array(texts).tolist()
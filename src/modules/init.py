@@ -1,23 +1,26 @@
 import ast
-from typing import List
+import os
+from typing import Dict, List, Optional
 
 from dotenv import load_dotenv
 from langchain_community.document_transformers import MarkdownifyTransformer
 from langchain_text_splitters import RecursiveCharacterTextSplitter
 
 from src.modules.vector_store.vector_store import Faiss, ChromaStore
+from src.modules.vector_store.sharded_store import ShardedStore
+from src.modules.vector_store.versioned_store import IndexVersions
 from src.modules.embedding.embedding import Embedding
 from src.modules.loader.notion_loader import NotionLoader, LawLoader, LectureLoader, MarkDownLoader, CSVLoader
+from src.modules.loader.dedup import PROTECTED_FIELDS, NearDuplicateFilter
+from src.modules.loader.pipeline import FunctionLoader, IngestionPipeline, SourceJob
+from src.modules.loader.source_manifest import SOURCE_MANIFEST_FILE, SourceManifest, content_digest
 import csv
 from langchain_core.documents import Document
 
 
-def init():
+def init(store_root: str = "../chroma2"):
     notion_url = "https://sincere-nova-ec6.notion.site/a8bbcb69d87c4c19aabee16c6a178286"
-    loader = NotionLoader()
-    document = loader.load(notion_url)
     md = MarkdownifyTransformer()
-    converted_docs = md.transform_documents(document)
     text_splitter = RecursiveCharacterTextSplitter(
         chunk_size=500,
         chunk_overlap=150,
@@ -29,30 +32,101 @@ def init():
         # length_function=length_function,
     )
     embeddings = Embedding()
-    vector_store = ChromaStore(embeddings.model, persist_directory="../chroma2")
-
-    # Notion 문서 변환 및 분할
-    chunked_docs = text_splitter.split_documents(converted_docs)
-    if document is not None:
-        vector_store.add_documents(chunked_docs)
-
-    # 시간표
-    csv_docs = load_schedule_csv_2('../files/schedule.csv')
-    vector_store.add_documents(csv_docs)
-
-    # 강의 시간표
-    csv_docs = CSVLoader().load('../files/online_lecture.csv')
-    vector_store.add_documents(csv_docs)
-
-    # 슬랙 활용법
-    md_docs = MarkDownLoader().load('../files/slack.md')
-    md_chunks = md_splitter.split_documents(md_docs)
-    vector_store.add_documents(md_chunks)
-    # input, output 정의가 되어야됨
-
-    # 법
-    law_docs = LawLoader().load('law.txt')
-    vector_store.add_documents(law_docs)
+    # 서비스 중인 스토어를 그대로 두고 새 버전 디렉터리에 적재한 뒤, 다 쓰면 CURRENT를 교체합니다.
+    # 새 버전은 현재 버전의 복사본에서 시작하므로 바뀐 청크만 임베딩합니다.
+    versions = IndexVersions(store_root)
+    law_path = os.path.join(os.path.dirname(__file__), "..", "files", "law.txt")
+
+    def ingest(path: str) -> bool:
+        # 도메인(route_question의 카테고리)마다 같은 디렉터리 안의 별도 컬렉션에 저장합니다.
+        vector_store = ShardedStore(
+            lambda domain: ChromaStore(embeddings, persist_directory=path, collection_name=domain)
+        )
+        # 소스별 mtime, 크기, 내용 해시와 청크 ID. 바뀐 소스만 분할, 임베딩합니다.
+        manifest = SourceManifest(os.path.join(path, SOURCE_MANIFEST_FILE))
+
+        def prepare_notion(docs: List[Document]) -> Optional[List[Document]]:
+            # Notion 문서 변환 및 분할 (휴가 안내). 내용이 바뀐 페이지만 분할합니다.
+            pages: Dict[str, List[Document]] = {}
+            for doc in md.transform_documents(docs):
+                pages.setdefault(doc.metadata.get("source", notion_url), []).append(doc)
+            changed_pages = [page_docs for source, page_docs in pages.items()
+                             if manifest.content_changed(source, content_digest(doc.page_content for doc in page_docs))]
+            if not changed_pages:
+                return None
+            return [chunk for page_docs in changed_pages
+                    for chunk in tag_domain(text_splitter.split_documents(page_docs), "vacation")]
+
+        # 로컬 파일은 mtime/크기/해시가 바뀐 경우에만 작업으로 등록합니다.
+        # NOTION_LOADER_MODE=http이면 브라우저 없이 노션 블록 데이터 API로 가져옵니다 (NotionLoader.MODES 참고).
+        notion_loader = NotionLoader(mode=os.getenv("NOTION_LOADER_MODE", "browser"))
+        jobs = [SourceJob(notion_url, notion_loader, prepare=prepare_notion)]
+        if manifest.file_changed('../files/schedule.csv'):
+            # 시간표
+            jobs.append(SourceJob('../files/schedule.csv', FunctionLoader(load_schedule_csv_2),
+                                  prepare=lambda docs: tag_domain(docs, "timetable", source='../files/schedule.csv')))
+        if manifest.file_changed('../files/online_lecture.csv'):
+            # 강의 시간표
+            jobs.append(SourceJob('../files/online_lecture.csv', CSVLoader(),
+                                  prepare=lambda docs: tag_domain(docs, "timetable",
+                                                                  source='../files/online_lecture.csv')))
+        if manifest.file_changed('../files/slack.md'):
+            # 슬랙 활용법
+            jobs.append(SourceJob('../files/slack.md', MarkDownLoader(),
+                                  prepare=lambda docs: tag_domain(md_splitter.split_documents(docs), "etc",
+                                                                  source='../files/slack.md')))
+            # input, output 정의가 되어야됨
+        if manifest.file_changed('law.txt', law_path):
+            # 법
+            jobs.append(SourceJob('law.txt', LawLoader(),
+                                  prepare=lambda docs: tag_domain(docs, "legal", source='law.txt')))
+
+        changed = []
+
+        def record(job: SourceJob, ids_by_source: Dict[str, List[str]]):
+            for source in ids_by_source or [job.source]:
+                manifest.record(source, ids_by_source.get(source, []))
+                changed.append(source)
+
+        # 임베딩 전에 완전/유사 중복 청크를 제거합니다. 청크 삭제가 소스 단위(delete_stale, delete_by_source)이므로
+        # source를 보호 필드에 넣어 같은 소스 안의 중복만 병합합니다. 다른 소스의 청크를 대표로 남기면
+        # 그 소스가 삭제되거나 다시 적재될 때 이 소스의 내용도 함께 사라집니다.
+        dedup = NearDuplicateFilter(protected_fields=PROTECTED_FIELDS + ("source",))
+        # 소스 로드(크롤링 포함)는 동시에 실행되고, 분할과 임베딩/쓰기는 로드가 끝난 소스부터 진행합니다.
+        # 결정적 청크 ID로 upsert하고, 다시 적재한 소스에서 사라진 이전 청크는 삭제합니다.
+        pipeline = IngestionPipeline(vector_store, dedup=dedup, on_written=record)
+        with vector_store.bulk():
+            pipeline.run(jobs)
+            for job in pipeline.failed:
+                # 크롤링에 실패하면 이전에 적재한 페이지를 그대로 둡니다.
+                manifest.keep(job.source)
+
+            # 더 이상 적재하지 않는 소스의 청크를 삭제합니다.
+            removed = manifest.removed_sources()
+            for source in removed:
+                vector_store.delete_by_source(source)
+                manifest.forget(source)
+
+        manifest.save()
+        print(f"변경된 소스 {len(changed)}개, 삭제된 소스 {len(removed)}개를 반영했습니다.")
+        if changed:
+            print(f"중복 제거 결과: 적재 {dedup.stats['kept']}개, "
+                  f"완전 중복 {dedup.stats['exact']}개, 유사 중복 {dedup.stats['near']}개 제외")
+        # 바뀐 소스가 없으면 새 버전을 게시하지 않습니다.
+        return bool(changed or removed)
+
+    versions.build(ingest)
+
+def tag_domain(docs: List[Document], domain: str, source: Optional[str] = None) -> List[Document]:
+    """
+    문서 메타데이터에 도메인(저장할 샤드)을 기록합니다.
+    source가 주어지면 metadata["source"]가 없는 문서에 채웁니다. 청크 ID와 소스별 교체의 기준이 됩니다.
+    """
+    for doc in docs:
+        doc.metadata["domain"] = domain
+        if source is not None:
+            doc.metadata.setdefault("source", source)
+    return docs
 
 
 def load_schedule_csv(csv_path) -> List[Document]:
@@ -124,6 +198,7 @@ def load_schedule_csv_2(csv_path, pivot_month=11, next_year="2025"):
             content = str(timetable_dict)
             metadata = {
                 "search_date": full_date,  # 예: "2024-11-18"
+                "document_type": "csv_row",
             }
 
             documents.append(Document(page_content=content, metadata=metadata))
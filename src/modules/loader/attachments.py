@@ -0,0 +1,280 @@
+import hashlib
+import http.cookiejar
+import json
+import os
+import re
+import threading
+import time
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+from urllib.parse import unquote, urlparse, urlunparse
+
+from src.modules.loader.notion_http import DEFAULT_TIMEOUT, USER_AGENT
+
+# 다운로드 디렉터리 안에 저장되는 첨부 파일 manifest (키 → 로컬 경로, 크기, sha256). 키는 attachment_key 참고.
+ATTACHMENT_MANIFEST_FILE = "attachments.json"
+# 브라우저가 직접 내려받는 파일을 모으는 다운로드 디렉터리 안의 임시 디렉터리
+BROWSER_DOWNLOAD_DIR = ".browser-downloads"
+DEFAULT_MAX_WORKERS = 4
+# 브라우저가 직접 내려받는 파일을 기다리는 최대 시간(초)과 확인 간격
+DOWNLOAD_WAIT_TIMEOUT = 30
+DOWNLOAD_POLL_INTERVAL = 0.5
+_COPY_BLOCK = 1 << 16
+
+
+def attachment_key(url: str) -> str:
+    """
+    manifest 키로 쓰는 URL입니다. 노션 파일 URL은 요청할 때마다 서명(signature, expirationTimestamp)이 바뀌므로
+    쿼리와 fragment를 뺍니다. 파일이 바뀌면 경로의 파일 ID가 바뀝니다. 블록 ID 등 URL이 아닌 키는 그대로 둡니다.
+    """
+    return urlunparse(urlparse(url)._replace(query="", fragment=""))
+
+
+def file_digest(path: str) -> Tuple[int, str]:
+    """파일의 크기와 sha256입니다."""
+    digest = hashlib.sha256()
+    size = 0
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(_COPY_BLOCK), b""):
+            digest.update(block)
+            size += len(block)
+    return size, digest.hexdigest()
+
+
+def wait_for_download(directory: str, known: Iterable[str], suffix: str = ".docx",
+                      timeout: float = DOWNLOAD_WAIT_TIMEOUT, ignore: Iterable[str] = ()) -> Optional[str]:
+    """
+    브라우저가 directory에 내려받는 파일을 기다립니다. known에 없는 suffix 파일이 생기고 진행 중인 다운로드(.crdownload)가
+    없으면 그 경로(여러 개면 가장 최근 파일)를, timeout까지 생기지 않으면 None을 반환합니다.
+    ignore의 이름(" (n)" 접미사 무시)은 다른 경로로 내려받는 파일이 브라우저에도 함께 받아진 것이므로 고르지 않습니다.
+    directory는 브라우저 전용 임시 디렉터리(BROWSER_DOWNLOAD_DIR)이므로 나열 비용이 작습니다.
+    """
+    known, ignore = set(known), set(ignore)
+    deadline = time.monotonic() + timeout
+    while True:
+        names = os.listdir(directory)
+        if not any(name.endswith(".crdownload") for name in names):
+            new = [name for name in names if name not in known and name.endswith(suffix)
+                   and re.sub(r" \(\d+\)(?=\.[^.]*$)", "", name) not in ignore]
+            if new:
+                return max((os.path.join(directory, name) for name in new), key=os.path.getmtime)
+        if time.monotonic() >= deadline:
+            return None
+        time.sleep(DOWNLOAD_POLL_INTERVAL)
+
+
+class AttachmentManifest:
+    """
+    내려받은 첨부 파일을 키(attachment_key로 정리한 URL, 또는 노션 블록 ID)별로 기록합니다. 다시 적재할 때 디렉터리를
+    나열하지 않고 파일 하나당 한 번의 조회와 파일 크기 확인으로 내려받을지 결정합니다.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.entries: Dict[str, Dict[str, Any]] = {}
+        self._owners: Dict[str, str] = {}
+        self._lock = threading.Lock()
+        if os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                # 서명된 URL 전체를 키로 쓰던 이전 manifest도 같은 키로 읽습니다.
+                self.entries = {attachment_key(key): entry for key, entry in json.load(f).items()}
+        for key, entry in self.entries.items():
+            self._owners[entry["path"]] = key
+
+    def lookup(self, key: str) -> Optional[str]:
+        """
+        기록된 파일이 있고 크기가 같으면 로컬 경로를, 아니면 None을 반환합니다.
+        내용 해시는 verify()에서만 다시 계산합니다.
+        """
+        entry = self.entries.get(key)
+        if entry is None:
+            return None
+        try:
+            if os.path.getsize(entry["path"]) != entry["size"]:
+                return None
+        except OSError:
+            return None
+        return entry["path"]
+
+    def verify(self, key: str) -> bool:
+        """기록된 파일의 sha256이 manifest와 같은지 확인합니다."""
+        entry = self.entries.get(key)
+        if entry is None or self.lookup(key) is None:
+            return False
+        return file_digest(entry["path"])[1] == entry["sha256"]
+
+    def reserve_path(self, key: str, path: str) -> str:
+        """
+        같은 키가 기록해 둔 파일이 있으면 그 경로를 반환하여 덮어쓰게 합니다.
+        다른 키가 이미 사용하는 파일 이름이면 "이름 (n).확장자"로 바꾸어 반환합니다.
+        """
+        with self._lock:
+            entry = self.entries.get(key)
+            if entry is not None:
+                return entry["path"]
+            stem, ext = os.path.splitext(path)
+            candidate, n = path, 1
+            while self._owners.get(candidate, key) != key:
+                candidate = f"{stem} ({n}){ext}"
+                n += 1
+            self._owners[candidate] = key
+            return candidate
+
+    def rekey(self, old: str, new: str) -> None:
+        """old 키의 기록을 new 키로 옮깁니다 (URL로 기록한 파일을 블록 ID로 다시 찾을 때). new 키가 이미 있으면 그대로 둡니다."""
+        with self._lock:
+            if old == new or old not in self.entries or new in self.entries:
+                return
+            entry = self.entries.pop(old)
+            self.entries[new] = entry
+            self._owners[entry["path"]] = new
+
+    def record(self, key: str, path: str, size: int, sha256: str) -> None:
+        with self._lock:
+            self.entries[key] = {"path": path, "size": size, "sha256": sha256}
+            self._owners[path] = key
+
+    def save(self) -> None:
+        with self._lock:
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            staging = f"{self.path}.tmp-{os.getpid()}"
+            with open(staging, "w", encoding="utf-8") as f:
+                json.dump(self.entries, f, ensure_ascii=False, indent=2)
+            os.replace(staging, self.path)
+
+
+def filename_from_url(url: str) -> str:
+    """URL 경로의 마지막 부분을 파일 이름으로 사용합니다 ('+'는 기존 다운로드 파일과 같이 그대로 둡니다)."""
+    return unquote(os.path.basename(urlparse(url).path)) or hashlib.sha1(url.encode("utf-8")).hexdigest()
+
+
+def browser_cookie(cookie: Dict[str, Any]) -> http.cookiejar.Cookie:
+    """
+    selenium 쿠키(name, value, domain, path, secure, expiry)를 http.cookiejar 쿠키로 변환합니다.
+    domain이 '.'으로 시작하면 하위 도메인에도, 아니면 그 호스트에만 보냅니다.
+    """
+    domain = cookie.get("domain", "")
+    expiry = cookie.get("expiry")
+    return http.cookiejar.Cookie(
+        version=0, name=cookie["name"], value=cookie["value"], port=None, port_specified=False,
+        domain=domain, domain_specified=domain.startswith("."), domain_initial_dot=domain.startswith("."),
+        path=cookie.get("path") or "/", path_specified=True, secure=bool(cookie.get("secure")),
+        expires=int(expiry) if expiry is not None else None, discard=expiry is None,
+        comment=None, comment_url=None, rest={"HttpOnly": None} if cookie.get("httpOnly") else {},
+    )
+
+
+class AttachmentDownloader:
+    """
+    첨부 파일을 제한된 스레드 풀에서 동시에 내려받습니다.
+
+    각 파일은 임시 파일(.part)에 쓰면서 sha256을 계산하고, Content-Length와 받은 바이트 수가 같을 때만
+    최종 이름으로 옮긴 뒤 manifest에 기록합니다. 따라서 완료 여부를 확인하려고 디렉터리를 반복해서 나열할 필요가 없고,
+    중간에 끊긴 다운로드가 완료된 파일로 남지 않습니다.
+    """
+
+    def __init__(self, download_dir: str, manifest_path: Optional[str] = None, max_workers: int = DEFAULT_MAX_WORKERS,
+                 timeout: float = DEFAULT_TIMEOUT, cookies: Optional[Sequence[Dict[str, Any]]] = None):
+        """
+        Args:
+            download_dir (str): 파일을 저장할 디렉터리.
+            manifest_path (Optional[str]): manifest 파일 경로. 기본값은 download_dir/attachments.json.
+            max_workers (int): 동시에 내려받을 최대 파일 수.
+            timeout (float): 요청 제한 시간(초).
+            cookies (Optional[Sequence[Dict[str, Any]]]): 브라우저 세션의 쿠키 (selenium get_cookies() 형식).
+                쿠키 저장소에 넣어 도메인과 경로가 맞는 요청에만 보냅니다. 리다이렉트된 다른 호스트(S3 등)에는 보내지 않습니다.
+        """
+        self.download_dir = os.path.abspath(download_dir)
+        self.manifest = AttachmentManifest(manifest_path or os.path.join(self.download_dir, ATTACHMENT_MANIFEST_FILE))
+        self.max_workers = max_workers
+        self.timeout = timeout
+        self.cookie_jar = http.cookiejar.CookieJar()
+        for cookie in cookies or []:
+            self.cookie_jar.set_cookie(browser_cookie(cookie))
+        self._opener = urllib.request.build_opener(urllib.request.HTTPCookieProcessor(self.cookie_jar))
+        self.stats = {"downloaded": 0, "skipped": 0, "failed": 0}
+        self._stats_lock = threading.Lock()
+
+    def _count(self, key: str) -> None:
+        with self._stats_lock:
+            self.stats[key] += 1
+
+    def download(self, url: str, filename: Optional[str] = None, key: Optional[str] = None) -> Optional[str]:
+        """
+        파일 하나를 내려받아 로컬 경로를 반환합니다. manifest에 같은 키(기본값은 attachment_key(url))의 파일이 있으면
+        요청하지 않고, 크기가 달라 다시 내려받으면 같은 경로에 덮어씁니다. 실패하면 None을 반환합니다.
+        """
+        if key is None:
+            key = attachment_key(url)
+        else:
+            # URL을 키로 쓰던 이전 manifest의 파일은 같은 경로에 이어서 기록합니다.
+            self.manifest.rekey(attachment_key(url), key)
+        cached = self.manifest.lookup(key)
+        if cached is not None:
+            self._count("skipped")
+            return cached
+
+        path = self.manifest.reserve_path(key, os.path.join(self.download_dir, filename or filename_from_url(url)))
+        staging = f"{path}.part"
+        request = urllib.request.Request(url, headers={"User-Agent": USER_AGENT})
+        try:
+            os.makedirs(self.download_dir, exist_ok=True)
+            digest = hashlib.sha256()
+            size = 0
+            with self._opener.open(request, timeout=self.timeout) as response, open(staging, "wb") as f:
+                expected = response.headers.get("Content-Length")
+                for block in iter(lambda: response.read(_COPY_BLOCK), b""):
+                    f.write(block)
+                    digest.update(block)
+                    size += len(block)
+            if expected is not None and int(expected) != size:
+                raise IOError(f"받은 크기({size})가 Content-Length({expected})와 다릅니다.")
+            os.replace(staging, path)
+        except Exception as e:
+            print(f"첨부 파일 다운로드 실패: {url} ({e})")
+            if os.path.exists(staging):
+                os.remove(staging)
+            self._count("failed")
+            return None
+        self.manifest.record(key, path, size, digest.hexdigest())
+        self._count("downloaded")
+        return path
+
+    def adopt(self, key: str, downloaded_path: str, filename: Optional[str] = None) -> str:
+        """
+        브라우저가 직접 내려받은 파일을 download_dir/filename으로 옮기고 manifest에 기록한 뒤 저장합니다.
+        같은 키의 이전 파일은 덮어씁니다. downloaded_path는 download_dir과 같은 파일 시스템에 있어야 합니다.
+        """
+        path = self.manifest.reserve_path(key, os.path.join(self.download_dir,
+                                                            filename or os.path.basename(downloaded_path)))
+        size, sha256 = file_digest(downloaded_path)
+        os.replace(downloaded_path, path)
+        self.manifest.record(key, path, size, sha256)
+        self.manifest.save()
+        self._count("downloaded")
+        return path
+
+    def download_all(self, urls: Sequence[str], filenames: Optional[Sequence[Optional[str]]] = None,
+                     keys: Optional[Sequence[Optional[str]]] = None) -> List[str]:
+        """
+        여러 파일을 동시에 내려받고, 성공한 파일의 로컬 경로를 입력 순서대로 반환합니다. 끝나면 manifest를 저장합니다.
+        keys[i]가 주어지면 i번째 파일의 manifest 키로 씁니다 (노션 블록 ID 등).
+        """
+        urls = list(urls)
+        filenames = list(filenames) if filenames is not None else [None] * len(urls)
+        keys = [key or attachment_key(url) for url, key in zip(urls, keys if keys is not None else [None] * len(urls))]
+        if not urls:
+            return []
+        self.stats = {"downloaded": 0, "skipped": 0, "failed": 0}
+        # 같은 파일을 두 스레드가 같은 임시 파일에 쓰지 않도록 키마다 한 번씩만 요청합니다.
+        unique: Dict[str, Tuple[str, Optional[str]]] = {}
+        for url, filename, key in zip(urls, filenames, keys):
+            unique.setdefault(key, (url, filename))
+        with ThreadPoolExecutor(max_workers=max(1, min(self.max_workers, len(unique)))) as pool:
+            results = dict(zip(unique, pool.map(lambda key: self.download(*unique[key], key=key), unique)))
+        self.manifest.save()
+        paths = list(dict.fromkeys(results[key] for key in keys))
+        print(f"첨부 파일 {len(urls)}개: 다운로드 {self.stats['downloaded']}개, "
+              f"기존 파일 사용 {self.stats['skipped']}개, 실패 {self.stats['failed']}개")
+        return [path for path in paths if path is not None]
@@ -0,0 +1,225 @@
+import hashlib
+import json
+import re
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+from langchain_core.documents import Document
+
+# MinHash 서명 길이와 LSH 밴드 수. 128 = 16밴드 x 8행이면 Jaccard 유사도 약 0.7 이상인 쌍이 높은 확률로 후보가 되고,
+# 후보는 서명으로 추정한 유사도가 threshold 이상일 때만 중복으로 판정합니다.
+NUM_PERM = 128
+NUM_BANDS = 16
+# 문자 n-gram 길이. 한국어는 띄어쓰기가 불규칙하므로 단어 대신 문자 단위로 자릅니다.
+SHINGLE_SIZE = 5
+DEFAULT_THRESHOLD = 0.8
+# 이 필드 값이 다른 문서는 내용이 비슷해도 병합하지 않습니다 (날짜별 시간표, 도메인별 샤드).
+PROTECTED_FIELDS = ("domain", "search_date")
+# 이 document_type의 문서는 완전 중복만 제거합니다. CSV 행은 날짜나 회차 한 칸만 다른 것이 정상이므로
+# 문자 n-gram 유사도로 병합하면 다른 행이 사라집니다.
+EXACT_ONLY_TYPES = ("csv_row",)
+
+# 해시 순열 (a * x + b) mod p 에 쓰는 메르센 소수. a, x < 2^31 이므로 uint64 곱셈이 넘치지 않습니다.
+_PRIME = np.uint64((1 << 31) - 1)
+_ROLLING_BASE = np.uint64(1_000_003)
+# 긴 문서에서 (순열 수 x n-gram 수) 행렬이 너무 커지지 않도록 n-gram을 나누어 처리합니다.
+_SHINGLE_BLOCK = 4096
+
+
+def normalize_text(text: str) -> str:
+    """공백을 하나로 합치고 소문자로 바꿉니다. 완전 중복과 n-gram 비교 모두 이 형태를 사용합니다."""
+    return re.sub(r"\s+", " ", text).strip().lower()
+
+
+def shingle_hashes(text: str, shingle_size: int = SHINGLE_SIZE) -> np.ndarray:
+    """
+    정규화된 텍스트의 문자 n-gram을 중복 없는 31비트 해시 배열로 변환합니다.
+    """
+    codes = np.frombuffer(text.encode("utf-32-le"), dtype=np.uint32).astype(np.uint64)
+    if len(codes) == 0:
+        return np.zeros(1, dtype=np.uint64)
+    size = min(shingle_size, len(codes))
+    count = len(codes) - size + 1
+    hashes = np.zeros(count, dtype=np.uint64)
+    # 다항식 롤링 해시 (uint64 오버플로는 mod 2^64로 동작)
+    for offset in range(size):
+        hashes = hashes * _ROLLING_BASE + codes[offset:offset + count]
+    return np.unique(hashes % _PRIME)
+
+
+class NearDuplicateFilter:
+    """
+    임베딩 전에 완전 중복과 유사 중복(MinHash LSH) 청크를 제거하는 적재 단계입니다.
+
+    겹침(overlap)이 큰 분할기와 같은 문단이 여러 페이지에 반복되는 문서에서는 같은 내용의 청크가 여러 번 만들어져
+    임베딩 비용과 인덱스 크기가 늘고, 검색 상위 k개가 같은 문단의 복사본으로 채워집니다.
+    중복으로 판정된 청크는 먼저 나온 청크(대표)에 메타데이터를 병합한 뒤 버립니다.
+
+    filter()를 여러 번 호출하면 이전 호출에서 남긴 청크와도 비교하므로, 여러 소스를 차례로 적재할 때
+    인스턴스 하나를 공유하면 소스 사이의 중복도 제거됩니다. 청크를 소스 단위로 삭제, 교체하는 증분 적재에서는
+    protected_fields에 "source"를 넣어 같은 소스 안에서만 병합하세요.
+    이전 호출에서 반환한(이미 저장했을 수 있는) 대표에 병합이 일어나면 take_updated()로 그 대표를 돌려받아
+    다시 저장해야 병합된 메타데이터가 스토어에 반영됩니다.
+    """
+
+    def __init__(self, threshold: float = DEFAULT_THRESHOLD, num_perm: int = NUM_PERM, num_bands: int = NUM_BANDS,
+                 shingle_size: int = SHINGLE_SIZE, protected_fields: Sequence[str] = PROTECTED_FIELDS,
+                 exact_only_types: Sequence[str] = EXACT_ONLY_TYPES, seed: int = 0):
+        """
+        Args:
+            threshold (float): 유사 중복으로 판정할 추정 Jaccard 유사도(문자 n-gram 기준).
+            num_perm (int): MinHash 서명 길이. num_bands의 배수여야 합니다.
+            num_bands (int): LSH 밴드 수. 많을수록 낮은 유사도의 쌍까지 후보로 비교합니다.
+            shingle_size (int): 문자 n-gram 길이.
+            protected_fields (Sequence[str]): 값이 다르면 병합하지 않을 메타데이터 필드.
+            exact_only_types (Sequence[str]): 유사 중복 비교에서 제외하고 완전 중복만 제거할 document_type.
+            seed (int): 해시 순열 난수 시드. 같은 시드면 실행마다 같은 결과를 냅니다.
+        """
+        if num_perm % num_bands != 0:
+            raise ValueError(f"num_perm({num_perm})은 num_bands({num_bands})의 배수여야 합니다.")
+        self.threshold = threshold
+        self.num_bands = num_bands
+        self.rows_per_band = num_perm // num_bands
+        self.shingle_size = shingle_size
+        self.protected_fields = tuple(protected_fields)
+        self.exact_only_types = frozenset(exact_only_types)
+        rng = np.random.default_rng(seed)
+        self._a = rng.integers(1, int(_PRIME), size=num_perm, dtype=np.uint64)
+        self._b = rng.integers(0, int(_PRIME), size=num_perm, dtype=np.uint64)
+
+        self._exact: Dict[Tuple[Any, str], Document] = {}
+        self._buckets: Dict[Tuple[int, Any, bytes], List[int]] = {}
+        self._representatives: List[Tuple[Document, np.ndarray]] = []
+        # 이전 filter() 호출에서 반환한 뒤 메타데이터가 병합된 대표 (id(문서) → 문서)
+        self._updated: Dict[int, Document] = {}
+        self.stats = {"kept": 0, "exact": 0, "near": 0}
+
+    def signature(self, text: str) -> np.ndarray:
+        """정규화된 텍스트의 MinHash 서명을 계산합니다."""
+        hashes = shingle_hashes(text, self.shingle_size)
+        signature = np.full(len(self._a), _PRIME, dtype=np.uint64)
+        for start in range(0, len(hashes), _SHINGLE_BLOCK):
+            block = hashes[start:start + _SHINGLE_BLOCK]
+            permuted = (self._a[:, None] * block[None, :] + self._b[:, None]) % _PRIME
+            np.minimum(signature, permuted.min(axis=1), out=signature)
+        return signature
+
+    def _protected_key(self, doc: Document) -> Tuple:
+        return tuple(str(doc.metadata.get(field)) for field in self.protected_fields)
+
+    def _find_near_duplicate(self, key: Tuple, signature: np.ndarray) -> Optional[Document]:
+        seen = set()
+        for band in range(self.num_bands):
+            rows = signature[band * self.rows_per_band:(band + 1) * self.rows_per_band]
+            for candidate in self._buckets.get((band, key, rows.tobytes()), ()):
+                if candidate in seen:
+                    continue
+                seen.add(candidate)
+                representative, representative_signature = self._representatives[candidate]
+                if np.mean(signature == representative_signature) >= self.threshold:
+                    return representative
+        return None
+
+    def _add_representative(self, key: Tuple, signature: np.ndarray, doc: Document) -> None:
+        position = len(self._representatives)
+        self._representatives.append((doc, signature))
+        for band in range(self.num_bands):
+            rows = signature[band * self.rows_per_band:(band + 1) * self.rows_per_band]
+            self._buckets.setdefault((band, key, rows.tobytes()), []).append(position)
+
+    def filter(self, docs: Iterable[Document]) -> List[Document]:
+        """
+        중복이 아닌 청크만 입력 순서대로 반환합니다. 반환된 문서는 입력의 복사본이며,
+        이후 호출에서 발견된 중복의 메타데이터가 병합될 수 있습니다 (take_updated 참고).
+        """
+        kept = []
+        kept_ids = set()
+        for doc in docs:
+            text = normalize_text(doc.page_content)
+            key = self._protected_key(doc)
+            digest = hashlib.sha1(text.encode("utf-8")).hexdigest()
+            representative = self._exact.get((key, digest))
+            if representative is not None:
+                self._merge(representative, doc, kept_ids)
+                self.stats["exact"] += 1
+                continue
+
+            exact_only = doc.metadata.get("document_type") in self.exact_only_types
+            if not exact_only:
+                signature = self.signature(text)
+                representative = self._find_near_duplicate(key, signature)
+                if representative is not None:
+                    self._merge(representative, doc, kept_ids)
+                    self.stats["near"] += 1
+                    continue
+
+            copy = Document(page_content=doc.page_content, metadata=dict(doc.metadata), id=doc.id)
+            self._exact[(key, digest)] = copy
+            if not exact_only:
+                self._add_representative(key, signature, copy)
+            kept.append(copy)
+            kept_ids.add(id(copy))
+        self.stats["kept"] += len(kept)
+        return kept
+
+    def _merge(self, representative: Document, duplicate: Document, kept_ids: set) -> None:
+        merge_metadata(representative, duplicate)
+        if id(representative) not in kept_ids:
+            # 이번 호출에서 반환하는 대표는 병합된 상태로 저장되므로 따로 알리지 않습니다.
+            self._updated[id(representative)] = representative
+
+    def take_updated(self) -> List[Document]:
+        """
+        이전 filter() 호출에서 반환한 뒤 메타데이터가 병합된 대표를 반환하고 목록을 비웁니다.
+        대표는 같은 문서 객체이므로 청크 ID가 바뀌지 않으며, 다시 upsert하면 메타데이터만 갱신됩니다.
+        """
+        updated = list(self._updated.values())
+        self._updated.clear()
+        return updated
+
+
+def _as_list(value: Any) -> Optional[list]:
+    """
+    리스트 값, 또는 JSON 배열 문자열(Chroma 메타데이터에 저장하는 attached_file 등)을 리스트로 반환합니다.
+    """
+    if isinstance(value, list):
+        return value
+    if isinstance(value, str) and value.startswith("["):
+        try:
+            decoded = json.loads(value)
+        except ValueError:
+            return None
+        return decoded if isinstance(decoded, list) else None
+    return None
+
+
+def merge_metadata(target: Document, duplicate: Document) -> None:
+    """
+    중복 청크의 메타데이터를 대표 청크에 병합합니다.
+    대표에 없는 키는 추가하고, 리스트 값(첨부 파일 등)은 합집합으로 만들며, 값이 다른 스칼라는 대표의 값을 유지합니다.
+    JSON 배열 문자열로 저장된 리스트는 풀어서 합친 뒤 같은 형식으로 되돌립니다.
+    """
+    for field, value in duplicate.metadata.items():
+        current = target.metadata.get(field)
+        if current is None:
+            target.metadata[field] = value
+            continue
+        current_items, new_items = _as_list(current), _as_list(value)
+        if current_items is not None and new_items is not None:
+            merged = current_items + [item for item in new_items if item not in current_items]
+            target.metadata[field] = merged if isinstance(current, list) else json.dumps(merged, ensure_ascii=False)
+    target.metadata["duplicate_count"] = target.metadata.get("duplicate_count", 0) + 1
+
+
+def deduplicate_documents(docs: Iterable[Document], threshold: float = DEFAULT_THRESHOLD,
+                          **kwargs) -> List[Document]:
+    """
+    청크 목록에서 완전 중복과 유사 중복을 제거합니다. NearDuplicateFilter 참고.
+    """
+    dedup = NearDuplicateFilter(threshold=threshold, **kwargs)
+    kept = dedup.filter(docs)
+    removed = dedup.stats["exact"] + dedup.stats["near"]
+    if removed:
+        print(f"중복 청크 {removed}개를 제거했습니다. "
+              f"(완전 중복 {dedup.stats['exact']}개, 유사 중복 {dedup.stats['near']}개, 남은 청크 {len(kept)}개)")
+    return kept
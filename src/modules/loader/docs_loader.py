@@ -1,5 +1,5 @@
 from abc import ABC, abstractmethod
-from typing import Iterable
+from typing import Iterable, Iterator
 
 from langchain_core.documents import Document
 
@@ -15,3 +15,10 @@ class DocsLoader(ABC):
         주어진 source(예: URL, Path)로부터 문서를 로드하여 Document 객체로 반환합니다.
         """
         pass
+
+    def load_iter(self, source: str) -> Iterator[Document]:
+        """
+        load()와 같은 문서를 하나씩 내보냅니다. 큰 소스를 일정한 메모리로 읽을 수 있도록
+        파일 기반 로더는 파일을 나누어 읽는 구현으로 재정의합니다. 기본 구현은 load()의 결과를 순회합니다.
+        """
+        yield from self.load(source)
@@ -0,0 +1,274 @@
+import html
+import json
+import os
+import re
+import threading
+import urllib.error
+import urllib.request
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import urljoin
+
+# 조건부 요청에 쓰는 검증자(ETag, Last-Modified)와 마지막 응답을 저장한 파일 경로를 URL별로 기록합니다.
+HTTP_CACHE_FILE = "notion_http_cache.json"
+DEFAULT_TIMEOUT = 30
+USER_AGENT = "Mozilla/5.0 (compatible; bootcamp-qa-bot)"
+# 공개 페이지의 블록 데이터를 반환하는 노션 내부 API. 공개 페이지 URL의 HTML은 블록이 없는 앱 셸입니다.
+LOAD_PAGE_CHUNK_PATH = "/api/v3/loadPageChunk"
+PAGE_CHUNK_LIMIT = 100
+# 레코드 하나(페이지 블록)만 반환하는 API. 전체 블록을 받기 전에 페이지가 바뀌었는지 확인하는 데 씁니다.
+SYNC_RECORD_VALUES_PATH = "/api/v3/syncRecordValues"
+
+_PAGE_ID_PATTERN = re.compile(r"([0-9a-f]{32})(?:[?#].*)?$")
+# 서버에서 렌더링된 노션 블록(HTML 내보내기, 브라우저 모드의 page.html)에 붙는 속성
+_RENDERED_BLOCK_PATTERN = re.compile(r"""data-block-id=["']""")
+_ATTACHMENT_PATTERN = re.compile(r"""href=["']([^"']+\.(?:docx|pdf|xlsx|hwp)(?:\?[^"']*)?)["']""", re.IGNORECASE)
+
+
+class HttpCache:
+    """
+    URL별 검증자와 저장된 본문 경로를 JSON 파일에 보관합니다.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.entries: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+        if os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                self.entries = json.load(f)
+
+    def get(self, url: str) -> Optional[Dict[str, Any]]:
+        entry = self.entries.get(url)
+        # 저장해 둔 본문이 지워졌으면 조건부 요청을 하지 않습니다 (304를 받아도 쓸 본문이 없음).
+        if entry is None or not os.path.exists(entry.get("body_path", "")):
+            return None
+        return entry
+
+    def put(self, url: str, entry: Dict[str, Any]) -> None:
+        with self._lock:
+            self.entries[url] = entry
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            staging = f"{self.path}.tmp-{os.getpid()}"
+            with open(staging, "w", encoding="utf-8") as f:
+                json.dump(self.entries, f, ensure_ascii=False, indent=2)
+            os.replace(staging, self.path)
+
+
+def fetch_conditional(url: str, cache: HttpCache, body_path: str,
+                      timeout: float = DEFAULT_TIMEOUT) -> Tuple[bool, str, str]:
+    """
+    ETag/Last-Modified 조건부 GET으로 url을 가져옵니다. 본문은 body_path에 저장합니다.
+
+    Returns:
+        (changed, body, content_type). 서버가 304를 반환하면 changed는 False이고 body는 저장된 본문입니다.
+    """
+    entry = cache.get(url)
+    request = urllib.request.Request(url, headers={"User-Agent": USER_AGENT})
+    if entry is not None:
+        if entry.get("etag"):
+            request.add_header("If-None-Match", entry["etag"])
+        if entry.get("last_modified"):
+            request.add_header("If-Modified-Since", entry["last_modified"])
+    try:
+        with urllib.request.urlopen(request, timeout=timeout) as response:
+            raw = response.read()
+            headers = response.headers
+    except urllib.error.HTTPError as e:
+        if e.code == 304 and entry is not None:
+            with open(entry["body_path"], encoding="utf-8") as f:
+                return False, f.read(), entry.get("content_type", "")
+        raise
+
+    charset = headers.get_content_charset() or "utf-8"
+    body = raw.decode(charset, errors="replace")
+    content_type = headers.get_content_type()
+    os.makedirs(os.path.dirname(os.path.abspath(body_path)), exist_ok=True)
+    with open(body_path, "w", encoding="utf-8") as f:
+        f.write(body)
+    cache.put(url, {
+        "etag": headers.get("ETag"),
+        "last_modified": headers.get("Last-Modified"),
+        "content_type": content_type,
+        "body_path": os.path.abspath(body_path),
+    })
+    return True, body, content_type
+
+
+def fetch_record_map(page_url: str, page_id: str, timeout: float = DEFAULT_TIMEOUT) -> Dict[str, Any]:
+    """
+    페이지 URL과 같은 호스트의 loadPageChunk API로 공개 페이지의 블록 데이터(recordMap)를 가져옵니다.
+    응답의 cursor가 끝날 때까지 PAGE_CHUNK_LIMIT개씩 나누어 요청하고, 테이블별로 합쳐 반환합니다.
+    POST 요청이라 조건부 요청을 할 수 없으므로, 변경 여부는 호출하는 쪽에서 본문을 비교해 판단합니다.
+    """
+    api_url = urljoin(page_url, LOAD_PAGE_CHUNK_PATH)
+    record_map: Dict[str, Dict[str, Any]] = {}
+    cursor: Dict[str, Any] = {"stack": []}
+    chunk_number = 0
+    while True:
+        payload = {"pageId": page_id, "limit": PAGE_CHUNK_LIMIT, "cursor": cursor,
+                   "chunkNumber": chunk_number, "verticalColumns": False}
+        request = urllib.request.Request(api_url, data=json.dumps(payload).encode("utf-8"),
+                                         headers={"User-Agent": USER_AGENT, "Content-Type": "application/json"})
+        with urllib.request.urlopen(request, timeout=timeout) as response:
+            data = json.loads(response.read().decode("utf-8"))
+        for table, records in data.get("recordMap", {}).items():
+            record_map.setdefault(table, {}).update(records)
+        cursor = data.get("cursor") or {}
+        if not cursor.get("stack"):
+            return record_map
+        chunk_number += 1
+
+
+def fetch_page_version(page_url: str, page_id: str, timeout: float = DEFAULT_TIMEOUT) -> Optional[Dict[str, Any]]:
+    """
+    syncRecordValues API로 페이지 블록 하나만 가져와 변경 확인용 값(version, last_edited_time)을 반환합니다.
+    노션은 본문 블록을 고치면 페이지 블록의 last_edited_time을 갱신하므로, 이 값이 같으면 recordMap 전체를 다시 받지 않습니다.
+    API를 쓸 수 없거나 응답에 페이지 블록이 없으면 None을 반환하며, 이때는 매번 전체를 받아 비교합니다.
+    """
+    api_url = urljoin(page_url, SYNC_RECORD_VALUES_PATH)
+    payload = {"requests": [{"pointer": {"table": "block", "id": page_id}, "version": -1}]}
+    request = urllib.request.Request(api_url, data=json.dumps(payload).encode("utf-8"),
+                                     headers={"User-Agent": USER_AGENT, "Content-Type": "application/json"})
+    try:
+        with urllib.request.urlopen(request, timeout=timeout) as response:
+            data = json.loads(response.read().decode("utf-8"))
+    except (urllib.error.URLError, ValueError) as e:
+        print(f"페이지 변경 확인 실패, 전체 블록을 가져옵니다: {e}")
+        return None
+    value = _record_value(data.get("recordMap", {}).get("block", {}).get(page_id, {}))
+    if value.get("version") is None and value.get("last_edited_time") is None:
+        return None
+    return {"version": value.get("version"), "last_edited_time": value.get("last_edited_time")}
+
+
+def has_rendered_blocks(page_html: str) -> bool:
+    """HTML에 서버에서 렌더링된 노션 블록이 있는지 확인합니다. 공개 페이지의 앱 셸(JS만 있는 HTML)에는 없습니다."""
+    return bool(_RENDERED_BLOCK_PATTERN.search(page_html))
+
+
+def page_id_from_url(url: str) -> Optional[str]:
+    """노션 페이지 URL 끝의 32자리 ID를 하이픈이 들어간 UUID 형식으로 반환합니다."""
+    match = _PAGE_ID_PATTERN.search(url.lower())
+    if match is None:
+        return None
+    raw = match.group(1)
+    return f"{raw[:8]}-{raw[8:12]}-{raw[12:16]}-{raw[16:20]}-{raw[20:]}"
+
+
+def _rich_text(value: Any) -> str:
+    """노션 rich text([[텍스트, [[서식...]]], ...])를 HTML로 변환합니다."""
+    parts = []
+    for segment in value or []:
+        text = html.escape(str(segment[0]))
+        for annotation in (segment[1] if len(segment) > 1 else []):
+            kind = annotation[0]
+            if kind == "b":
+                text = f"<strong>{text}</strong>"
+            elif kind == "i":
+                text = f"<em>{text}</em>"
+            elif kind == "c":
+                text = f"<code>{text}</code>"
+            elif kind == "a" and len(annotation) > 1:
+                text = f'<a href="{html.escape(annotation[1])}">{text}</a>'
+        parts.append(text)
+    return "".join(parts)
+
+
+_BLOCK_TAGS = {
+    "header": "h1",
+    "sub_header": "h2",
+    "sub_sub_header": "h3",
+    "text": "p",
+    "quote": "blockquote",
+    "callout": "p",
+    "code": "pre",
+    "to_do": "p",
+}
+_LIST_TAGS = {"bulleted_list": "ul", "numbered_list": "ol"}
+
+
+def _record_value(record: Dict[str, Any]) -> Dict[str, Any]:
+    """recordMap의 레코드에서 블록 값을 꺼냅니다. 권한 정보와 함께 한 번 더 감싼 응답({"value": {"value": ...}})도 처리합니다."""
+    value = record.get("value") or {}
+    if "type" not in value and isinstance(value.get("value"), dict):
+        value = value["value"]
+    return value
+
+
+def page_block_count(record_map: Dict[str, Any], page_id: Optional[str] = None) -> int:
+    """페이지 블록에 딸린 본문 블록 수입니다. 0이면 권한이 없거나 내용을 받지 못한 응답입니다."""
+    blocks = {block_id: _record_value(record) for block_id, record in record_map.get("block", {}).items()}
+    page = blocks.get(page_id) if page_id else None
+    if page is None:
+        page = next((block for block in blocks.values() if block.get("type") == "page"), {})
+    return sum(1 for child_id in page.get("content", []) if child_id in blocks)
+
+
+def render_record_map(record_map: Dict[str, Any], page_id: Optional[str] = None) -> str:
+    """
+    노션 공개 페이지의 블록 데이터(recordMap)를 HTML로 변환합니다.
+    브라우저 모드에서 저장하는 page.html과 같이 MarkdownifyTransformer로 마크다운으로 바꿀 수 있습니다.
+    토글 블록은 펼친 상태로(자식 블록 포함) 변환합니다.
+    """
+    blocks = {block_id: _record_value(record) for block_id, record in record_map.get("block", {}).items()}
+    if page_id is None or page_id not in blocks:
+        page_id = next((block_id for block_id, block in blocks.items() if block.get("type") == "page"), None)
+    if page_id is None:
+        return ""
+
+    def render(block_id: str, depth: int) -> List[str]:
+        block = blocks.get(block_id)
+        # 하위 페이지는 별도 페이지이므로 제목만 남깁니다.
+        if block is None or (depth > 0 and block.get("type") == "page"):
+            title = _rich_text((block or {}).get("properties", {}).get("title"))
+            return [f"<p>{title}</p>"] if title else []
+        return [render_block(block, depth)]
+
+    def render_children(block: Dict[str, Any], depth: int) -> str:
+        lines: List[str] = []
+        open_list = None
+        for child_id in block.get("content", []):
+            child = blocks.get(child_id, {})
+            list_tag = _LIST_TAGS.get(child.get("type"))
+            if list_tag != open_list:
+                if open_list:
+                    lines.append(f"</{open_list}>")
+                if list_tag:
+                    lines.append(f"<{list_tag}>")
+                open_list = list_tag
+            lines.extend(render(child_id, depth + 1))
+        if open_list:
+            lines.append(f"</{open_list}>")
+        return "\n".join(lines)
+
+    def render_block(block: Dict[str, Any], depth: int) -> str:
+        kind = block.get("type")
+        properties = block.get("properties", {})
+        title = _rich_text(properties.get("title"))
+        children = render_children(block, depth)
+        if kind == "page":
+            return f"<h1>{title}</h1>\n{children}"
+        if kind in _LIST_TAGS:
+            return f"<li>{title}{children}</li>"
+        if kind == "divider":
+            return "<hr/>"
+        if kind in ("file", "pdf"):
+            source = properties.get("source", [[""]])[0][0]
+            return f'<p><a href="{html.escape(source)}">{title or html.escape(os.path.basename(source))}</a></p>'
+        if kind == "toggle":
+            return f"<div class=\"notion-toggle-block\"><p>{title}</p>\n{children}</div>"
+        tag = _BLOCK_TAGS.get(kind, "div")
+        body = f"<{tag}>{title}</{tag}>" if title else ""
+        return "\n".join(part for part in (body, children) if part)
+
+    return render(page_id, 0)[0]
+
+
+def extract_attachment_links(page_html: str, base_url: str) -> List[str]:
+    """페이지 HTML에서 첨부 파일(.docx 등) 링크를 절대 URL로 추출합니다. 순서를 유지하며 중복은 제거합니다."""
+    links = []
+    for href in _ATTACHMENT_PATTERN.findall(page_html):
+        url = urljoin(base_url, html.unescape(href))
+        if url not in links:
+            links.append(url)
+    return links
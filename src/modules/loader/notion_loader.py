@@ -1,9 +1,11 @@
 import csv
+import hashlib
 import json
 import os
-import re
+import shutil
 import time
-from typing import List, Optional, Iterable
+from typing import List, Optional, Iterable, Iterator
+from urllib.parse import unquote
 
 from langchain_text_splitters import RecursiveCharacterTextSplitter
 from selenium import webdriver
@@ -12,7 +14,13 @@ from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from langchain_core.documents import Document
 
+from src.modules.loader.attachments import (BROWSER_DOWNLOAD_DIR, DEFAULT_MAX_WORKERS, DOWNLOAD_WAIT_TIMEOUT,
+                                            AttachmentDownloader, wait_for_download)
 from src.modules.loader.docs_loader import DocsLoader
+from src.modules.loader.notion_http import (DEFAULT_TIMEOUT, HTTP_CACHE_FILE, HttpCache, extract_attachment_links,
+                                           fetch_conditional, fetch_page_version, fetch_record_map, has_rendered_blocks,
+                                           page_block_count, page_id_from_url, render_record_map)
+from src.modules.loader.streaming import StreamingSplitter, iter_text_segments
 
 class LectureLoader(DocsLoader):
 
@@ -21,6 +29,12 @@ class LectureLoader(DocsLoader):
 
 class LawLoader(DocsLoader):
     def load(self, source: str) -> Iterable[Document]:
+        return list(self.load_iter(source))
+
+    def load_iter(self, source: str) -> Iterator[Document]:
+        """
+        법령 파일을 문단 경계에서 나눈 구간 단위로 읽어 분할하므로, 큰 법령 모음도 일정한 메모리로 적재합니다.
+        """
         # LawLoader.py 기준 두 단계 상위 디렉터리의 'files' 폴더에 있는 파일 경로
         file_path = os.path.join(
             os.path.dirname(__file__),  # 현재 파일이 있는 디렉터리
@@ -30,9 +44,6 @@ class LawLoader(DocsLoader):
             source  # 실제 파일 이름
         )
 
-        with open(file_path, "r", encoding="utf-8") as f:
-            content = f.read()
-
         chunk_size = 1000  # 원하는 chunk 길이
         chunk_overlap = 300  # 앞뒤로 겹칠 부분
 
@@ -43,24 +54,141 @@ class LawLoader(DocsLoader):
             # pattern=r'(?=제\d+조\()',  # lookahead 정규표현식
         )
         #
-        documents = splitter.split_documents([Document(page_content=content)])
-
-        return documents
+        yield from StreamingSplitter(splitter).split_iter(iter_text_segments(file_path))
 
 class NotionLoader(DocsLoader):
-    def __init__(self, driver: Optional[webdriver.Chrome] = None):
+    # 브라우저 없이 적재하는 모드
+    #   "browser": headless Chrome으로 페이지를 열고 토글을 펼친 뒤 첨부 파일을 내려받습니다 (기본값).
+    #   "http"   : 노션 페이지 URL은 loadPageChunk API로 블록 데이터(recordMap)를 가져옵니다. 그 밖의 URL은
+    #              블록 데이터(JSON) 또는 렌더링된 HTML을 조건부 GET으로 가져오며, 304이면 저장해 둔 본문을 사용합니다.
+    #              본문 블록이 없는 응답(공개 페이지의 앱 셸 등)은 거부합니다. 테스트: src/test/notion_http_test.py
+    #   "html"   : 저장된 page.html(브라우저 모드의 결과 또는 노션 HTML 내보내기)을 읽습니다. source는 파일 경로입니다.
+    MODES = ("browser", "http", "html")
+    # 파일 블록을 클릭한 뒤 새 탭을 기다리는 시간과 브라우저가 직접 내려받는 파일을 기다리는 시간(초)
+    NEW_TAB_TIMEOUT = 5
+    DOWNLOAD_TIMEOUT = DOWNLOAD_WAIT_TIMEOUT
+
+    def __init__(self, driver: Optional[webdriver.Chrome] = None, mode: str = "browser",
+                 cache_path: Optional[str] = None, timeout: float = DEFAULT_TIMEOUT,
+                 download_attachments: bool = True, max_downloads: int = DEFAULT_MAX_WORKERS):
+        """
+        Args:
+            driver (Optional[webdriver.Chrome]): 브라우저 모드에서 사용할 드라이버. 없으면 새로 생성합니다.
+            mode (str): "browser", "http", "html" 중 하나 (MODES 참고).
+            cache_path (Optional[str]): http 모드의 ETag/Last-Modified 기록 파일. 기본값은 files/notion_http_cache.json.
+            timeout (float): http 모드의 요청 제한 시간(초).
+            download_attachments (bool): http/html 모드에서 페이지의 첨부 파일 링크를 내려받을지 여부.
+            max_downloads (int): 동시에 내려받을 최대 첨부 파일 수.
+        """
+        if mode not in self.MODES:
+            raise ValueError(f"지원하지 않는 mode입니다: {mode} (가능한 값: {self.MODES})")
         # driver를 외부에서 주입받거나, read()에서 새롭게 생성합니다.
         self.driver = driver
+        self.mode = mode
+        self.timeout = timeout
+        self.download_attachments = download_attachments
+        self.max_downloads = max_downloads
         self.file_dir = os.path.join(os.path.dirname(__file__), "..", "..", "files")
+        self.cache_path = cache_path or os.path.join(self.file_dir, HTTP_CACHE_FILE)
 
     def load(self, source: str) -> List[Document]:
+        """
+        노션 페이지를 mode에 따라 읽어 HTML 내용과 첨부 파일을 Document 객체로 반환합니다.
+        """
+        if self.mode == "http":
+            return self.load_http(source)
+        if self.mode == "html":
+            return self.load_html_file(source)
+        return self.load_browser(source)
+
+    def load_http(self, source: str) -> List[Document]:
+        """
+        브라우저 없이 HTTP로 페이지를 가져옵니다.
+        노션 페이지 URL(끝에 32자리 ID)은 같은 호스트의 loadPageChunk API로 블록 데이터(recordMap)를 가져와 HTML로 변환합니다.
+        공개 페이지 URL을 GET하면 블록 없이 JS 앱 셸만 오기 때문입니다. 먼저 syncRecordValues로 페이지 블록의
+        version/last_edited_time만 확인하고, 지난번과 같으면 저장된 recordMap을 그대로 사용합니다.
+        그 밖의 URL은 블록 데이터(JSON) 또는 렌더링된 HTML을 제공하는 주소로 보고, 마지막 응답의 ETag/Last-Modified로
+        조건부 요청을 보내며, 304이면 저장된 본문을 그대로 사용합니다.
+        본문 블록이 없는 응답은 ValueError로 거부하므로, 적재 파이프라인은 로드 실패로 기록하고 이전 청크를 유지합니다.
+        첨부 파일 링크는 metadata["attachment_urls"]에 기록하고, AttachmentDownloader로 동시에 내려받습니다.
+        """
+        html_file_path = os.path.join(self.file_dir, "page.html")
+        # 304를 받았을 때(또는 변경 여부를 비교할 때) 쓸 본문. URL마다 따로 저장합니다.
+        body_path = os.path.join(self.file_dir, f"notion_http_{hashlib.sha1(source.encode('utf-8')).hexdigest()[:16]}.body")
+        page_id = page_id_from_url(source)
+        record_map = None
+        if page_id is not None:
+            cache = HttpCache(self.cache_path)
+            entry = cache.get(source)
+            version = fetch_page_version(source, page_id, timeout=self.timeout)
+            if version is not None and entry is not None and entry.get("page_version") == version:
+                changed = False
+                with open(entry["body_path"], encoding="utf-8") as f:
+                    record_map = json.load(f)
+            else:
+                record_map = fetch_record_map(source, page_id, timeout=self.timeout)
+                body = json.dumps(record_map, ensure_ascii=False, sort_keys=True)
+                changed = not os.path.exists(body_path)
+                if not changed:
+                    with open(body_path, encoding="utf-8") as f:
+                        changed = f.read() != body
+                if changed:
+                    os.makedirs(os.path.dirname(os.path.abspath(body_path)), exist_ok=True)
+                    with open(body_path, "w", encoding="utf-8") as f:
+                        f.write(body)
+                cache.put(source, {"page_version": version, "body_path": os.path.abspath(body_path)})
+        else:
+            changed, body, content_type = fetch_conditional(source, HttpCache(self.cache_path), body_path,
+                                                            timeout=self.timeout)
+            if content_type == "application/json":
+                data = json.loads(body)
+                record_map = data.get("recordMap", data)
+            elif not has_rendered_blocks(body):
+                raise ValueError(f"렌더링된 노션 블록이 없는 페이지입니다 (앱 셸): {source}")
+            page_html = body
+        if record_map is not None:
+            if not page_block_count(record_map, page_id):
+                raise ValueError(f"노션 블록 데이터에 본문 블록이 없습니다: {source}")
+            page_html = render_record_map(record_map, page_id)
+        if changed or not os.path.exists(html_file_path):
+            with open(html_file_path, "w", encoding="utf-8") as html_file:
+                html_file.write(page_html)
+        print(f"노션 페이지를 HTTP로 불러왔습니다. ({'변경됨' if changed else '변경 없음'})")
+        return [self._html_document(source, page_html, html_file_path)]
+
+    def load_html_file(self, source: str) -> List[Document]:
+        """
+        저장된 page.html을 읽어 Document로 반환합니다. 첨부 파일 링크는 metadata["attachment_urls"]에 기록합니다.
+        """
+        with open(source, encoding="utf-8") as f:
+            page_html = f.read()
+        return [self._html_document(source, page_html, os.path.abspath(source))]
+
+    def _html_document(self, source: str, page_html: str, html_file_path: str) -> Document:
+        # 첨부 파일은 브라우저 모드와 같이 내려받아 attached_file에 포함합니다.
+        attachment_urls = extract_attachment_links(page_html, source)
+        remote_urls = [url for url in attachment_urls if url.startswith(("http://", "https://"))]
+        attached_files = []
+        if remote_urls and self.download_attachments:
+            attached_files = AttachmentDownloader(self.file_dir, max_workers=self.max_downloads).download_all(remote_urls)
+        # 노션 HTML 내보내기는 첨부 파일을 page.html 기준 상대 경로로 가리킵니다.
+        attached_files += [os.path.abspath(unquote(url)) for url in attachment_urls
+                           if url not in remote_urls and os.path.exists(unquote(url))]
+        attached_files.append(html_file_path)
+        return Document(page_content=page_html,
+                        metadata={"source": source, "attached_file": json.dumps(attached_files, ensure_ascii=False),
+                                  "attachment_urls": json.dumps(attachment_urls, ensure_ascii=False),
+                                  "document_type": "html"})
+
+    def load_browser(self, source: str) -> List[Document]:
         """
         노션 페이지를 크롤링하여 HTML 내용과 다운로드 파일들을 Document 객체로 반환합니다.
         """
         chrome_options = Options()
-        # 다운로드 폴더를 './files'로 지정하는 옵션 설정
+        # 브라우저가 직접 내려받는 파일은 './files' 안의 임시 디렉터리에 모은 뒤 manifest에 기록하며 옮깁니다
+        # (download_docx_files 참고).
         prefs = {
-            "download.default_directory": self.file_dir,
+            "download.default_directory": os.path.join(os.path.abspath(self.file_dir), BROWSER_DOWNLOAD_DIR),
             "download.prompt_for_download": False,
             "download.directory_upgrade": True,
             "safebrowsing.enabled": True
@@ -136,39 +264,27 @@ class NotionLoader(DocsLoader):
                 break
             last_height = new_height
 
-    def wait_for_download_and_rename(self, download_folder: str, target_file_name: str, timeout: int = 30) -> None:
-        """
-        download_folder에서 .docx 파일이 다운로드 완료될 때까지 대기 후,
-        가장 최근에 다운로드된 .docx 파일을 target_file_name으로 rename합니다.
-        """
-        end_time = time.time() + timeout
-        downloaded_file = None
-        while time.time() < end_time:
-            files = [f for f in os.listdir(download_folder) if f.endswith(".docx") and not f.endswith(".crdownload")]
-            if files:
-                downloaded_file = max(files, key=lambda f: os.path.getmtime(os.path.join(download_folder, f)))
-                break
-            time.sleep(1)
-        if downloaded_file:
-            original_path = os.path.join(download_folder, downloaded_file)
-            target_path = os.path.join(download_folder, target_file_name)
-            if original_path != target_path:
-                os.rename(original_path, target_path)
-                # print(f"파일 이름 변경 완료: {downloaded_file} -> {target_file_name}")
-        else:
-            print("다운로드된 파일을 찾을 수 없습니다.")
-
     def download_docx_files(self, download_folder=None) -> List[str]:
         """
-        노션 페이지 내 .docx 파일 블록을 클릭하여 파일 다운로드를 수행하고,
-        다운로드된 파일 경로 목록을 반환합니다.
+        노션 페이지 내 .docx 파일 블록을 내려받고, 다운로드된 파일 경로 목록을 반환합니다.
+
+        첨부 파일 manifest는 블록 ID(data-block-id, 없으면 파일 이름)를 키로 씁니다. 이미 내려받은 블록은 클릭하지 않습니다.
+        블록에 링크가 있거나 클릭해 열린 새 탭에서 URL을 알 수 있으면 AttachmentDownloader로 동시에 내려받습니다.
+        새 탭 없이 브라우저가 바로 내려받는 블록은 임시 디렉터리(BROWSER_DOWNLOAD_DIR)에 새 파일이 생기기를 기다려
+        download_folder로 옮기고 manifest에 기록합니다. 블록을 하나씩 클릭하고 기다리므로 다른 블록의 파일과 섞이지 않습니다.
+        새 탭을 여는 동안 브라우저가 함께 내려받은 파일은 임시 디렉터리와 함께 지웁니다.
         """
         # self.file_dir
         if download_folder is None:
             download_folder = self.file_dir
         # if not os.path.exists(download_folder):
         #     os.makedirs(download_folder)
-        docx_files = []
+        download_path = os.path.abspath(download_folder)
+        browser_dir = self._browser_download_dir(download_path)
+        # 쿠키는 도메인이 맞는 요청에만 보냅니다 (AttachmentDownloader 참고).
+        downloader = AttachmentDownloader(download_path, max_workers=self.max_downloads,
+                                          cookies=self.driver.get_cookies())
+        docx_files, urls, file_names, keys = [], [], [], []
         file_blocks = self.driver.find_elements(By.XPATH, "//div[contains(@class, 'notion-file-block')]")
         for block in file_blocks:
             try:
@@ -180,58 +296,89 @@ class NotionLoader(DocsLoader):
                 file_name = file_name_element.text.strip()
                 # 파일명 내 공백을 '+'로 대체
                 file_name = file_name.replace(" ", "+")
-                download_path = os.path.abspath(download_folder)
-                file_path = os.path.join(download_path, file_name)
-                # print(f"다운로드 파일 경로: {file_path}")
-                # 기본 파일명 비교 (숫자 접미사 무시)
-                base_file_name = re.sub(r' \(\d+\)', '', file_name)
-                existing_files = os.listdir(download_path)
-                skip = False
-                for existing in existing_files:
-                    if existing.endswith('.docx'):
-                        existing_base = re.sub(r' \(\d+\)', '', existing)
-                        if existing_base == base_file_name:
-                            skip = True
-                            break
-                if skip:
-                    docx_files.append(os.path.join(download_path, file_name))
-                    # print(f"{file_name} 이미 존재하여 다운로드 스킵.")
+                if ".docx" not in file_name:
+                    continue
+
+                key = block.get_attribute("data-block-id") or file_name
+                cached = downloader.manifest.lookup(key)
+                if cached is not None:
+                    docx_files.append(cached)
                     continue
 
-                if ".docx" in file_name:
-                    # print("다운로드 대상 파일:", file_name)
-                    original_handle = self.driver.current_window_handle
-                    block.click()
-                    time.sleep(1)  # 새 탭 열림 대기
-
-                    handles = self.driver.window_handles
-                    if len(handles) > 1:
-                        for handle in handles:
-                            if handle != original_handle:
-                                try:
-                                    self.driver.switch_to.window(handle)
-                                    # print("새 탭에서 자동 다운로드 진행중...")
-                                    time.sleep(2)
-                                    self.driver.close()
-                                except Exception as e:
-                                    print("새 탭 처리 중 오류:", e)
-                        try:
-                            self.driver.switch_to.window(original_handle)
-                        except Exception as e:
-                            print("원래 창으로 전환 실패:", e)
-                    else:
-                        print("새 탭이 열리지 않음, 클릭 후 다운로드가 진행되었을 가능성이 있음.")
-                    time.sleep(1)
-                    self.wait_for_download_and_rename(download_path, file_name)
-                    docx_files.append(os.path.join(download_path, file_name))
+                known = set(os.listdir(browser_dir))
+                url = self._block_download_url(block)
+                if url is not None:
+                    urls.append(url)
+                    file_names.append(file_name)
+                    keys.append(key)
+                    continue
+
+                print("새 탭이 열리지 않음, 클릭 후 다운로드가 진행되었을 가능성이 있음.")
+                # 새 탭으로 URL을 얻은 블록의 파일도 브라우저가 함께 내려받을 수 있으므로 그 이름은 고르지 않습니다.
+                queued = set(file_names) | {name.replace("+", " ") for name in file_names}
+                downloaded = wait_for_download(browser_dir, known, timeout=self.DOWNLOAD_TIMEOUT, ignore=queued)
+                if downloaded is None:
+                    print(f"다운로드된 파일을 찾을 수 없습니다: {file_name}")
+                    continue
+                docx_files.append(downloader.adopt(key, downloaded, file_name))
             except Exception as e:
                 print("파일 다운로드 처리 실패:", e)
+
+        docx_files.extend(downloader.download_all(urls, file_names, keys))
+        shutil.rmtree(browser_dir, ignore_errors=True)
+        docx_files = list(dict.fromkeys(docx_files))
         for file in docx_files:
             print(f"{file} 파일 다운로드 요청 완료.")
         print(f"다운로드된 파일 개수: {len(docx_files)}")
         # print(docx_files)
         return docx_files
 
+    def _browser_download_dir(self, download_path: str) -> str:
+        """
+        브라우저가 직접 내려받는 파일을 모을 임시 디렉터리를 만들고 드라이버의 다운로드 위치를 그곳으로 바꿉니다.
+        외부에서 전달받은 드라이버도 같은 위치에 내려받도록 DevTools 명령을 사용합니다.
+        """
+        browser_dir = os.path.join(download_path, BROWSER_DOWNLOAD_DIR)
+        os.makedirs(browser_dir, exist_ok=True)
+        try:
+            self.driver.execute_cdp_cmd("Browser.setDownloadBehavior",
+                                        {"behavior": "allow", "downloadPath": browser_dir})
+        except Exception as e:
+            print("브라우저 다운로드 위치 변경 실패:", e)
+        return browser_dir
+
+    def _block_download_url(self, block) -> Optional[str]:
+        """
+        파일 블록의 다운로드 URL을 반환합니다. 링크가 없으면 블록을 클릭해 열린 새 탭의 URL을 읽고 탭을 닫습니다.
+        새 탭이 열리지 않으면 None을 반환합니다 (브라우저가 바로 내려받은 경우, download_docx_files 참고).
+        """
+        for link in block.find_elements(By.TAG_NAME, "a"):
+            href = link.get_attribute("href")
+            if href and href.startswith("http"):
+                return href
+
+        original_handle = self.driver.current_window_handle
+        known_handles = set(self.driver.window_handles)
+        block.click()
+        try:
+            WebDriverWait(self.driver, self.NEW_TAB_TIMEOUT).until(lambda d: set(d.window_handles) - known_handles)
+        except Exception:
+            return None
+        url = None
+        for handle in set(self.driver.window_handles) - known_handles:
+            try:
+                self.driver.switch_to.window(handle)
+                if self.driver.current_url.startswith("http"):
+                    url = self.driver.current_url
+                self.driver.close()
+            except Exception as e:
+                print("새 탭 처리 중 오류:", e)
+        try:
+            self.driver.switch_to.window(original_handle)
+        except Exception as e:
+            print("원래 창으로 전환 실패:", e)
+        return url
+
 class MarkDownLoader(DocsLoader):
     def load(self, source: str) -> Iterable[Document]:
         """
@@ -241,19 +388,30 @@ class MarkDownLoader(DocsLoader):
             content = file.read()
         return [Document(page_content=content)]
 
+    def load_iter(self, source: str) -> Iterator[Document]:
+        """
+        마크다운 파일을 문단 경계에서 나눈 구간(streaming.SEGMENT_CHARS 이하) Document로 하나씩 내보냅니다.
+        구간보다 작은 파일은 load()와 같이 파일 전체가 Document 하나입니다. 큰 파일은 구간 경계에서 청크 겹침이 없으므로
+        경계에 걸친 청크가 load() 결과를 분할한 것과 다릅니다.
+        """
+        yield from iter_text_segments(source)
+
 class CSVLoader(DocsLoader):
     def load(self, source: str) -> Iterable[Document]:
         """
         CSV 파일을 읽어 Document 객체로 반환합니다.
         """
-        documents = []
+        return list(self.load_iter(source))
+
+    def load_iter(self, source: str) -> Iterator[Document]:
+        """CSV 파일을 한 행씩 읽어 Document로 내보냅니다."""
         with open(source, newline='', encoding='utf-8-sig') as csvfile:
             reader = csv.DictReader(csvfile)
             for row in reader:
                 date = row.get('date', '').strip() or '날짜 없음'
                 timetable = row.get('timetable', '').strip()
                 content = f"Date: {date}\nTimetable: {timetable}"
-                documents.append(Document(page_content=content))
-        return documents
+                # 행 문서는 날짜 한 칸만 달라도 다른 정보이므로 유사 중복 제거에서 제외합니다 (dedup.EXACT_ONLY_TYPES).
+                yield Document(page_content=content, metadata={"document_type": "csv_row"})
 
 
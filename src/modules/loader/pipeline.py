@@ -0,0 +1,292 @@
+import hashlib
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from langchain_core.documents import Document
+
+from src.modules.loader.dedup import NearDuplicateFilter
+from src.modules.loader.docs_loader import DocsLoader
+from src.modules.vector_store.vector_store import chunk_ids
+
+# 단계 사이 큐에 쌓아 둘 최대 소스 수. 느린 임베딩 단계 앞에 로드된 문서가 무한히 쌓이지 않도록 합니다.
+DEFAULT_QUEUE_SIZE = 4
+# 로더가 한 번에 큐에 넣는 문서 수.
+DEFAULT_LOAD_BATCH_SIZE = 256
+# 쓰기 단계가 한 번의 add_documents로 묶는 최대 청크 수.
+DEFAULT_WRITE_BATCH_SIZE = 512
+# 큐의 끝을 알리는 표식
+_DONE = object()
+# 배치 상태: 뒤에 같은 소스의 배치가 더 있음 / 소스의 마지막 배치 / 로드 실패
+_MORE = object()
+_FINAL = object()
+_FAILED = object()
+# 이미 쓴 대표 청크에 중복의 메타데이터가 병합되어 다시 upsert할 청크 (작업에 속하지 않음)
+_UPDATED = object()
+
+
+class FunctionLoader(DocsLoader):
+    """
+    문서를 반환하는 함수(load_schedule_csv_2 등)를 DocsLoader로 감쌉니다.
+    """
+
+    def __init__(self, load_fn: Callable[[str], Iterable[Document]]):
+        self.load_fn = load_fn
+
+    def load(self, source: str) -> Iterable[Document]:
+        return self.load_fn(source)
+
+
+class SourceJob:
+    """
+    파이프라인에서 적재할 소스 하나입니다.
+
+    Args:
+        source (str): 소스 이름. 청크의 metadata["source"]와 같은 값을 사용합니다.
+        loader (DocsLoader): 문서를 읽을 로더. 생산자 스레드에서 다른 소스의 로더와 동시에 실행됩니다.
+        location (Optional[str]): loader.load()에 넘길 값. 없으면 source를 사용합니다.
+        prepare (Optional[Callable]): 로드한 문서 배치를 분할하고 메타데이터를 붙여 청크 목록을 반환하는 함수.
+            배치마다 호출되며, None을 반환하면 그 배치는 바뀐 내용이 없는 것으로 보고 쓰지 않습니다.
+            모든 배치가 None이면 소스의 이전 청크를 그대로 둡니다.
+    """
+
+    def __init__(self, source: str, loader: DocsLoader, location: Optional[str] = None,
+                 prepare: Optional[Callable[[List[Document]], Optional[List[Document]]]] = None):
+        self.source = source
+        self.loader = loader
+        self.location = location or source
+        self.prepare = prepare
+
+    def __repr__(self):
+        return f"SourceJob(source={self.source!r})"
+
+
+class StageStats:
+    """단계별 처리량 집계. busy는 그 단계가 실제로 일한 시간(여러 스레드면 합계)입니다."""
+
+    def __init__(self, name: str, unit: str):
+        self.name = name
+        self.unit = unit
+        self.items = 0
+        self.busy = 0.0
+        self._lock = threading.Lock()
+
+    def add(self, items: int, seconds: float) -> None:
+        with self._lock:
+            self.items += items
+            self.busy += seconds
+
+    def __repr__(self):
+        rate = self.items / self.busy if self.busy > 0 else 0.0
+        return f"{self.name}: {self.items}{self.unit}, {self.busy:.2f}초, {rate:.1f}{self.unit}/초"
+
+
+class IngestionPipeline:
+    """
+    로드 → 분할 → 임베딩/쓰기를 크기 제한 큐로 연결한 생산자/소비자 적재 파이프라인입니다.
+
+    로더는 소스마다 스레드 풀에서 동시에 실행되고, 분할 단계(스레드 하나)와 쓰기 단계(호출한 스레드)는
+    앞 단계의 결과를 큐에서 받아 처리합니다. 느린 Selenium 크롤링이 진행되는 동안
+    로컬 파일의 분할과 임베딩이 먼저 진행되며, 큐가 가득 차면 앞 단계가 기다립니다.
+
+    로더는 DocsLoader.load_iter로 읽고 load_batch_size개씩 큐에 넣으므로, 큰 소스도 한 번에
+    (큐 길이 x 배치 크기)만큼의 문서만 메모리에 둡니다. 쓰기는 배치마다 upsert하고, 소스의 마지막 배치를 쓴 뒤
+    그 소스에서 이번에 쓰지 않은 이전 청크를 삭제합니다 (delete_stale).
+    청크 ID(chunk_ids)가 배치 경계에 따라 달라지지 않도록, 같은 소스에 같은 내용의 청크가 다시 나오면
+    분할 단계가 그 순번을 metadata["chunk_occurrence"]에 기록합니다 (처음 나온 청크에는 기록하지 않습니다).
+
+    중복 제거(dedup)는 분할 단계에서 하나의 스레드로만 실행되므로 NearDuplicateFilter를 그대로 공유할 수 있습니다.
+    앞 배치에서 이미 쓴 대표 청크에 뒤 배치의 중복이 병합되면, 그 대표를 다시 upsert하여
+    병합된 메타데이터(duplicate_count, 첨부 파일 등)를 스토어에 반영합니다.
+    """
+
+    def __init__(self, vector_store, dedup: Optional[NearDuplicateFilter] = None,
+                 on_written: Optional[Callable[[SourceJob, Dict[str, List[str]]], None]] = None,
+                 max_loaders: int = 4, queue_size: int = DEFAULT_QUEUE_SIZE,
+                 load_batch_size: int = DEFAULT_LOAD_BATCH_SIZE,
+                 write_batch_size: int = DEFAULT_WRITE_BATCH_SIZE):
+        """
+        Args:
+            vector_store: 청크를 쓸 스토어 (모든 VectorStore 구현체가 add_documents와 delete_stale을 구현합니다).
+            dedup (Optional[NearDuplicateFilter]): 쓰기 전에 적용할 중복 제거기.
+            on_written (Optional[Callable]): 소스 하나를 모두 쓴 뒤 (작업, 소스별 청크 ID)로 호출됩니다 (manifest 기록 등).
+            max_loaders (int): 동시에 실행할 로더 수.
+            queue_size (int): 단계 사이 큐의 최대 길이(배치 단위).
+            load_batch_size (int): 로더가 한 번에 큐에 넣는 문서 수. prepare는 배치마다 호출됩니다.
+            write_batch_size (int): 쓰기 한 번에 모을 최대 청크 수. 이미 도착한 배치만 모으므로 기다리지 않습니다.
+        """
+        self.vector_store = vector_store
+        self.dedup = dedup
+        self.on_written = on_written
+        self.max_loaders = max_loaders
+        self.queue_size = queue_size
+        self.load_batch_size = load_batch_size
+        self.write_batch_size = write_batch_size
+        self.stats = {
+            "load": StageStats("load", "문서"),
+            "split": StageStats("split", "청크"),
+            "write": StageStats("write", "청크"),
+        }
+        # 로드에 실패한 소스. 호출자는 이 소스의 이전 청크를 유지해야 합니다.
+        self.failed: List[SourceJob] = []
+
+    def _load(self, job: SourceJob, loaded: "queue.Queue") -> None:
+        batch: List[Document] = []
+        docs = iter(())
+        start = time.perf_counter()
+        try:
+            docs = iter(job.loader.load_iter(job.location))
+            for doc in docs:
+                batch.append(doc)
+                if len(batch) >= self.load_batch_size:
+                    self.stats["load"].add(len(batch), time.perf_counter() - start)
+                    loaded.put((job, batch, _MORE))
+                    batch = []
+                    start = time.perf_counter()
+        except Exception as e:
+            print(f"'{job.source}' 로드 실패: {e}")
+            self.stats["load"].add(len(batch), time.perf_counter() - start)
+            self.failed.append(job)
+            # 이미 보낸 배치가 있으면 쓰기 단계가 이 소스의 이전 청크를 지우지 않도록 알립니다.
+            loaded.put((job, [], _FAILED))
+            return
+        self.stats["load"].add(len(batch), time.perf_counter() - start)
+        loaded.put((job, batch, _FINAL))
+
+    def _produce(self, jobs: Sequence[SourceJob], loaded: "queue.Queue") -> None:
+        try:
+            with ThreadPoolExecutor(max_workers=max(1, min(self.max_loaders, len(jobs)))) as pool:
+                for future in [pool.submit(self._load, job, loaded) for job in jobs]:
+                    future.result()
+        finally:
+            loaded.put(_DONE)
+
+    def _split(self, loaded: "queue.Queue", prepared: "queue.Queue", errors: List[BaseException]) -> None:
+        # 작업별로 (소스, 내용 해시)가 나온 횟수 (chunk_occurrence)
+        occurrences: Dict[int, Dict[Tuple[str, str], int]] = {}
+        try:
+            while (item := loaded.get()) is not _DONE:
+                job, docs, status = item
+                start = time.perf_counter()
+                chunks = None
+                if status is not _FAILED:
+                    chunks = job.prepare(docs) if job.prepare is not None else docs
+                    if chunks is not None:
+                        chunks = list(chunks)
+                        if self.dedup is not None:
+                            chunks = self.dedup.filter(chunks)
+                        counters = occurrences.setdefault(id(job), {})
+                        for chunk in chunks:
+                            key = (str(chunk.metadata.get("source", job.source)),
+                                   hashlib.sha1(chunk.page_content.encode("utf-8")).hexdigest())
+                            occurrence = counters.get(key, 0)
+                            counters[key] = occurrence + 1
+                            if occurrence:
+                                chunk.metadata["chunk_occurrence"] = occurrence
+                self.stats["split"].add(len(chunks or []), time.perf_counter() - start)
+                prepared.put((job, chunks, status))
+                updated = self.dedup.take_updated() if self.dedup is not None else []
+                if updated:
+                    # 대표가 있는 배치는 이 배치보다 먼저 큐에 들어갔으므로 먼저 쓰입니다.
+                    prepared.put((None, updated, _UPDATED))
+        except BaseException as e:
+            errors.append(e)
+            # 생산자가 큐에서 막히지 않도록 남은 항목을 비웁니다.
+            while loaded.get() is not _DONE:
+                pass
+        finally:
+            prepared.put(_DONE)
+
+    def _write(self, batch: List[Tuple[SourceJob, Optional[List[Document]], object]],
+               pending: Dict[int, Dict[str, List[str]]]) -> List[SourceJob]:
+        """배치를 upsert하고, 마지막 배치까지 쓴 작업을 정리한 뒤 반환합니다."""
+        start = time.perf_counter()
+        chunks = [chunk for _, job_chunks, _ in batch for chunk in job_chunks or []]
+        if chunks:
+            self.vector_store.add_documents(chunks)
+        owners = [job for job, job_chunks, _ in batch for _ in job_chunks or []]
+        for job, chunk, chunk_id in zip(owners, chunks, chunk_ids(chunks)):
+            if job is None:
+                # 병합으로 다시 쓰는 대표의 ID는 처음 쓸 때 이미 기록했습니다.
+                continue
+            pending.setdefault(id(job), {}).setdefault(chunk.metadata.get("source", job.source), []).append(chunk_id)
+        for job, job_chunks, status in batch:
+            if job_chunks is not None and status is not _UPDATED:
+                # 내용이 모두 사라졌거나 모두 중복인 소스도 이전 청크를 지우도록 표시합니다.
+                pending.setdefault(id(job), {})
+
+        completed = []
+        for job, _, status in batch:
+            if status is _MORE or status is _UPDATED:
+                continue
+            written = pending.pop(id(job), None)
+            if status is _FAILED or written is None:
+                # 로드 실패, 또는 prepare가 바뀐 내용이 없다고 판단한 소스
+                continue
+            for source in written or {job.source: []}:
+                self.vector_store.delete_stale(source, written.get(source, []))
+            completed.append((job, written))
+        self.stats["write"].add(len(chunks), time.perf_counter() - start)
+        if self.on_written is not None:
+            for job, written in completed:
+                self.on_written(job, written)
+        return [job for job, _ in completed]
+
+    def run(self, jobs: Iterable[SourceJob]) -> List[SourceJob]:
+        """
+        모든 작업을 적재하고, 쓰기까지 끝난 작업을 완료 순서대로 반환합니다.
+        로드에 실패한 작업은 self.failed에 남습니다. 분할이나 쓰기에서 발생한 예외는 그대로 전달합니다.
+        """
+        jobs = list(jobs)
+        loaded: "queue.Queue" = queue.Queue(maxsize=self.queue_size)
+        prepared: "queue.Queue" = queue.Queue(maxsize=self.queue_size)
+        errors: List[BaseException] = []
+        started = time.perf_counter()
+        producer = threading.Thread(target=self._produce, args=(jobs, loaded), daemon=True)
+        splitter = threading.Thread(target=self._split, args=(loaded, prepared, errors), daemon=True)
+        producer.start()
+        splitter.start()
+
+        written: List[SourceJob] = []
+        # 작업별로 지금까지 쓴 소스별 청크 ID
+        pending: Dict[int, Dict[str, List[str]]] = {}
+        try:
+            finished = False
+            while not finished:
+                batch = [prepared.get()]
+                if batch[0] is _DONE:
+                    break
+                # 이미 도착한 배치를 write_batch_size까지 모아 한 번에 씁니다.
+                size = len(batch[0][1] or [])
+                while size < self.write_batch_size:
+                    try:
+                        item = prepared.get_nowait()
+                    except queue.Empty:
+                        break
+                    if item is _DONE:
+                        finished = True
+                        break
+                    batch.append(item)
+                    size += len(item[1] or [])
+                written.extend(self._write(batch, pending))
+        except BaseException:
+            # 앞 단계가 가득 찬 큐에서 막히지 않도록 끝까지 비웁니다.
+            while splitter.is_alive() or not prepared.empty():
+                try:
+                    prepared.get(timeout=0.1)
+                except queue.Empty:
+                    pass
+            raise
+        finally:
+            splitter.join()
+            producer.join()
+        if errors:
+            raise errors[0]
+
+        elapsed = time.perf_counter() - started
+        print(f"적재 파이프라인 완료: 소스 {len(written)}개 ({len(self.failed)}개 로드 실패), {elapsed:.2f}초")
+        for stats in self.stats.values():
+            print(f"  {stats}")
+        return written
@@ -0,0 +1,131 @@
+import hashlib
+import json
+import os
+import threading
+from typing import Any, Dict, Iterable, List, Optional, Set
+
+# 스토어 디렉터리 안에 함께 저장되어, 스토어 내용과 항상 같은 시점의 상태를 가리킵니다.
+SOURCE_MANIFEST_FILE = "sources.json"
+SOURCE_MANIFEST_VERSION = 1
+_READ_BLOCK = 1 << 20
+
+
+def file_digest(path: str) -> str:
+    """파일 내용의 sha256 해시입니다."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(_READ_BLOCK), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def content_digest(texts: Iterable[str]) -> str:
+    """크롤링한 페이지처럼 파일이 없는 소스의 내용 해시입니다."""
+    digest = hashlib.sha256()
+    for text in texts:
+        digest.update(text.encode("utf-8"))
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+
+class SourceManifest:
+    """
+    적재한 소스별 상태(mtime, 크기, 내용 해시)와 그 소스가 만든 청크 ID를 기록합니다.
+
+    다시 적재할 때 file_changed()/content_changed()로 바뀐 소스만 골라 분할, 임베딩하고,
+    이번 적재에 나오지 않은 소스는 removed_sources()로 찾아 청크를 삭제할 수 있습니다.
+    파일은 mtime과 크기가 같으면 읽지 않고 건너뛰며, 다르면 해시를 비교하여 내용이 같으면 mtime만 갱신합니다.
+    적재 파이프라인의 여러 단계(스레드)에서 호출할 수 있습니다.
+    """
+
+    def __init__(self, path: str):
+        """
+        Args:
+            path (str): manifest 파일 경로 (보통 스토어 디렉터리의 SOURCE_MANIFEST_FILE).
+        """
+        self.path = path
+        self.sources: Dict[str, Dict[str, Any]] = {}
+        self._pending: Dict[str, Dict[str, Any]] = {}
+        self._seen: Set[str] = set()
+        self._lock = threading.RLock()
+        if os.path.exists(path):
+            self.load()
+
+    def load(self) -> None:
+        with open(self.path, encoding="utf-8") as f:
+            data = json.load(f)
+        if data.get("version") != SOURCE_MANIFEST_VERSION:
+            raise ValueError(f"지원하지 않는 소스 manifest 버전입니다: {data.get('version')}")
+        self.sources = data["sources"]
+
+    def save(self) -> None:
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        staging = f"{self.path}.tmp-{os.getpid()}"
+        with open(staging, "w", encoding="utf-8") as f:
+            json.dump({"version": SOURCE_MANIFEST_VERSION, "sources": self.sources}, f, ensure_ascii=False, indent=2)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(staging, self.path)
+
+    def file_changed(self, source: str, path: Optional[str] = None) -> bool:
+        """
+        파일 소스가 마지막 적재 이후 바뀌었는지 확인합니다. 바뀌었으면 적재 후 record()를 호출하세요.
+
+        Args:
+            source (str): 청크의 metadata["source"]로 쓰는 소스 이름.
+            path (Optional[str]): 실제 파일 경로. 없으면 source를 경로로 사용합니다.
+
+        파일이 없으면 False를 반환하고 소스를 확인한 것으로 표시하지 않으므로, removed_sources()에 포함되어
+        이전에 적재한 청크가 삭제됩니다.
+        """
+        try:
+            stat = os.stat(path or source)
+        except FileNotFoundError:
+            print(f"'{path or source}' 파일이 없습니다. 삭제된 소스로 처리합니다.")
+            return False
+        with self._lock:
+            self._seen.add(source)
+            entry = self.sources.get(source)
+            if entry is not None and entry.get("mtime") == stat.st_mtime and entry.get("size") == stat.st_size:
+                return False
+        digest = file_digest(path or source)
+        with self._lock:
+            if entry is not None and entry.get("sha256") == digest:
+                entry.update(mtime=stat.st_mtime, size=stat.st_size)
+                return False
+            self._pending[source] = {"mtime": stat.st_mtime, "size": stat.st_size, "sha256": digest}
+            return True
+
+    def content_changed(self, source: str, digest: str) -> bool:
+        """파일이 없는 소스(크롤링한 페이지 등)의 내용 해시가 마지막 적재와 다른지 확인합니다."""
+        with self._lock:
+            self._seen.add(source)
+            entry = self.sources.get(source)
+            if entry is not None and entry.get("sha256") == digest:
+                return False
+            self._pending[source] = {"sha256": digest}
+            return True
+
+    def keep(self, source: str) -> None:
+        """
+        이번 적재에서 확인하지 못했지만(크롤링 실패 등) 삭제하지 않을 소스를 표시합니다.
+        """
+        with self._lock:
+            self._seen.add(source)
+
+    def record(self, source: str, chunk_ids: Iterable[str]) -> None:
+        """바뀐 소스를 적재한 뒤 상태와 청크 ID를 기록합니다."""
+        with self._lock:
+            entry = self._pending.pop(source, {})
+            entry["chunk_ids"] = list(chunk_ids)
+            self.sources[source] = entry
+
+    def removed_sources(self) -> List[str]:
+        """기록되어 있지만 이번 적재에서 확인하지 않은 소스입니다."""
+        with self._lock:
+            return [source for source in self.sources if source not in self._seen]
+
+    def forget(self, source: str) -> List[str]:
+        """소스를 manifest에서 지우고 그 소스의 청크 ID를 반환합니다."""
+        with self._lock:
+            return self.sources.pop(source, {}).get("chunk_ids", [])
@@ -0,0 +1,101 @@
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+
+from langchain_core.documents import Document
+from langchain_text_splitters import TextSplitter
+
+# 파일을 한 번에 읽는 크기(문자 수)
+READ_BLOCK_CHARS = 1 << 20
+# 스트리밍 로더가 한 번에 내보내는 구간의 최대 길이(문자 수). 분할기의 chunk_size보다 충분히 커야
+# 구간 경계가 청크 분할 결과에 거의 영향을 주지 않습니다.
+SEGMENT_CHARS = 64 * 1024
+PARAGRAPH_SEPARATOR = "\n\n"
+
+
+def iter_file_blocks(path: str, block_chars: int = READ_BLOCK_CHARS, encoding: str = "utf-8") -> Iterator[str]:
+    """텍스트 파일을 block_chars 문자씩 읽어 내보냅니다."""
+    with open(path, "r", encoding=encoding) as f:
+        for block in iter(lambda: f.read(block_chars), ""):
+            yield block
+
+
+def iter_paragraphs(pieces: Iterable[str], separator: str = PARAGRAPH_SEPARATOR,
+                    max_chars: int = SEGMENT_CHARS) -> Iterator[str]:
+    """
+    연속된 텍스트 조각을 separator 기준의 문단으로 나눕니다. 조각 경계에 걸친 문단은 이어 붙입니다.
+    문단 앞뒤 공백은 유지하므로, 문단을 separator로 다시 이으면 원문과 같습니다.
+
+    separator는 새로 들어온 조각(과 앞 조각 끝의 separator 길이 - 1 글자)에서만 찾으므로 전체 시간이 입력 길이에
+    비례합니다. separator 없이 max_chars 이상 이어지는 문단은 max_chars 글자씩 잘라 내보내므로 버퍼가 max_chars를
+    크게 넘지 않습니다. 이렇게 잘린 문단은 다시 이을 때 그 사이에 separator가 들어갑니다.
+    """
+    keep = len(separator) - 1
+    carry = ""                    # 다음 조각과 이어져 separator가 될 수 있는 앞 조각의 끝
+    paragraph: List[str] = []     # 아직 separator를 만나지 못한 문단의 조각
+    size = 0
+    for piece in pieces:
+        text = carry + piece
+        start = 0
+        while (index := text.find(separator, start)) != -1:
+            paragraph.append(text[start:index])
+            yield "".join(paragraph)
+            paragraph, size = [], 0
+            start = index + len(separator)
+        split = max(start, len(text) - keep)
+        paragraph.append(text[start:split])
+        carry = text[split:]
+        size += split - start
+        if size >= max_chars:
+            text = "".join(paragraph)
+            while len(text) >= max_chars:
+                yield text[:max_chars]
+                text = text[max_chars:]
+            paragraph, size = [text], len(text)
+    yield "".join(paragraph) + carry
+
+
+def iter_segments(paragraphs: Iterable[str], max_chars: int = SEGMENT_CHARS,
+                  separator: str = PARAGRAPH_SEPARATOR) -> Iterator[str]:
+    """
+    문단을 max_chars를 넘지 않는 구간으로 묶습니다. 문단 하나가 max_chars보다 길면 그 문단만으로 구간을 만듭니다.
+    구간 경계가 항상 문단 경계에 오므로, 구간별로 분할해도 문단 중간에서 청크가 잘리지 않습니다.
+    """
+    segment = []
+    size = 0
+    for paragraph in paragraphs:
+        added = len(paragraph) + (len(separator) if segment else 0)
+        if segment and size + added > max_chars:
+            yield separator.join(segment)
+            segment, size = [], 0
+            added = len(paragraph)
+        segment.append(paragraph)
+        size += added
+    if segment:
+        yield separator.join(segment)
+
+
+def iter_text_segments(path: str, max_chars: int = SEGMENT_CHARS,
+                       metadata: Optional[Dict[str, Any]] = None) -> Iterator[Document]:
+    """
+    텍스트 파일을 문단 경계에서 max_chars 이하의 구간 Document로 나누어 읽습니다. 메모리 사용량은 파일 크기와 무관합니다.
+    """
+    for segment in iter_segments(iter_paragraphs(iter_file_blocks(path)), max_chars):
+        if segment.strip():
+            yield Document(page_content=segment, metadata=dict(metadata or {}))
+
+
+class StreamingSplitter:
+    """
+    LangChain 텍스트 분할기를 문서 스트림에 적용합니다.
+
+    split_documents는 입력 목록 전체를 받아 결과 목록을 만들지만, split_iter는 문서를 하나씩 받아
+    청크를 바로 내보내므로 스트리밍 로더(DocsLoader.load_iter)와 함께 쓰면 한 번에 한 구간만 메모리에 둡니다.
+    로더가 문단 경계에서 구간을 나누므로, 구간 사이에서 청크 겹침(chunk_overlap)이 없어지는 것 외에는
+    전체를 한 번에 분할한 결과와 같습니다.
+    """
+
+    def __init__(self, splitter: TextSplitter):
+        self.splitter = splitter
+
+    def split_iter(self, docs: Iterable[Document]) -> Iterator[Document]:
+        for doc in docs:
+            yield from self.splitter.split_documents([doc])
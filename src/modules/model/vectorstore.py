@@ -9,6 +9,8 @@ from langchain.schema import Document
 from langchain.text_splitter import RecursiveCharacterTextSplitter
 from langchain_upstage import UpstageEmbeddings
 
+from src.modules.loader.dedup import deduplicate_documents
+
 class VectorDBStore:
 
     load_dotenv()
@@ -16,10 +18,13 @@ class VectorDBStore:
     #API 키 가져오기
     api_key = os.getenv("UPSTAGE_API_KEY")
 
-    def __init__(self, html_file_path):
+    def __init__(self, html_file_path, embeddings=None):
         self.html_file_path = html_file_path
         self.text_file_path = html_file_path.replace(".html", ".txt")
-        self.embeddings = UpstageEmbeddings(model="solar-embedding-1-large", api_key=self.api_key)
+        # embeddings를 주입하면(예: 오프라인 HashingEmbeddings) Upstage API 없이 벡터DB를 만들 수 있음
+        if embeddings is None:
+            embeddings = UpstageEmbeddings(model="solar-embedding-1-large", api_key=self.api_key)
+        self.embeddings = embeddings
         self.docs = []  # 문서 저장 리스트 초기화
         self.preprocessed_docs = []  # 전처리된 문서 리스트 초기화
         self.split_documents = []  # 분할된 문서 저장
@@ -72,5 +77,7 @@ class VectorDBStore:
         if not self.split_documents:
             raise ValueError("문서가 분할되지 않았습니다. 먼저 split_documents()를 실행하세요.")
 
-        self.vectorstore = FAISS.from_documents(documents=self.split_documents, embedding=self.embeddings)
+        # 겹침이 큰 분할(120/50)로 생긴 중복 청크는 임베딩하지 않습니다.
+        documents = deduplicate_documents(self.split_documents)
+        self.vectorstore = FAISS.from_documents(documents=documents, embedding=self.embeddings)
         return self.vectorstore
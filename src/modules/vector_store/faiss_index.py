@@ -0,0 +1,221 @@
+from typing import Optional, Tuple
+
+import faiss
+import numpy as np
+
+# Faiss 스토어에서 선택할 수 있는 벡터 압축 방식
+#   None  : float32 원본 (IndexFlatL2)
+#   fp16  : 16비트 부동소수점 스칼라 양자화 (메모리 1/2)
+#   sq8   : 8비트 스칼라 양자화 (메모리 1/4)
+#   pq    : Product Quantization, 벡터당 pq_m 바이트 (4096차원, m=64 기준 메모리 1/256)
+COMPRESSION_MODES = (None, "fp16", "sq8", "pq")
+
+# 근사 최근접 탐색(ANN) 구조
+#   None : 전수 탐색 (쿼리 비용이 문서 수에 비례)
+#   hnsw : 계층 그래프 탐색. 학습 불필요, 검색 폭은 ef_search로 조절 (클수록 정확하고 느림)
+#   ivf  : k-means 군집(ivf_nlist개)으로 나눈 뒤 가까운 nprobe개 군집만 탐색
+INDEX_TYPES = (None, "hnsw", "ivf")
+# ivf_nlist를 정하지 않았을 때 군집 하나에 최소한 배정되도록 하는 학습 벡터 수 (faiss 권장치)
+IVF_MIN_POINTS_PER_CLUSTER = 39
+
+# PQ 코드북(2^8 = 256개 중심) 학습에 필요한 최소 벡터 수
+PQ_MIN_TRAINING_POINTS = 256
+# 학습 시간 상한을 위해 사용하는 최대 학습 벡터 수 (faiss 권장치: 중심 개수 * 39)
+MAX_TRAINING_POINTS = 10_000
+
+
+def default_nlist(num_vectors: int) -> int:
+    """
+    IVF 군집 수의 기본값 (4 * sqrt(n), 학습 벡터 수가 허용하는 범위 안에서)을 반환합니다.
+    """
+    num_training = min(num_vectors, MAX_TRAINING_POINTS)
+    return max(1, min(int(4 * np.sqrt(num_vectors)), num_training // IVF_MIN_POINTS_PER_CLUSTER))
+
+
+def index_description(dimension: int, compression: Optional[str] = None, pq_m: int = 64,
+                      rerank: bool = False, projection_dim: Optional[int] = None,
+                      index_type: Optional[str] = None, hnsw_m: int = 32, ivf_nlist: int = 1) -> str:
+    """
+    압축/차원 축소 설정을 faiss.index_factory 문자열로 변환합니다.
+
+    Args:
+        dimension (int): 벡터 차원.
+        compression (Optional[str]): None, "fp16", "sq8", "pq" 중 하나.
+        pq_m (int): PQ 서브 양자화기 개수(벡터당 바이트 수). (축소된) 차원의 약수여야 합니다.
+        rerank (bool): True이면 압축 인덱스 후보를 원본 벡터로 정확히 재정렬합니다 (원본 벡터를 추가로 보관).
+        projection_dim (Optional[int]): 주어지면 PCA로 이 차원까지 축소한 뒤 인덱싱합니다.
+            rerank와 함께 쓰면 축소된 공간에서 찾은 후보를 원본 차원 벡터로 재정렬합니다.
+        index_type (Optional[str]): None(전수 탐색), "hnsw", "ivf" 중 하나. 압축 방식은 각 구조의 벡터 저장 형식이 됩니다.
+        hnsw_m (int): HNSW 그래프에서 노드당 연결 수.
+        ivf_nlist (int): IVF 군집 수.
+    """
+    if compression not in COMPRESSION_MODES:
+        raise ValueError(f"지원하지 않는 압축 방식입니다: {compression} (가능한 값: {COMPRESSION_MODES})")
+    if index_type not in INDEX_TYPES:
+        raise ValueError(f"지원하지 않는 인덱스 구조입니다: {index_type} (가능한 값: {INDEX_TYPES})")
+    prefix = ""
+    if projection_dim is not None:
+        if not 0 < projection_dim < dimension:
+            raise ValueError(f"projection_dim({projection_dim})은 0보다 크고 벡터 차원({dimension})보다 작아야 합니다.")
+        prefix = f"PCA{projection_dim},"
+        dimension = projection_dim
+    if compression is None:
+        description = "Flat"
+    elif compression == "fp16":
+        description = "SQfp16"
+    elif compression == "sq8":
+        description = "SQ8"
+    else:
+        if dimension % pq_m != 0:
+            raise ValueError(f"pq_m({pq_m})은 벡터 차원({dimension})의 약수여야 합니다.")
+        # "np": 다중 의미(polysemous) 코드 학습을 하지 않습니다. 이 학습은 해밍 거리 사전 필터(polysemous_ht)에만
+        # 쓰이는데 검색에서 사용하지 않으며, pq_m에 비례해 학습 시간이 크게 늘어납니다.
+        description = f"PQ{pq_m}np"
+    if index_type == "hnsw":
+        description = f"HNSW{hnsw_m}" if compression is None else f"HNSW{hnsw_m}_{description}"
+    elif index_type == "ivf":
+        description = f"IVF{ivf_nlist},{description}"
+    if rerank and compression is not None:
+        description += ",RFlat"
+    return prefix + description
+
+
+def build_index(vectors: np.ndarray, compression: Optional[str] = None, pq_m: int = 64, rerank: bool = False,
+                rerank_k_factor: int = 4, projection_dim: Optional[int] = None, index_type: Optional[str] = None,
+                hnsw_m: int = 32, ivf_nlist: Optional[int] = None, ef_search: Optional[int] = None,
+                nprobe: Optional[int] = None) -> faiss.Index:
+    """
+    주어진 벡터로 학습(필요한 경우)된 빈 faiss 인덱스를 생성합니다. 벡터는 추가하지 않습니다.
+
+    projection_dim을 주면 PCA 변환이 IndexPreTransform으로 인덱스에 포함되어,
+    index.faiss에 함께 저장되고 문서 추가와 쿼리 검색 모두에 자동으로 적용됩니다.
+
+    Args:
+        vectors (np.ndarray): (n, dimension) 학습용 벡터.
+        compression (Optional[str]): 압축 방식. index_description() 참고.
+        pq_m (int): PQ 서브 양자화기 개수.
+        rerank (bool): 정확한 재정렬 사용 여부.
+        rerank_k_factor (int): 재정렬 시 k * rerank_k_factor개의 후보를 가져옵니다.
+        projection_dim (Optional[int]): PCA 축소 차원 (예: 256, 512).
+        index_type (Optional[str]): None, "hnsw", "ivf". index_description() 참고.
+        hnsw_m (int): HNSW 노드당 연결 수.
+        ivf_nlist (Optional[int]): IVF 군집 수. 없으면 default_nlist()로 학습 벡터 수에 맞춰 정합니다.
+        ef_search (Optional[int]): HNSW 검색 폭. 인덱스에 함께 저장됩니다.
+        nprobe (Optional[int]): IVF에서 탐색할 군집 수. 인덱스에 함께 저장됩니다.
+    """
+    vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+    dimension = vectors.shape[1]
+    if projection_dim is not None and len(vectors) < projection_dim:
+        print(f"PCA {projection_dim}차원 학습에는 최소 {projection_dim}개의 벡터가 필요합니다 "
+              f"(현재 {len(vectors)}개). 차원 축소 없이 생성합니다.")
+        projection_dim = None
+    if compression == "pq" and len(vectors) < PQ_MIN_TRAINING_POINTS:
+        print(f"PQ 학습에는 최소 {PQ_MIN_TRAINING_POINTS}개의 벡터가 필요합니다 "
+              f"(현재 {len(vectors)}개). sq8 압축으로 대체합니다.")
+        compression = "sq8"
+
+    if index_type == "ivf" and ivf_nlist is None:
+        ivf_nlist = default_nlist(len(vectors))
+    index = faiss.index_factory(dimension, index_description(dimension, compression, pq_m, rerank, projection_dim,
+                                                             index_type, hnsw_m, ivf_nlist or 1))
+    if not index.is_trained:
+        training = vectors
+        if len(training) > MAX_TRAINING_POINTS:
+            rng = np.random.default_rng(0)
+            training = training[rng.choice(len(training), size=MAX_TRAINING_POINTS, replace=False)]
+        index.train(training)
+    # 압축 없이 rerank만 지정하면 재정렬 단계 없이 Flat 인덱스가 만들어집니다.
+    refine = isinstance(index, faiss.IndexRefine)
+    base_index = faiss.downcast_index(index.base_index) if refine else index
+    if isinstance(base_index, faiss.IndexPreTransform):
+        # PCA 학습용 공분산 고유벡터(PCAMat, 최대 d x d)는 변환에 쓰이지 않으므로 저장 전에 비웁니다.
+        for i in range(base_index.chain.size()):
+            transform = faiss.downcast_VectorTransform(base_index.chain.at(i))
+            if isinstance(transform, faiss.PCAMatrix):
+                transform.PCAMat.resize(0)
+    if refine:
+        index.k_factor = rerank_k_factor
+    set_search_params(index, ef_search=ef_search, nprobe=nprobe)
+    return index
+
+
+def ann_index(index: faiss.Index) -> Optional[faiss.Index]:
+    """
+    PCA 변환과 재정렬 래퍼 안쪽의 HNSW/IVF 인덱스를 반환합니다. 전수 탐색 인덱스이면 None입니다.
+    """
+    index = faiss.downcast_index(index)
+    if isinstance(index, faiss.IndexPreTransform):
+        return ann_index(index.index)
+    if isinstance(index, faiss.IndexRefine):
+        return ann_index(index.base_index)
+    if isinstance(index, (faiss.IndexHNSW, faiss.IndexIVF)):
+        return index
+    return None
+
+
+def set_search_params(index: faiss.Index, ef_search: Optional[int] = None, nprobe: Optional[int] = None) -> None:
+    """
+    HNSW의 efSearch, IVF의 nprobe를 설정합니다. 인덱스 구조에 해당하지 않는 값은 무시합니다.
+    두 값 모두 index.faiss에 함께 기록되므로, 이 인덱스를 복제하거나 저장한 인덱스에도 유지됩니다.
+    """
+    inner = ann_index(index)
+    if isinstance(inner, faiss.IndexHNSW) and ef_search is not None:
+        inner.hnsw.efSearch = ef_search
+    elif isinstance(inner, faiss.IndexIVF) and nprobe is not None:
+        inner.nprobe = min(nprobe, inner.nlist)
+
+
+# 선택기(IDSelector)를 지원하지 않는 인덱스에서 허용된 벡터를 복원할 때 한 번에 처리하는 개수
+SUBSET_CHUNK_SIZE = 4096
+
+
+def search_subset(index: faiss.Index, vectors: np.ndarray, k: int, positions: np.ndarray
+                  ) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    허용된 벡터 위치(positions) 안에서만 k-최근접 검색을 수행합니다. 반환 형식은 index.search와 같습니다.
+
+    인덱스 구조를 따라 내려가며 처리합니다.
+      - IndexRefine: 원본 벡터를 가진 refine_index에서 정확한 거리로 찾습니다 (재정렬 결과와 같은 거리).
+      - IndexPreTransform: 쿼리에 PCA 등 변환을 적용한 뒤 내부 인덱스에서 찾습니다.
+      - IndexHNSW / IndexIVF: 근사 탐색 대신 허용된 벡터 전체를 확인하여, 조건에 맞는 문서가 k개 이상이면
+        항상 k개를 찾습니다.
+      - 그 외: IDSelectorBatch로 탐색 대상을 제한합니다. 선택기를 지원하지 않는 인덱스(IndexPQ 등)는
+        허용된 벡터를 복원(reconstruct)하여 직접 거리를 계산하며, 이는 인덱스의 비대칭 거리와 같습니다.
+    """
+    index = faiss.downcast_index(index)
+    vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+    if isinstance(index, faiss.IndexRefine):
+        return search_subset(index.refine_index, vectors, k, positions)
+    if isinstance(index, faiss.IndexPreTransform):
+        for i in range(index.chain.size()):
+            vectors = faiss.downcast_VectorTransform(index.chain.at(i)).apply(vectors)
+        return search_subset(index.index, vectors, k, positions)
+
+    if isinstance(index, faiss.IndexHNSW):
+        # 그래프 탐색은 허용된 노드가 적으면 k개를 찾지 못할 수 있으므로 벡터 저장소를 직접 검색합니다.
+        return search_subset(index.storage, vectors, k, positions)
+
+    positions = np.ascontiguousarray(positions, dtype=np.int64)
+    if isinstance(index, faiss.IndexIVF):
+        # 허용된 벡터가 어느 군집에 있든 찾도록 모든 군집을 탐색합니다 (선택기가 거리 계산을 건너뜁니다).
+        params = faiss.SearchParametersIVF()
+        params.nprobe = index.nlist
+    else:
+        params = faiss.SearchParameters()
+    params.sel = faiss.IDSelectorBatch(positions)
+    try:
+        return index.search(vectors, k, params=params)
+    except RuntimeError:
+        pass
+
+    ascending = index.metric_type == faiss.METRIC_L2
+    distances, labels = [], []
+    for start in range(0, len(positions), SUBSET_CHUNK_SIZE):
+        chunk = positions[start:start + SUBSET_CHUNK_SIZE]
+        chunk_distances, chunk_labels = faiss.knn(vectors, index.reconstruct_batch(chunk), min(k, len(chunk)),
+                                                  metric=index.metric_type)
+        distances.append(chunk_distances)
+        labels.append(chunk[chunk_labels])
+    distances, labels = np.hstack(distances), np.hstack(labels)
+    order = np.argsort(distances if ascending else -distances, axis=1, kind="stable")[:, :k]
+    return np.take_along_axis(distances, order, axis=1), np.take_along_axis(labels, order, axis=1)
@@ -0,0 +1,751 @@
+import asyncio
+import atexit
+import json
+import os
+import threading
+from contextlib import contextmanager
+from typing import List, Optional, Union, Callable, Dict, Any, Iterable, Sequence, Set, Tuple
+
+import faiss
+import numpy as np
+from langchain.docstore.document import Document
+from langchain_community.docstore.in_memory import InMemoryDocstore
+from langchain_community.vectorstores import FAISS
+
+from src.modules.embedding.executor import aembed_queries, embed_queries
+from src.modules.vector_store.faiss_index import build_index, set_search_params
+from src.modules.vector_store.lazy_docstore import (apply_score_threshold, batch_search_with_score, fetch_documents,
+                                                     prefiltered_search_with_score, store_ids, store_metadatas)
+from src.modules.vector_store.metadata_index import MetadataIndex
+from src.modules.vector_store.segments import SegmentManifest, empty_like, merge_segments
+from src.modules.vector_store.vector_store import VectorStore, batch_filters, chunk_ids
+
+# 삭제 표시와 문서 ID 대응표에서 아직 세그먼트로 기록되지 않은 memtable을 가리키는 키
+MEMTABLE = "memtable"
+
+
+class Faiss(VectorStore):
+    def __init__(self, embeddings, persist_directory: str = None, compression: Optional[str] = None,
+                 pq_m: int = 64, rerank: bool = False, projection_dim: Optional[int] = None,
+                 flush_interval: Optional[float] = None, max_segments: int = 8, auto_compact: bool = True,
+                 lazy_load: bool = True, index_type: Optional[str] = None, hnsw_m: int = 32,
+                 ivf_nlist: Optional[int] = None, ef_search: Optional[int] = None, nprobe: Optional[int] = None):
+        """
+        FAISS 기반 벡터 스토어 구현체입니다.
+
+        persist_directory에는 불변 세그먼트와 이를 나열하는 manifest.json이 저장됩니다.
+        추가된 문서는 메모리의 memtable에 모였다가 저장 시점에 새 세그먼트 하나로만 기록되므로,
+        저장 비용은 전체 코퍼스가 아니라 추가분의 크기에 비례합니다.
+        검색은 모든 세그먼트와 memtable에서 수행한 뒤 거리순으로 합칩니다.
+        청크는 결정적 ID(chunk_ids)로 upsert하며, 삭제(delete_by_source, delete_stale)는 세그먼트를 다시 쓰지 않고
+        manifest.json에 삭제 위치(tombstone)만 기록합니다. 삭제된 위치는 검색과 조회에서 제외되고 병합할 때 빠집니다.
+
+        Args:
+            embeddings: 외부에서 주입된 임베딩 인스턴스.
+            persist_directory (str, optional): 벡터 스토어의 상태를 저장할 로컬 경로.
+            compression (Optional[str]): 벡터 압축 방식. None(원본), "fp16", "sq8", "pq" 중 하나.
+                새로 생성하는 스토어에만 적용되며, 로드한 스토어는 저장된 인덱스 형식을 따릅니다.
+            pq_m (int): "pq" 압축 시 벡터당 바이트 수(서브 양자화기 개수).
+            rerank (bool): 압축 인덱스의 상위 후보를 원본 벡터로 정확히 재정렬할지 여부.
+            projection_dim (Optional[int]): 주어지면 생성 시점에 PCA를 학습하여 문서/쿼리 벡터를
+                이 차원(예: 256, 512)으로 축소합니다. 변환 행렬은 template.faiss에 함께 저장됩니다.
+            flush_interval (Optional[float]): 주어지면 add_documents는 메모리에만 반영하고(write-behind),
+                백그라운드 스레드가 이 주기(초)마다 변경분을 저장합니다. 종료 전 close() 또는 flush()를 호출하세요.
+            max_segments (int): 세그먼트 수가 이 값을 넘으면 작은 세그먼트들을 병합합니다.
+            auto_compact (bool): True이면 병합을 백그라운드 스레드에서 자동으로 수행합니다.
+                False이면 compact()를 직접 호출해야 합니다.
+            lazy_load (bool): True이면 저장된 세그먼트의 index.faiss를 메모리 매핑으로 열고, 문서 텍스트와
+                메타데이터는 검색 결과에 포함된 것만 읽습니다. 여러 프로세스가 같은 페이지 캐시를 공유하며
+                로드 시간이 코퍼스 크기와 거의 무관해집니다. False이면 모두 메모리로 읽습니다.
+            index_type (Optional[str]): None(전수 탐색), "hnsw", "ivf" 중 하나. 새로 생성하는 스토어에만 적용됩니다.
+                문서가 많아질수록 쿼리 지연시간이 선형으로 늘어나는 것을 막습니다 (faiss_index.INDEX_TYPES 참고).
+            hnsw_m (int): HNSW 노드당 연결 수.
+            ivf_nlist (Optional[int]): IVF 군집 수. 없으면 처음 추가되는 문서 수에 맞춰 정합니다.
+            ef_search (Optional[int]): HNSW 검색 폭. manifest.json에 저장되며, 주어지면 저장된 값을 덮어씁니다.
+            nprobe (Optional[int]): IVF에서 탐색할 군집 수. ef_search와 같이 저장됩니다.
+        """
+        self.embeddings = embeddings
+        self.persist_directory = persist_directory
+        self.compression = compression
+        self.pq_m = pq_m
+        self.rerank = rerank
+        self.projection_dim = projection_dim
+        self.flush_interval = flush_interval
+        self.max_segments = max_segments
+        self.auto_compact = auto_compact
+        self.lazy_load = lazy_load
+        self.index_type = index_type
+        self.hnsw_m = hnsw_m
+        self.ivf_nlist = ivf_nlist
+        self.ef_search = ef_search
+        self.nprobe = nprobe
+
+        self.manifest = SegmentManifest(persist_directory) if persist_directory else None
+        self.segments: List[Tuple[str, FAISS]] = []  # 디스크에 기록된 불변 세그먼트 (이름, 스토어)
+        self.memtable: Optional[FAISS] = None        # 아직 세그먼트로 기록되지 않은 추가분
+        self.template: Optional[faiss.Index] = None   # 학습만 된 빈 인덱스 (세그먼트 공통 설정)
+        # get_by_metadata용 메타데이터 역색인. 세그먼트는 처음 조회할 때 만들고, memtable은 추가할 때마다 갱신합니다.
+        self._metadata_indexes: Dict[str, MetadataIndex] = {}
+        self._memtable_index = MetadataIndex()
+        # 세그먼트 이름(memtable은 MEMTABLE)별 삭제된 벡터 위치와, 위치 순서의 문서 ID / ID → 위치 대응표
+        self._deleted: Dict[str, Set[int]] = {}
+        self._ids: Dict[str, List[str]] = {}
+        self._id_positions: Dict[str, Dict[str, int]] = {}
+        self._deletes_dirty = False
+
+        self._lock = threading.RLock()
+        self._dirty = False
+        self._transaction_depth = 0
+        self._replaced_segments: List[str] = []
+        self._flush_stop = threading.Event()
+        self._flush_thread = None
+        self._compact_lock = threading.Lock()
+        self._compact_thread = None
+
+        # persist_directory가 주어졌으면 저장된 세그먼트가 있는지 확인 후 로드합니다.
+        if self.persist_directory:
+            self._load()
+
+        if self.flush_interval:
+            self._flush_thread = threading.Thread(target=self._flush_loop, daemon=True)
+            self._flush_thread.start()
+            atexit.register(self.close)
+
+    def _load(self) -> None:
+        print(f"'{self.persist_directory}'에 저장된 벡터 스토어를 로드합니다. ", end="\n")
+        if self.manifest.exists():
+            self.manifest.load()
+            self.template = self.manifest.read_template()
+            self.segments = [(name, self.manifest.read_segment(name, self.embeddings, self.lazy_load))
+                             for name in self.manifest.names()]
+            self._deleted = self._saved_deletes()
+            self._apply_search_params()
+            print(f"로컬에서 벡터 스토어를 불러왔습니다. (세그먼트 {len(self.segments)}개)")
+        elif os.path.exists(os.path.join(self.persist_directory, "index.faiss")):
+            self._migrate_legacy()
+        else:
+            print("저장된 벡터 스토어가 없습니다. 새로 생성합니다.")
+
+    def _migrate_legacy(self) -> None:
+        """
+        이전 형식(디렉터리 바로 아래의 index.faiss + index.pkl)을 첫 번째 세그먼트로 옮깁니다.
+        """
+        store = FAISS.load_local(self.persist_directory, self.embeddings, allow_dangerous_deserialization=True)
+        self.template = empty_like(store.index)
+        name = self.manifest.new_segment_name()
+        self.manifest.write_template(self.template)
+        self.manifest.write_segment(name, store)
+        self.segments = [(name, store)]
+        self._save_manifest()
+        for filename in ("index.faiss", "index.pkl"):
+            os.remove(os.path.join(self.persist_directory, filename))
+        print(f"기존 단일 인덱스를 세그먼트 '{name}'로 변환했습니다.")
+
+    def _save_manifest(self) -> None:
+        self.manifest.segments = [{"name": name, "count": store.index.ntotal} for name, store in self.segments]
+        for entry in self.manifest.segments:
+            if self._deleted.get(entry["name"]):
+                entry["deleted"] = sorted(self._deleted[entry["name"]])
+        self.manifest.search_params = self._search_params()
+        self.manifest.save()
+        self._deletes_dirty = False
+
+    def _saved_deletes(self) -> Dict[str, Set[int]]:
+        """manifest.json에 기록된 세그먼트별 삭제 위치입니다."""
+        return {entry["name"]: set(entry["deleted"]) for entry in self.manifest.segments if entry.get("deleted")}
+
+    def _search_params(self) -> Dict[str, int]:
+        """
+        저장된 검색 파라미터에 생성자/set_search_params로 지정한 값을 덮어쓴 결과입니다.
+        """
+        params = dict(self.manifest.search_params) if self.manifest else {}
+        for name, value in (("ef_search", self.ef_search), ("nprobe", self.nprobe)):
+            if value is not None:
+                params[name] = value
+        return params
+
+    def _apply_search_params(self) -> None:
+        params = self._search_params()
+        indexes = [store.index for _, store in self.segments]
+        if self.memtable is not None:
+            indexes.append(self.memtable.index)
+        if self.template is not None:
+            indexes.append(self.template)
+        for index in indexes:
+            set_search_params(index, **params)
+
+    def set_search_params(self, ef_search: Optional[int] = None, nprobe: Optional[int] = None) -> None:
+        """
+        HNSW efSearch / IVF nprobe를 바꿉니다. 다시 만들 필요 없이 모든 세그먼트에 바로 적용되고 manifest에 저장됩니다.
+        """
+        with self._lock:
+            if ef_search is not None:
+                self.ef_search = ef_search
+            if nprobe is not None:
+                self.nprobe = nprobe
+            self._apply_search_params()
+            if self.manifest and self.manifest.exists():
+                self._save_manifest()
+
+    def _write_segment(self) -> None:
+        """
+        memtable을 새 불변 세그먼트로 기록하고 manifest에 등록합니다.
+        """
+        if not self.segments:
+            # 첫 세그먼트(또는 create_store로 다시 만든 스토어)의 학습 상태를 공통 템플릿으로 저장합니다.
+            self.manifest.write_template(self.template)
+        name = self.manifest.new_segment_name()
+        self.manifest.write_segment(name, self.memtable)
+        self.segments.append((name, self.memtable))
+        self._metadata_indexes[name] = self._memtable_index
+        self._memtable_index = MetadataIndex()
+        for table in (self._deleted, self._ids, self._id_positions):
+            if MEMTABLE in table:
+                table[name] = table.pop(MEMTABLE)
+        self._save_manifest()
+        self.manifest.remove_segments(self._replaced_segments)
+        self._replaced_segments = []
+        print(f"세그먼트 '{name}'({self.memtable.index.ntotal}개 문서)를 '{self.persist_directory}'에 저장했습니다.")
+        self.memtable = None
+
+    def flush(self) -> None:
+        """
+        저장되지 않은 추가분이 있으면 새 세그먼트 하나로 persist_directory에 저장합니다.
+        """
+        with self._lock:
+            if self._dirty and self.memtable is not None and self.memtable.index.ntotal and self.manifest:
+                self._write_segment()
+            elif self._dirty and self._deletes_dirty and self.manifest and self.segments:
+                # 삭제만 있었으면 manifest의 삭제 위치만 갱신합니다.
+                self._save_manifest()
+            self._dirty = False
+            needs_compaction = self.auto_compact and (len(self.segments) > self.max_segments
+                                                      or bool(self._mostly_deleted()))
+        if needs_compaction:
+            self._schedule_compaction()
+
+    def _flush_loop(self) -> None:
+        while not self._flush_stop.wait(self.flush_interval):
+            try:
+                self.flush()
+            except Exception as e:
+                print("백그라운드 저장 실패:", e)
+
+    def close(self) -> None:
+        """
+        백그라운드 저장/병합 스레드를 멈추고 남은 변경분을 저장합니다.
+        """
+        self._flush_stop.set()
+        if self._flush_thread is not None and self._flush_thread is not threading.current_thread():
+            self._flush_thread.join()
+        self.flush()
+        if self._compact_thread is not None:
+            self._compact_thread.join()
+
+    def _schedule_compaction(self) -> None:
+        if self._compact_thread is not None and self._compact_thread.is_alive():
+            return
+        self._compact_thread = threading.Thread(target=self._compact_in_background, daemon=True)
+        self._compact_thread.start()
+
+    def _compact_in_background(self) -> None:
+        try:
+            self.compact()
+        except Exception as e:
+            print("백그라운드 세그먼트 병합 실패:", e)
+
+    def compact(self, names: Optional[Iterable[str]] = None) -> Optional[str]:
+        """
+        여러 세그먼트를 하나로 병합하고 manifest를 원자적으로 교체한 뒤 이전 세그먼트를 삭제합니다.
+        병합하는 동안에도 검색과 문서 추가는 기존 세그먼트로 계속 동작합니다.
+
+        Args:
+            names (Optional[Iterable[str]]): 병합할 세그먼트 이름. 없으면 작은 세그먼트부터 골라
+                세그먼트 수를 max_segments의 절반 수준으로 줄입니다.
+
+        Returns:
+            Optional[str]: 새로 만든 세그먼트 이름. 병합할 세그먼트가 2개 미만이면 None.
+        """
+        with self._compact_lock:
+            with self._lock:
+                if names is not None:
+                    names = set(names)
+                    candidates = [name for name, _ in self.segments if name in names]
+                else:
+                    by_size = sorted(self.segments, key=lambda segment: segment[1].index.ntotal)
+                    count = max(2, len(self.segments) - self.max_segments // 2) \
+                        if len(self.segments) > self.max_segments else 0
+                    candidates = [name for name, _ in by_size[:count]]
+                    # 절반 이상 삭제된 세그먼트는 하나뿐이어도 다시 써서 삭제된 청크를 비웁니다.
+                    candidates += [name for name in self._mostly_deleted() if name not in candidates]
+                    candidates = [name for name, _ in self.segments if name in candidates]
+                if len(candidates) < 2 and not any(self._deleted.get(name) for name in candidates):
+                    return None
+                stores = [store for name, store in self.segments if name in candidates]
+                deleted = [set(self._deleted.get(name, ())) for name in candidates]
+                merged_name = self.manifest.new_segment_name()
+
+            # 병합과 기록은 잠금 밖에서 수행합니다. 세그먼트는 불변이므로 그대로 읽을 수 있습니다.
+            merged = merge_segments(self.embeddings, self.template, stores, deleted)
+            self.manifest.write_segment(merged_name, merged)
+
+            with self._lock:
+                current = [name for name, _ in self.segments]
+                if not all(name in current for name in candidates) or \
+                        any(self._deleted.get(name, set()) != removed for name, removed in zip(candidates, deleted)):
+                    # 병합 중에 create_store 등으로 세그먼트 목록이 바뀌었거나 청크가 더 삭제되었으면 결과를 버립니다.
+                    self.manifest.remove_segments([merged_name])
+                    return None
+                position = current.index(candidates[0])
+                segments = [(name, store) for name, store in self.segments if name not in candidates]
+                segments.insert(position, (merged_name, merged))
+                self.segments = segments
+                for name in candidates:
+                    for table in (self._metadata_indexes, self._deleted, self._ids, self._id_positions):
+                        table.pop(name, None)
+                self._save_manifest()
+            self.manifest.remove_segments(candidates)
+            print(f"세그먼트 {len(candidates)}개를 '{merged_name}'({merged.index.ntotal}개 문서)로 병합했습니다.")
+            return merged_name
+
+    def _mostly_deleted(self) -> List[str]:
+        """삭제된 위치가 절반 이상인 세그먼트 이름입니다."""
+        return [name for name, store in self.segments
+                if store.index.ntotal and len(self._deleted.get(name, ())) * 2 >= store.index.ntotal]
+
+    def begin(self) -> None:
+        """
+        적재 트랜잭션을 시작합니다. commit() 전까지 add_documents는 디스크에 쓰지 않습니다.
+        중첩 호출 시 가장 바깥 commit()에서 한 번만 저장합니다.
+        """
+        with self._lock:
+            self._transaction_depth += 1
+
+    def commit(self) -> None:
+        """
+        트랜잭션을 끝내고 누적된 추가분을 하나의 세그먼트로 저장합니다.
+        """
+        with self._lock:
+            if self._transaction_depth == 0:
+                raise RuntimeError("begin()이 호출되지 않았습니다.")
+            self._transaction_depth -= 1
+            if self._transaction_depth == 0:
+                self.flush()
+
+    def rollback(self) -> None:
+        """
+        트랜잭션을 취소하고, 메모리 상태를 마지막으로 저장된 상태로 되돌립니다.
+        저장된 세그먼트는 불변이므로 memtable만 버리면 됩니다.
+        """
+        with self._lock:
+            self._transaction_depth = 0
+            self._dirty = False
+            self.memtable = None
+            self._memtable_index = MetadataIndex()
+            for table in (self._deleted, self._ids, self._id_positions):
+                table.pop(MEMTABLE, None)
+            # 저장되지 않은 삭제 표시도 되돌립니다.
+            self._deleted = self._saved_deletes() if self.manifest and self.manifest.exists() else {}
+            self._deletes_dirty = False
+            if self._replaced_segments:
+                # create_store로 비운 세그먼트 목록과 템플릿을 디스크에서 다시 읽습니다.
+                self._replaced_segments = []
+                self.segments = []
+                self.template = None
+                if self.persist_directory:
+                    self._load()
+            elif not self.segments:
+                self.template = None
+
+    @contextmanager
+    def bulk(self):
+        """
+        with 블록 안의 add_documents를 모아 블록이 끝날 때 하나의 세그먼트로 저장합니다.
+        예외가 발생하면 rollback()하여 디스크에는 아무 것도 쓰지 않습니다.
+
+        Example:
+            with vector_store.bulk():
+                vector_store.add_documents(notion_docs)
+                vector_store.add_documents(csv_docs)
+        """
+        self.begin()
+        try:
+            yield self
+        except BaseException:
+            self.rollback()
+            raise
+        else:
+            self.commit()
+
+    def create_store(self, docs: Iterable[Document]):
+        """
+        주어진 문서 리스트로 FAISS 벡터 스토어를 새로 생성합니다.
+        기존 세그먼트는 새 세그먼트가 저장될 때 manifest에서 빠지고 삭제됩니다.
+
+        Args:
+            docs (List[Document]): 문서 객체 리스트.
+        """
+        with self._lock:
+            self._replaced_segments.extend(name for name, _ in self.segments)
+            self.segments = []
+            self.memtable = None
+            self._memtable_index = MetadataIndex()
+            self._deleted, self._ids, self._id_positions = {}, {}, {}
+            self.template = None
+            self._add(docs)
+            self._mark_dirty()
+
+    def _add(self, docs: Iterable[Document], vectors: Optional[Sequence[List[float]]] = None,
+             ids: Optional[List[str]] = None) -> None:
+        docs = list(docs)
+        if not docs:
+            return
+        ids = ids if ids is not None else chunk_ids(docs)
+        # 같은 ID가 두 번 들어오면 마지막 청크만 남깁니다.
+        keep = list(dict((doc_id, i) for i, doc_id in enumerate(ids)).values())
+        if len(keep) < len(docs):
+            docs, ids = [docs[i] for i in keep], [ids[i] for i in keep]
+            vectors = [vectors[i] for i in keep] if vectors is not None else None
+        texts = [doc.page_content for doc in docs]
+        if vectors is None:
+            vectors = self.embeddings.embed_documents(texts)
+        vectors = np.array(vectors, dtype=np.float32)
+        if self.template is None:
+            # 압축 인덱스(sq8, pq)와 PCA 변환은 처음 추가되는 문서 벡터로 학습하고, 이후 세그먼트가 공유합니다.
+            self.template = build_index(vectors, self.compression, self.pq_m, self.rerank,
+                                        projection_dim=self.projection_dim, index_type=self.index_type,
+                                        hnsw_m=self.hnsw_m, ivf_nlist=self.ivf_nlist, **self._search_params())
+        if self.memtable is None:
+            self.memtable = FAISS(self.embeddings, empty_like(self.template), InMemoryDocstore(), {})
+        # 삭제 표시된 이전 청크와 ID가 같으면 memtable 문서 저장소에서 먼저 지웁니다 (위치는 삭제 표시로 남습니다).
+        replaced = [doc_id for doc_id in ids if doc_id in self._id_positions.get(MEMTABLE, {})]
+        if replaced:
+            self.memtable.docstore.delete(replaced)
+        position = self.memtable.index.ntotal
+        self.memtable.add_embeddings(zip(texts, vectors), metadatas=[doc.metadata for doc in docs], ids=ids)
+        self._memtable_index.add(doc.metadata for doc in docs)
+        memtable_ids = self._ids.setdefault(MEMTABLE, [])
+        id_positions = self._id_positions.setdefault(MEMTABLE, {})
+        for offset, doc_id in enumerate(ids):
+            memtable_ids.append(doc_id)
+            id_positions[doc_id] = position + offset
+
+    def _mark_dirty(self) -> None:
+        """
+        변경분을 표시하고, 트랜잭션 중이 아니며 write-behind 모드도 아니면 즉시 저장합니다.
+        """
+        self._dirty = True
+        if self._transaction_depth == 0 and not self.flush_interval:
+            self.flush()
+
+    def add_documents(self, docs: Iterable[Document]):
+        """
+        문서를 결정적 ID(chunk_ids)로 upsert합니다. 아직 생성되지 않았다면, 먼저 벡터 스토어를 생성합니다.
+        같은 내용과 메타데이터로 저장된 청크는 건너뛰고, 바뀐 청크는 다시 추가한 뒤 이전 위치를 삭제 표시합니다.
+        트랜잭션(begin/bulk) 중이거나 flush_interval이 설정되어 있으면 저장을 뒤로 미룹니다.
+
+        Args:
+            docs (List[Document]): 문서 객체 리스트.
+        """
+        docs = list(docs)
+        with self._lock:
+            ids, docs, replaced = self._changed_documents(chunk_ids(docs), docs)
+            if not docs:
+                return
+            self._add(docs, ids=ids)
+            self._replace(replaced)
+            self._mark_dirty()
+
+    def _changed_documents(self, ids: List[str], docs: List[Document]
+                           ) -> Tuple[List[str], List[Document], List[Tuple[str, int]]]:
+        """
+        저장된 청크와 같은 문서를 뺀 (ID, 문서)와, 내용이나 메타데이터가 바뀌어 대체될 이전 청크의 위치를 반환합니다.
+        """
+        with self._lock:
+            pending = dict(zip(ids, docs))
+            replaced = []
+            for key, store, _ in self._indexed_stores():
+                id_positions = self._positions_by_id(key, store)
+                found = [(doc_id, id_positions[doc_id]) for doc_id in pending
+                         if doc_id in id_positions and id_positions[doc_id] not in self._deleted.get(key, ())]
+                if not found:
+                    continue
+                stored = fetch_documents(store, [position for _, position in found])
+                for (doc_id, position), old in zip(found, stored):
+                    doc = pending[doc_id]
+                    if old.page_content == doc.page_content and old.metadata == doc.metadata:
+                        pending.pop(doc_id)
+                    else:
+                        replaced.append((key, position))
+        unchanged = len(docs) - len(pending)
+        if unchanged:
+            print(f"청크 {len(docs)}개 중 {unchanged}개는 변경이 없어 건너뜁니다.")
+        return list(pending), list(pending.values()), replaced
+
+    def _replace(self, replaced: List[Tuple[str, int]]) -> None:
+        """새 버전을 추가한 뒤 이전 청크의 위치를 삭제 표시합니다."""
+        for key, position in replaced:
+            self._mark_deleted(key, [position])
+
+    def _positions_by_id(self, key: str, store: FAISS) -> Dict[str, int]:
+        """
+        세그먼트(또는 memtable)의 문서 ID → 벡터 위치 대응표입니다. 세그먼트는 불변이므로 처음 조회할 때 한 번만 만듭니다.
+        같은 ID가 여러 위치에 있으면(바뀐 청크를 다시 추가한 경우) 마지막 위치를 사용합니다.
+        """
+        id_positions = self._id_positions.get(key)
+        if id_positions is None:
+            ids = store_ids(store)
+            self._ids[key] = ids
+            id_positions = {doc_id: position for position, doc_id in enumerate(ids)}
+            self._id_positions[key] = id_positions
+        return id_positions
+
+    def _mark_deleted(self, key: str, positions: Iterable[int]) -> int:
+        deleted = self._deleted.setdefault(key, set())
+        before = len(deleted)
+        deleted.update(int(position) for position in positions)
+        if len(deleted) != before:
+            self._deletes_dirty = True
+        return len(deleted) - before
+
+    def delete_by_source(self, source: str) -> int:
+        """
+        metadata["source"]가 source인 청크를 모두 삭제 표시합니다. 트랜잭션 밖이면 manifest에 바로 기록합니다.
+        """
+        with self._lock:
+            count = sum(self._mark_deleted(key, self._allowed_positions(store, index, {"source": source}))
+                        for key, store, index in self._indexed_stores())
+            if count:
+                self._mark_dirty()
+        return count
+
+    def delete_stale(self, source: str, keep_ids: Iterable[str]) -> int:
+        """
+        source의 청크 중 keep_ids에 없는 청크를 삭제 표시합니다.
+        """
+        keep_ids = set(keep_ids)
+        with self._lock:
+            count = 0
+            for key, store, index in self._indexed_stores():
+                self._positions_by_id(key, store)
+                ids = self._ids[key]
+                count += self._mark_deleted(key, (position for position in
+                                                  self._allowed_positions(store, index, {"source": source})
+                                                  if ids[position] not in keep_ids))
+            if count:
+                self._mark_dirty()
+        return count
+
+    def is_empty(self) -> bool:
+        with self._lock:
+            return all(store.index.ntotal <= len(self._deleted.get(key, ()))
+                       for key, store, _ in self._indexed_stores())
+
+    async def aadd_documents(self, docs: Iterable[Document]):
+        """
+        add_documents의 비동기 버전입니다. 임베딩은 비동기로 요청하고, 인덱스 추가와 저장만 스레드에서 실행합니다.
+        """
+        docs = list(docs)
+        ids, docs, replaced = await asyncio.to_thread(self._changed_documents, chunk_ids(docs), docs)
+        if not docs:
+            return
+        vectors = await self.embeddings.aembed_documents([doc.page_content for doc in docs])
+        await asyncio.to_thread(self._add_embedded, docs, vectors, ids, replaced)
+
+    def _add_embedded(self, docs: List[Document], vectors: Sequence[List[float]], ids: List[str],
+                      replaced: List[Tuple[str, int]]) -> None:
+        with self._lock:
+            self._add(docs, vectors, ids)
+            self._replace(replaced)
+            self._mark_dirty()
+
+    def similarity_search(self,
+                          query: str,
+                          k: int = 4,
+                          filter: Optional[Union[Callable, Dict[str, Any]]] = None,
+                          **kwargs
+                          ) -> List[Document]:
+        """
+        주어진 쿼리와 유사한 문서를 검색합니다. 모든 세그먼트에서 k개씩 찾은 뒤 거리순으로 상위 k개를 반환합니다.
+        filter가 있으면 메타데이터 역색인으로 조건에 맞는 벡터 위치를 먼저 구하고 그 안에서만 검색하므로,
+        조건에 맞는 문서가 k개 이상이면 항상 k개를 반환합니다.
+        Args:
+            query (str): 검색할 쿼리.
+            k (int): 검색할 문서의 개수.
+            filter (Optional[Union[Callable, Dict[str, Any]]]): 필터링 조건.
+            **kwargs: 추가 인자. 필터나 삭제 표시가 없으면 LangChain FAISS 검색에 그대로 전달하고,
+                있으면 score_threshold만 지원합니다 (fetch_k는 필요 없으므로 무시, 그 외는 TypeError).
+        """
+        if filter is not None or any(self._deleted.values()):
+            # 삭제 표시된 청크는 배치 검색에서 제외합니다 (_search_vectors_with_score 참고).
+            score_threshold = kwargs.pop("score_threshold", None)
+            kwargs.pop("fetch_k", None)
+            if kwargs:
+                raise TypeError(f"지원하지 않는 검색 인자입니다: {', '.join(kwargs)}")
+            pairs = self._search_with_score_batch([query], k, [filter])[0]
+            if score_threshold is not None:
+                pairs = apply_score_threshold(self._searchable_stores()[0], pairs, score_threshold)
+            return [doc for doc, _ in pairs]
+        stores = self._searchable_stores()
+        embedding = self.embeddings.embed_query(query)
+        if len(stores) == 1:
+            return stores[0].similarity_search_by_vector(embedding, k=k, **kwargs)
+        # 모든 세그먼트가 같은 템플릿(변환, 양자화)을 쓰므로 거리를 그대로 비교할 수 있습니다.
+        results = []
+        for store in stores:
+            results.extend(store.similarity_search_with_score_by_vector(embedding, k=k, **kwargs))
+        results.sort(key=lambda result: result[1])
+        return [doc for doc, _ in results[:k]]
+
+    def _searchable_stores(self) -> List[FAISS]:
+        with self._lock:
+            stores = [store for _, store in self.segments]
+            if self.memtable is not None:
+                stores.append(self.memtable)
+        if not stores:
+            raise ValueError("벡터 스토어가 초기화되지 않았습니다. 먼저 문서를 추가해주세요.")
+        return stores
+
+    def _indexed_stores(self) -> List[Tuple[str, FAISS, MetadataIndex]]:
+        """
+        검색 대상 스토어(세그먼트 순서, 마지막이 memtable)를 (이름, 스토어, 메타데이터 역색인)으로 반환합니다.
+        """
+        with self._lock:
+            stores = [(name, store, self._segment_metadata_index(name, store)) for name, store in self.segments]
+            if self.memtable is not None:
+                stores.append((MEMTABLE, self.memtable, self._memtable_index))
+        return stores
+
+    def _live_positions(self, key: str, positions: Sequence[int]) -> List[int]:
+        """positions에서 삭제 표시된 위치를 뺀 목록입니다."""
+        deleted = self._deleted.get(key)
+        if not deleted:
+            return list(positions)
+        return [position for position in positions if position not in deleted]
+
+    def _segment_metadata_index(self, name: str, store: FAISS) -> MetadataIndex:
+        """
+        세그먼트의 메타데이터 역색인을 반환합니다. 처음 조회할 때 메타데이터 열만 읽어 만듭니다.
+        """
+        index = self._metadata_indexes.get(name)
+        if index is None:
+            index = MetadataIndex()
+            index.add(store_metadatas(store))
+            self._metadata_indexes[name] = index
+        return index
+
+    @staticmethod
+    def _allowed_positions(store: FAISS, index: MetadataIndex,
+                           filter: Union[Callable, Dict[str, Any]]) -> List[int]:
+        """
+        필터 조건에 맞는 벡터 위치를 오름차순으로 반환합니다.
+        역색인으로 처리할 수 없는 조건($gt, $or, callable 등)은 메타데이터를 차례로 검사합니다.
+        """
+        positions = index.lookup(filter)
+        if positions is None:
+            filter_func = FAISS._create_filter_func(filter)
+            positions = [position for position, metadata in enumerate(store_metadatas(store))
+                         if filter_func(metadata)]
+        return positions
+
+    def similarity_search_batch(self, queries: Sequence[str], k: int = 4,
+                                filters: Optional[Sequence[Optional[Union[Callable, Dict[str, Any]]]]] = None
+                                ) -> List[List[Document]]:
+        """
+        여러 쿼리를 임베딩 요청 한 번으로 검색합니다. 세그먼트마다 필터가 없는 쿼리는 index.search 한 번으로,
+        필터가 있는 쿼리는 같은 필터끼리 묶어 허용된 위치 안에서만 index.search 한 번으로 찾습니다.
+        """
+        return [[doc for doc, _ in pairs] for pairs in self._search_with_score_batch(queries, k, filters)]
+
+    def similarity_search_with_relevance_scores(self, query: str, k: int = 4,
+                                                filter: Optional[Union[Callable, Dict[str, Any]]] = None
+                                                ) -> List[Tuple[Document, float]]:
+        """
+        주어진 쿼리와 유사한 문서와 관련도 점수를 반환합니다. L2 거리를 LangChain FAISS와 같은 방식으로 변환합니다.
+        """
+        return [(doc, FAISS._euclidean_relevance_score_fn(float(score)))
+                for doc, score in self._search_with_score_batch([query], k, [filter])[0]]
+
+    async def asimilarity_search(self, query: str, k: int = 4,
+                                 filter: Optional[Union[Callable, Dict[str, Any]]] = None) -> List[Document]:
+        """
+        similarity_search의 비동기 버전입니다. 쿼리는 비동기 임베딩 요청으로 만들고,
+        인덱스 검색(CPU 작업, faiss는 GIL을 놓습니다)은 스레드에서 실행합니다.
+        """
+        return (await self.asimilarity_search_batch([query], k=k, filters=[filter]))[0]
+
+    async def asimilarity_search_batch(self, queries: Sequence[str], k: int = 4,
+                                       filters: Optional[Sequence[Optional[Union[Callable, Dict[str, Any]]]]] = None
+                                       ) -> List[List[Document]]:
+        """similarity_search_batch의 비동기 버전입니다."""
+        queries = list(queries)
+        filters = batch_filters(filters, len(queries))
+        if not queries:
+            return []
+        vectors = np.array(await aembed_queries(self.embeddings, queries), dtype=np.float32)
+        results = await asyncio.to_thread(self._search_vectors_with_score, vectors, k, filters)
+        return [[doc for doc, _ in pairs] for pairs in results]
+
+    def _search_with_score_batch(self, queries: Sequence[str], k: int,
+                                 filters: Optional[Sequence[Optional[Union[Callable, Dict[str, Any]]]]]
+                                 ) -> List[List[Tuple[Document, float]]]:
+        queries = list(queries)
+        filters = batch_filters(filters, len(queries))
+        if not queries:
+            return []
+        vectors = np.array(embed_queries(self.embeddings, queries), dtype=np.float32)
+        return self._search_vectors_with_score(vectors, k, filters)
+
+    def _search_vectors_with_score(self, vectors: np.ndarray, k: int,
+                                   filters: List[Optional[Union[Callable, Dict[str, Any]]]]
+                                   ) -> List[List[Tuple[Document, float]]]:
+        stores = self._indexed_stores()
+        if not stores:
+            raise ValueError("벡터 스토어가 초기화되지 않았습니다. 먼저 문서를 추가해주세요.")
+
+        groups: Dict[Any, List[int]] = {}
+        for i, filter in enumerate(filters):
+            if filter is None:
+                key = None
+            elif isinstance(filter, dict):
+                key = json.dumps(filter, sort_keys=True, ensure_ascii=False, default=str)
+            else:
+                key = id(filter)
+            groups.setdefault(key, []).append(i)
+
+        merged: List[List[Tuple[Document, float]]] = [[] for _ in filters]
+        for name, store, index in stores:
+            for key, rows in groups.items():
+                if key is None:
+                    # 필터가 없으면 인덱스(HNSW, IVF)의 근사 탐색을 그대로 쓰고, 삭제 표시된 수만큼 더 가져와 버립니다.
+                    store_results = batch_search_with_score(store, vectors[rows], k, [None] * len(rows),
+                                                            excluded=self._deleted.get(name))
+                else:
+                    positions = self._live_positions(name, self._allowed_positions(store, index, filters[rows[0]]))
+                    store_results = prefiltered_search_with_score(store, vectors[rows], k, positions)
+                for row, pairs in zip(rows, store_results):
+                    merged[row].extend(pairs)
+
+        for pairs in merged:
+            # 모든 세그먼트가 같은 템플릿을 쓰므로 거리를 그대로 비교할 수 있습니다.
+            pairs.sort(key=lambda result: result[1])
+            del pairs[k:]
+        return merged
+
+    def get_by_metadata(self, filter: Union[Callable, Dict[str, Any]], limit: Optional[int] = None) -> List[Document]:
+        """
+        메타데이터 조건에 맞는 문서를 세그먼트 순서(추가된 순서)대로 반환합니다.
+        쿼리 임베딩과 인덱스 검색 없이 메타데이터 역색인만 사용합니다.
+
+        Args:
+            filter (Union[Callable, Dict[str, Any]]): similarity_search와 같은 형식의 필터링 조건.
+            limit (Optional[int]): 반환할 최대 문서 수. 없으면 모두 반환합니다.
+        """
+        results: List[Document] = []
+        for name, store, index in self._indexed_stores():
+            remaining = None if limit is None else limit - len(results)
+            if remaining is not None and remaining <= 0:
+                break
+            positions = self._live_positions(name, self._allowed_positions(store, index, filter))
+            results.extend(fetch_documents(store, positions[:remaining]))
+        return results
@@ -0,0 +1,409 @@
+import json
+import operator
+import os
+import pickle
+import sqlite3
+import threading
+from collections.abc import Mapping
+from typing import AbstractSet, Any, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple, Union
+from urllib.request import pathname2url
+
+import faiss
+import numpy as np
+from langchain.docstore.document import Document
+from langchain_community.docstore.base import Docstore
+from langchain_community.docstore.in_memory import InMemoryDocstore
+from langchain_community.vectorstores import FAISS
+from langchain_community.vectorstores.utils import DistanceStrategy
+
+from src.modules.vector_store.faiss_index import search_subset
+
+# index.faiss 옆에 저장되는 문서 파일
+#   docs.sqlite : 벡터 위치(position)를 기본 키로 하는 documents 테이블. 원문, 문서 ID, 메타데이터(JSON)와
+#                 INDEXED_METADATA 필드를 인덱스가 걸린 meta_<필드> 컬럼으로 저장합니다.
+DOCSTORE_FILE = "docs.sqlite"
+
+# 필터 조건으로 자주 쓰이는 메타데이터 필드. 값은 JSON 문자열로 저장되어 타입까지 일치해야 같은 값입니다.
+INDEXED_METADATA = ("source", "document_type", "domain", "search_date")
+
+# 벡터 코드를 메모리 매핑으로 읽습니다. 여러 프로세스가 같은 OS 페이지 캐시를 공유합니다.
+MMAP_FLAGS = getattr(faiss, "IO_FLAG_MMAP_IFC", faiss.IO_FLAG_MMAP)
+
+# SQLite 바인딩 변수 개수 제한을 피하기 위한 IN 절 크기
+_SQL_CHUNK = 500
+
+
+def _column_value(value: Any) -> Optional[str]:
+    """
+    메타데이터 값을 인덱스 컬럼 값으로 변환합니다. 리스트/딕셔너리처럼 비교할 수 없는 값은 NULL입니다.
+    """
+    if value is None or isinstance(value, (list, dict, tuple, set)):
+        return None
+    return json.dumps(value, ensure_ascii=False)
+
+
+def write_docstore(directory: str, documents: Iterable[Tuple[str, Document]],
+                   indexed_fields: Sequence[str] = INDEXED_METADATA) -> None:
+    """
+    (문서 ID, Document) 목록을 벡터 위치 순서대로 docs.sqlite에 저장합니다.
+    """
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, DOCSTORE_FILE)
+    if os.path.exists(path):
+        os.remove(path)
+    columns = "".join(f", meta_{field} TEXT" for field in indexed_fields)
+    placeholders = ", ".join("?" * (4 + len(indexed_fields)))
+    conn = sqlite3.connect(path)
+    try:
+        conn.execute(f"CREATE TABLE documents (position INTEGER PRIMARY KEY, id TEXT NOT NULL, "
+                     f"page_content TEXT NOT NULL, metadata TEXT NOT NULL{columns})")
+        conn.executemany(
+            f"INSERT INTO documents VALUES ({placeholders})",
+            ((position, doc_id, doc.page_content, json.dumps(doc.metadata, ensure_ascii=False),
+              *(_column_value(doc.metadata.get(field)) for field in indexed_fields))
+             for position, (doc_id, doc) in enumerate(documents)),
+        )
+        # 인덱스는 데이터를 모두 넣은 뒤에 만드는 것이 훨씬 빠릅니다.
+        conn.execute("CREATE INDEX idx_documents_id ON documents (id)")
+        for field in indexed_fields:
+            conn.execute(f"CREATE INDEX idx_documents_{field} ON documents (meta_{field})")
+        conn.commit()
+    finally:
+        conn.close()
+
+
+def store_documents(store: FAISS) -> Iterator[Tuple[str, Document]]:
+    """
+    LangChain FAISS 스토어의 문서를 벡터 위치 순서대로 (문서 ID, Document)로 반환합니다.
+    지연 로딩 문서 저장소의 키는 벡터 위치이므로, 문서 ID는 Document.id를 우선합니다.
+    """
+    if isinstance(store.docstore, SQLiteDocstore):
+        yield from store.docstore.iter_documents()
+        return
+    for position in range(store.index.ntotal):
+        doc = store.docstore.search(store.index_to_docstore_id[position])
+        yield doc.id or store.index_to_docstore_id[position], doc
+
+
+def store_metadatas(store: FAISS) -> Iterator[Dict[str, Any]]:
+    """
+    LangChain FAISS 스토어의 메타데이터를 벡터 위치 순서대로 반환합니다.
+    """
+    if isinstance(store.docstore, SQLiteDocstore):
+        yield from store.docstore.iter_metadata()
+        return
+    for _, doc in store_documents(store):
+        yield doc.metadata
+
+
+def store_ids(store: FAISS) -> List[str]:
+    """
+    LangChain FAISS 스토어의 문서 ID를 벡터 위치 순서대로 반환합니다. SQLiteDocstore는 ID 열만 읽습니다.
+    """
+    if isinstance(store.docstore, SQLiteDocstore):
+        return store.docstore.ids()
+    return [doc_id for doc_id, _ in store_documents(store)]
+
+
+def fetch_documents(store: FAISS, positions: Sequence[int]) -> List[Document]:
+    """
+    벡터 위치 목록에 해당하는 문서를 순서대로 가져옵니다. SQLiteDocstore는 쿼리 한 번으로 처리합니다.
+    """
+    if isinstance(store.docstore, SQLiteDocstore):
+        return store.docstore.search_many([store.index_to_docstore_id[position] for position in positions])
+    return [store.docstore.search(store.index_to_docstore_id[position]) for position in positions]
+
+
+def has_documents(directory: str) -> bool:
+    return os.path.exists(os.path.join(directory, DOCSTORE_FILE))
+
+
+class PositionIndex(Mapping):
+    """
+    지연 로딩 문서 저장소와 함께 쓰는 index_to_docstore_id입니다. 벡터 위치를 그대로 문서 키로 사용합니다.
+    """
+
+    def __init__(self, size: int):
+        self.size = size
+
+    def __getitem__(self, position: int) -> int:
+        if not 0 <= position < self.size:
+            raise KeyError(position)
+        return int(position)
+
+    def __iter__(self) -> Iterator[int]:
+        return iter(range(self.size))
+
+    def __len__(self) -> int:
+        return self.size
+
+
+class SQLiteDocstore(Docstore):
+    """
+    docs.sqlite를 읽기 전용으로 여는 문서 저장소입니다. pickle을 사용하지 않습니다.
+
+    벡터 위치가 기본 키이므로 단건 조회는 O(1)이고, search_many()는 상위 k개를 쿼리 한 번으로 가져옵니다.
+    로드 시에는 아무 것도 메모리로 읽지 않으므로 코퍼스 텍스트 크기와 무관하게 즉시 준비됩니다.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._conn = sqlite3.connect(f"file:{pathname2url(os.path.abspath(path))}?mode=ro",
+                                     uri=True, check_same_thread=False)
+        self._lock = threading.Lock()
+        columns = [row[1] for row in self._conn.execute("PRAGMA table_info(documents)")]
+        self.indexed_fields = [column[len("meta_"):] for column in columns if column.startswith("meta_")]
+        (self._size,) = self._conn.execute("SELECT COUNT(*) FROM documents").fetchone()
+
+    def __len__(self) -> int:
+        return self._size
+
+    @staticmethod
+    def _to_document(row) -> Document:
+        doc_id, page_content, metadata = row
+        return Document(id=doc_id, page_content=page_content, metadata=json.loads(metadata))
+
+    def search(self, search: Union[int, str]) -> Union[str, Document]:
+        """
+        벡터 위치(int) 또는 문서 ID(str)로 문서를 찾습니다.
+        """
+        column = "id" if isinstance(search, str) else "position"
+        key = search if isinstance(search, str) else int(search)
+        with self._lock:
+            row = self._conn.execute(
+                f"SELECT id, page_content, metadata FROM documents WHERE {column} = ?", (key,)
+            ).fetchone()
+        if row is None:
+            return f"ID {search} not found."
+        return self._to_document(row)
+
+    def search_many(self, positions: Sequence[int]) -> List[Document]:
+        """
+        여러 벡터 위치의 문서를 입력 순서대로 반환합니다.
+        """
+        positions = [int(position) for position in positions]
+        found: Dict[int, Document] = {}
+        unique = list(dict.fromkeys(positions))
+        with self._lock:
+            for start in range(0, len(unique), _SQL_CHUNK):
+                chunk = unique[start:start + _SQL_CHUNK]
+                rows = self._conn.execute(
+                    f"SELECT position, id, page_content, metadata FROM documents "
+                    f"WHERE position IN ({','.join('?' * len(chunk))})", chunk,
+                ).fetchall()
+                for row in rows:
+                    found[row[0]] = self._to_document(row[1:])
+        missing = [position for position in positions if position not in found]
+        if missing:
+            raise ValueError(f"Could not find documents for positions {missing[:10]}")
+        return [found[position] for position in positions]
+
+    def iter_documents(self) -> Iterator[Tuple[str, Document]]:
+        """
+        모든 문서를 벡터 위치 순서대로 (문서 ID, Document)로 반환합니다.
+        """
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT id, page_content, metadata FROM documents ORDER BY position"
+            ).fetchall()
+        for row in rows:
+            yield row[0], self._to_document(row)
+
+    def ids(self) -> List[str]:
+        """
+        모든 문서 ID를 벡터 위치 순서대로 반환합니다.
+        """
+        with self._lock:
+            return [row[0] for row in self._conn.execute("SELECT id FROM documents ORDER BY position")]
+
+    def iter_metadata(self) -> Iterator[Dict[str, Any]]:
+        """
+        모든 문서의 메타데이터만 벡터 위치 순서대로 반환합니다 (원문은 읽지 않습니다).
+        """
+        with self._lock:
+            rows = self._conn.execute("SELECT metadata FROM documents ORDER BY position").fetchall()
+        for (metadata,) in rows:
+            yield json.loads(metadata)
+
+    def positions_where(self, filter: Dict[str, Any]) -> Optional[np.ndarray]:
+        """
+        인덱스 컬럼만으로 표현할 수 있는 필터(필드: 값, {"$eq": 값}, {"$in": [...]}의 AND)에 맞는
+        벡터 위치를 반환합니다. 표현할 수 없는 필터면 None을 반환합니다.
+        """
+        clauses, params = [], []
+        for field, condition in filter.items():
+            if field not in self.indexed_fields:
+                return None
+            if isinstance(condition, dict):
+                if len(condition) != 1 or next(iter(condition)) not in ("$eq", "$in"):
+                    return None
+                op, value = next(iter(condition.items()))
+                values = value if op == "$in" else [value]
+            else:
+                values = condition if isinstance(condition, list) else [condition]
+            values = [_column_value(value) for value in values]
+            if any(value is None for value in values):
+                return None
+            clauses.append(f"meta_{field} IN ({','.join('?' * len(values))})")
+            params.extend(values)
+        where = " AND ".join(clauses) or "1"
+        with self._lock:
+            rows = self._conn.execute(f"SELECT position FROM documents WHERE {where} ORDER BY position",
+                                      params).fetchall()
+        return np.array([row[0] for row in rows], dtype=np.int64)
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+class IndexedFAISS(FAISS):
+    """
+    SQLiteDocstore를 사용하는 FAISS 스토어입니다. 검색된 상위 문서를 한 번의 쿼리로 가져옵니다.
+    필터와 score_threshold의 의미는 LangChain FAISS와 같습니다.
+    """
+
+    def similarity_search_with_score_by_vector(
+        self,
+        embedding: List[float],
+        k: int = 4,
+        filter=None,
+        fetch_k: int = 20,
+        **kwargs: Any,
+    ) -> List[Tuple[Document, float]]:
+        vector = np.array([embedding], dtype=np.float32)
+        if self._normalize_L2:
+            faiss.normalize_L2(vector)
+        scores, indices = self.index.search(vector, k if filter is None else fetch_k)
+        hits = [(int(i), score) for i, score in zip(indices[0], scores[0]) if i != -1]
+        docs = self.docstore.search_many([self.index_to_docstore_id[i] for i, _ in hits])
+        results = [(doc, score) for doc, (_, score) in zip(docs, hits)]
+
+        if filter is not None:
+            filter_func = self._create_filter_func(filter)
+            results = [(doc, score) for doc, score in results if filter_func(doc.metadata)]
+        score_threshold = kwargs.get("score_threshold")
+        if score_threshold is not None:
+            results = apply_score_threshold(self, results, score_threshold)
+        return results[:k]
+
+
+def apply_score_threshold(store: FAISS, results: List[Tuple[Document, float]], score_threshold: float
+                          ) -> List[Tuple[Document, float]]:
+    """
+    LangChain FAISS의 score_threshold와 같이 거리(L2)는 이하, 유사도(내적, Jaccard)는 이상인 결과만 남깁니다.
+    """
+    cmp = (operator.ge if store.distance_strategy
+           in (DistanceStrategy.MAX_INNER_PRODUCT, DistanceStrategy.JACCARD) else operator.le)
+    return [(doc, score) for doc, score in results if cmp(score, score_threshold)]
+
+
+def batch_search_with_score(store: FAISS, vectors: np.ndarray, k: int, filters: Sequence, fetch_k: int = 20,
+                            excluded: Optional[AbstractSet[int]] = None) -> List[List[Tuple[Document, float]]]:
+    """
+    여러 쿼리 벡터를 index.search 한 번으로 검색하고, 필요한 문서도 한 번에 가져옵니다.
+    filters[i]는 i번째 쿼리의 필터(없으면 None)이며, 의미는 similarity_search_with_score_by_vector와 같습니다.
+    excluded(삭제 표시된 위치)가 주어지면 그 수만큼 더 가져온 뒤 버리므로, 인덱스(HNSW, IVF)의 근사 탐색을
+    그대로 쓰면서 남은 문서가 k개 이상이면 k개를 반환합니다.
+    """
+    excluded = excluded or set()
+    vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+    if store._normalize_L2:
+        vectors = vectors.copy()
+        faiss.normalize_L2(vectors)
+    fetch = max(k if filter is None else fetch_k for filter in filters) + len(excluded)
+    scores, indices = store.index.search(vectors, min(fetch, max(store.index.ntotal, 1)))
+
+    hits = []
+    for row, filter in enumerate(filters):
+        limit = (k if filter is None else fetch_k) + len(excluded)
+        hits.append([(int(i), score) for i, score in zip(indices[row][:limit], scores[row][:limit])
+                     if i != -1 and int(i) not in excluded])
+    keys = list(dict.fromkeys(store.index_to_docstore_id[i] for row in hits for i, _ in row))
+    if isinstance(store.docstore, SQLiteDocstore):
+        documents = dict(zip(keys, store.docstore.search_many(keys)))
+    else:
+        documents = {key: store.docstore.search(key) for key in keys}
+
+    results = []
+    for row, filter in zip(hits, filters):
+        pairs = [(documents[store.index_to_docstore_id[i]], score) for i, score in row]
+        if filter is not None:
+            filter_func = store._create_filter_func(filter)
+            pairs = [(doc, score) for doc, score in pairs if filter_func(doc.metadata)]
+        results.append(pairs[:k])
+    return results
+
+
+def prefiltered_search_with_score(store: FAISS, vectors: np.ndarray, k: int, positions: np.ndarray
+                                  ) -> List[List[Tuple[Document, float]]]:
+    """
+    허용된 벡터 위치(positions) 안에서만 여러 쿼리 벡터를 검색합니다.
+
+    LangChain FAISS의 필터는 fetch_k개 후보를 가져온 뒤 거르는 후처리라서, 조건에 맞는 문서가 후보 밖에 있으면
+    k개보다 적게 반환됩니다. 여기서는 인덱스 탐색 자체를 허용된 위치로 제한하므로 (faiss_index.search_subset)
+    조건에 맞는 문서가 k개 이상이면 항상 k개를 반환합니다.
+    """
+    k = min(k, len(positions))
+    if k <= 0:
+        return [[] for _ in range(len(vectors))]
+    vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+    if store._normalize_L2:
+        vectors = vectors.copy()
+        faiss.normalize_L2(vectors)
+    scores, indices = search_subset(store.index, vectors, k, positions)
+
+    hits = [[(int(i), score) for i, score in zip(row_indices, row_scores) if i != -1]
+            for row_indices, row_scores in zip(indices, scores)]
+    unique = list(dict.fromkeys(i for row in hits for i, _ in row))
+    documents = dict(zip(unique, fetch_documents(store, unique)))
+    return [[(documents[i], score) for i, score in row] for row in hits]
+
+
+def convert_pickle_docstore(folder_path: str) -> None:
+    """
+    FAISS.save_local이 만든 index.pkl을 읽어 docs.sqlite로 한 번 변환합니다.
+    save_embeddings_to_faiss가 쓰던 (texts, metadatas) 형식도 지원합니다.
+    """
+    with open(os.path.join(folder_path, "index.pkl"), "rb") as f:
+        first, second = pickle.load(f)
+    if isinstance(first, list):
+        documents = ((str(i), Document(page_content=text, metadata=metadata or {}))
+                     for i, (text, metadata) in enumerate(zip(first, second)))
+    else:
+        documents = ((second[i], first.search(second[i])) for i in range(len(second)))
+    write_docstore(folder_path, documents)
+    print(f"'{folder_path}'의 index.pkl을 {DOCSTORE_FILE}로 변환했습니다.")
+
+
+def save_faiss(store: FAISS, folder_path: str) -> None:
+    """
+    FAISS 스토어를 index.faiss와 docs.sqlite로 저장합니다 (pickle 없음).
+    """
+    os.makedirs(folder_path, exist_ok=True)
+    faiss.write_index(store.index, os.path.join(folder_path, "index.faiss"))
+    write_docstore(folder_path, store_documents(store))
+
+
+def load_lazy_faiss(folder_path: str, embeddings, mmap_index: bool = True) -> FAISS:
+    """
+    저장된 FAISS 스토어를 지연 로딩 모드로 엽니다.
+
+    index.faiss는 메모리 매핑(mmap_index=False이면 전체 읽기)으로 열고, 문서는 검색 결과에 포함된 것만
+    docs.sqlite에서 읽습니다. 문서 파일이 없으면 index.pkl에서 한 번 변환합니다.
+    """
+    if not has_documents(folder_path):
+        convert_pickle_docstore(folder_path)
+    index = faiss.read_index(os.path.join(folder_path, "index.faiss"), MMAP_FLAGS if mmap_index else 0)
+    docstore = SQLiteDocstore(os.path.join(folder_path, DOCSTORE_FILE))
+    return IndexedFAISS(embeddings, index, docstore, PositionIndex(index.ntotal))
+
+
+def load_eager_faiss(folder_path: str, embeddings) -> FAISS:
+    """
+    index.faiss와 문서 전체를 메모리로 읽어 일반 InMemoryDocstore 기반 FAISS 스토어를 만듭니다.
+    """
+    lazy = load_lazy_faiss(folder_path, embeddings, mmap_index=False)
+    documents = list(store_documents(lazy))
+    docstore = InMemoryDocstore({doc_id: doc for doc_id, doc in documents})
+    return FAISS(embeddings, lazy.index, docstore, {position: doc_id for position, (doc_id, _) in enumerate(documents)})
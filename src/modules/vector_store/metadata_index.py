@@ -0,0 +1,80 @@
+import json
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+
+def _value_key(value: Any) -> Optional[str]:
+    """
+    메타데이터 값을 역색인 키로 변환합니다. 리스트/딕셔너리처럼 비교할 수 없는 값은 색인하지 않습니다.
+    """
+    if value is None or isinstance(value, (list, dict, tuple, set)):
+        return None
+    return json.dumps(value, ensure_ascii=False)
+
+
+class MetadataIndex:
+    """
+    메타데이터 (키, 값) 쌍에서 문서 위치 목록으로 가는 메모리 내 역색인입니다.
+
+    문서는 추가된 순서대로 0부터 위치가 매겨지며, 스칼라 값(str, int, float, bool)을 가진 모든 키가 색인됩니다.
+    lookup()은 필드 일치 조건({"search_date": "20250407"}, {"$eq": ...}, {"$in": [...]})과
+    이들의 $and 조합만 처리하고, 그 밖의 필터(범위 비교, $or, callable 등)는 None을 반환하여
+    호출자가 전체 스캔으로 처리하도록 합니다.
+    """
+
+    def __init__(self):
+        self.size = 0
+        self._postings: Dict[Tuple[str, str], List[int]] = {}
+
+    def __len__(self) -> int:
+        return self.size
+
+    def add(self, metadatas: Iterable[Dict[str, Any]]) -> None:
+        """
+        문서 메타데이터를 현재 끝 위치부터 차례로 색인합니다.
+        """
+        for metadata in metadatas:
+            for field, value in (metadata or {}).items():
+                key = _value_key(value)
+                if key is not None:
+                    self._postings.setdefault((field, key), []).append(self.size)
+            self.size += 1
+
+    def _field_positions(self, field: str, condition: Any) -> Optional[Set[int]]:
+        if isinstance(condition, dict):
+            if len(condition) != 1 or next(iter(condition)) not in ("$eq", "$in"):
+                return None
+            op, value = next(iter(condition.items()))
+            values = value if op == "$in" else [value]
+        else:
+            values = condition if isinstance(condition, list) else [condition]
+        positions: Set[int] = set()
+        for value in values:
+            key = _value_key(value)
+            if key is None:
+                return None
+            positions.update(self._postings.get((field, key), ()))
+        return positions
+
+    def lookup(self, filter: Any) -> Optional[List[int]]:
+        """
+        필터에 맞는 문서 위치를 오름차순으로 반환합니다. 역색인으로 처리할 수 없는 필터면 None을 반환합니다.
+        """
+        if not isinstance(filter, dict):
+            return None
+        result: Optional[Set[int]] = None
+        for field, condition in filter.items():
+            if field == "$and":
+                parts = [self.lookup(sub_filter) for sub_filter in condition]
+                if any(part is None for part in parts):
+                    return None
+                positions = set.intersection(*(set(part) for part in parts)) if parts else set(range(self.size))
+            elif field.startswith("$"):
+                return None
+            else:
+                positions = self._field_positions(field, condition)
+                if positions is None:
+                    return None
+            result = positions if result is None else result & positions
+        if result is None:
+            return list(range(self.size))
+        return sorted(result)
@@ -6,6 +6,9 @@ from langchain_core.prompts import PromptTemplate
 from langchain_openai import ChatOpenAI
 from openai import BaseModel
 
+# 시간표 질문에서 날짜별로 가져올 최대 문서 수 (이전 similarity_search의 기본 k와 같습니다)
+TIMETABLE_DOCS_PER_DATE = 4
+
 
 def extract_context_and_files(result) -> Tuple[str, str]:
     """
@@ -36,7 +39,7 @@ def handle_vacation_search(vector_store: Any, question: str) -> Tuple[str, str]:
     문맥(context) 및 파일 정보까지 추출해 반환.
     여기에 전처리/후처리 로직도 포함할 수 있음.
     """
-    result = vector_store.similarity_search(question)
+    result = vector_store.for_category("vacation").similarity_search(question)
     context_text, attached_files = extract_context_and_files(result)
 
     return context_text, attached_files
@@ -94,11 +97,11 @@ def handle_timetable_search(vector_store: Any, question: str) -> Tuple[str, str]
     }
     refined_output = chain.invoke(inputs)
 
-    # 6. 각 날짜별 유사 문서 검색 및 결과 취합
+    # 6. 각 날짜의 문서를 메타데이터 색인으로 바로 조회하여 결과 취합 (날짜 조건만 있으므로 임베딩/유사도 검색 불필요)
+    timetable_store = vector_store.for_category("timetable")
     combined_results = []
     for date in refined_output.dates:
-        results = vector_store.similarity_search(date, filter={"search_date": date})
-        combined_results.extend(results)
+        combined_results.extend(timetable_store.get_by_metadata({"search_date": date}, limit=TIMETABLE_DOCS_PER_DATE))
 
     # 7. 취합된 결과에서 context_text와 files 정보를 추출
     context_text, files = extract_context_and_files(combined_results)
@@ -106,7 +109,14 @@ def handle_timetable_search(vector_store: Any, question: str) -> Tuple[str, str]
     return context_text, files
 
 def handle_legal_search(vector_store: Any, question: str) -> Tuple[str, str]:
-    result = vector_store.similarity_search(question)
+    result = vector_store.for_category("legal").similarity_search(question)
     context_text, _ = extract_context_and_files(result)
 
     return context_text, ""
+
+def handle_etc_search(vector_store: Any, question: str) -> Tuple[str, str]:
+    # 라우팅되지 않은 질문은 모든 도메인(샤드)에서 검색
+    result = vector_store.for_category("etc").similarity_search(question)
+    context_text, attached_files = extract_context_and_files(result)
+
+    return context_text, attached_files
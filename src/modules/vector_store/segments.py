@@ -0,0 +1,249 @@
+import fcntl
+import json
+import os
+import shutil
+import threading
+from contextlib import contextmanager
+from typing import Any, Dict, List, Optional, Sequence, Set
+
+import faiss
+import numpy as np
+from langchain_community.docstore.in_memory import InMemoryDocstore
+from langchain_community.vectorstores import FAISS
+
+from src.modules.vector_store.lazy_docstore import (has_documents, load_eager_faiss, load_lazy_faiss, save_faiss,
+                                                     store_documents)
+
+# 세그먼트 형식의 Faiss 스토어 디렉터리 구조
+#   manifest.json      : 현재 유효한 세그먼트 목록과 세그먼트별 삭제 표시("deleted") (원자적으로 교체)
+#   template.faiss     : 학습만 된 빈 인덱스. 모든 세그먼트가 같은 PCA/양자화 코드북을 공유합니다.
+#   segments/seg-NNNNNN: 불변 세그먼트 (index.faiss + docs.sqlite, lazy_docstore 참고)
+#   manifest.lock      : 같은 디렉터리를 쓰는 프로세스(인스턴스) 사이에서 세그먼트 이름 예약과 manifest 교체를 직렬화하는 잠금 파일
+MANIFEST_FILE = "manifest.json"
+LOCK_FILE = "manifest.lock"
+TEMPLATE_FILE = "template.faiss"
+SEGMENTS_DIR = "segments"
+MANIFEST_VERSION = 1
+
+
+def owned_copy(index: faiss.Index) -> faiss.Index:
+    """
+    인덱스를 메모리로 완전히 복사합니다. 메모리 매핑된 인덱스는 clone_index해도 같은 파일 영역을
+    참조하므로, 수정(reset, merge_from)하기 전에는 직렬화를 거쳐 복사해야 합니다.
+    """
+    return faiss.deserialize_index(faiss.serialize_index(index))
+
+
+def empty_like(index: faiss.Index) -> faiss.Index:
+    """
+    같은 학습 상태(PCA 행렬, 코드북)를 가진 빈 인덱스를 복제합니다.
+    """
+    clone = owned_copy(index)
+    clone.reset()
+    return clone
+
+
+def reconstruct_positions(index: faiss.Index, positions: Sequence[int]) -> np.ndarray:
+    """
+    벡터 위치 목록의 벡터를 인덱스에서 복원합니다 (압축 인덱스는 복원된 근사 벡터).
+    """
+    positions = np.ascontiguousarray(positions, dtype=np.int64)
+    try:
+        return index.reconstruct_batch(positions)
+    except RuntimeError:
+        # IVF는 위치 → 군집 대응표(direct map)가 있어야 복원할 수 있으므로 복사본에 만들어 사용합니다.
+        copy = owned_copy(index)
+        faiss.extract_index_ivf(copy).make_direct_map()
+        return copy.reconstruct_batch(positions)
+
+
+def merge_segments(embeddings, template: faiss.Index, stores: List[FAISS],
+                   deleted: Optional[Sequence[Set[int]]] = None) -> FAISS:
+    """
+    여러 세그먼트를 하나의 FAISS 스토어로 병합합니다. 입력 세그먼트는 변경하지 않습니다.
+
+    인덱스가 merge_from을 지원하면(Flat, SQ, PQ, PCA, IVF) 코드를 그대로 복사하고,
+    지원하지 않으면(RFlat, HNSW 등) 벡터를 복원하여 다시 추가합니다.
+    deleted[i]가 주어지면 i번째 세그먼트의 그 위치(삭제 표시된 청크)는 복원한 벡터로 다시 추가할 때 빠집니다.
+    """
+    deleted = deleted or [set() for _ in stores]
+    index = empty_like(template)
+    # IVF는 벡터 ID를 목록에 함께 저장하므로, 병합할 때 앞 세그먼트 크기만큼 ID를 밀어야 합니다.
+    shift_ids = faiss.try_extract_index_ivf(index) is not None
+    documents, index_to_docstore_id = {}, {}
+    for store, removed in zip(stores, deleted):
+        offset = index.ntotal
+        if removed:
+            live = [position for position in range(store.index.ntotal) if position not in removed]
+            if live:
+                index.add(reconstruct_positions(store.index, live))
+        else:
+            try:
+                # merge_from은 원본 인덱스를 비우므로 복사본을 넘깁니다.
+                index.merge_from(owned_copy(store.index), offset if shift_ids else 0)
+            except RuntimeError:
+                index.add(store.index.reconstruct_n(0, store.index.ntotal))
+        # InMemoryDocstore.add는 호출마다 전체 키를 검사하므로 모아서 한 번에 만듭니다.
+        for doc_id, doc in (pair for position, pair in enumerate(store_documents(store))
+                            if position not in removed):
+            index_to_docstore_id[len(index_to_docstore_id)] = doc_id
+            documents[doc_id] = doc
+    return FAISS(embeddings, index, InMemoryDocstore(documents), index_to_docstore_id)
+
+
+class SegmentManifest:
+    """
+    세그먼트 디렉터리의 manifest.json을 읽고 씁니다.
+
+    manifest는 임시 파일에 쓴 뒤 os.replace로 교체되므로, 읽는 쪽은 항상
+    완전히 기록된 세그먼트 목록만 보게 됩니다.
+
+    쓰기는 manifest.lock 파일 잠금(fcntl.flock) 안에서 수행합니다. 세그먼트 이름은 디스크의 manifest와
+    segments 디렉터리를 보고 정한 뒤 빈 디렉터리를 만들어 예약하므로, 같은 디렉터리를 연 다른 인스턴스와
+    이름이 겹치지 않습니다. 마지막으로 읽거나 쓴 뒤 다른 인스턴스가 manifest를 바꿨으면 save()는
+    그 변경을 덮어쓰지 않고 RuntimeError를 발생시킵니다.
+    """
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        self.segments: List[Dict[str, Any]] = []
+        self.next_id = 1
+        # HNSW efSearch, IVF nprobe 등 검색 시점 파라미터. 로드한 모든 세그먼트에 적용됩니다.
+        self.search_params: Dict[str, int] = {}
+        # 마지막으로 읽거나 쓴 manifest의 세그먼트 이름. 다른 인스턴스의 변경을 알아채는 데 씁니다.
+        self._saved_names: Optional[List[str]] = None
+        self._thread_lock = threading.RLock()
+        self._lock_file = None
+        self._lock_depth = 0
+
+    @property
+    def path(self) -> str:
+        return os.path.join(self.directory, MANIFEST_FILE)
+
+    @property
+    def template_path(self) -> str:
+        return os.path.join(self.directory, TEMPLATE_FILE)
+
+    def exists(self) -> bool:
+        return os.path.exists(self.path)
+
+    @contextmanager
+    def lock(self):
+        """
+        디렉터리의 manifest.lock에 배타적 파일 잠금을 겁니다. 같은 인스턴스 안에서는 중첩해서 호출할 수 있습니다.
+        """
+        with self._thread_lock:
+            if self._lock_depth == 0:
+                os.makedirs(self.directory, exist_ok=True)
+                self._lock_file = open(os.path.join(self.directory, LOCK_FILE), "a")
+                fcntl.flock(self._lock_file.fileno(), fcntl.LOCK_EX)
+            self._lock_depth += 1
+            try:
+                yield
+            finally:
+                self._lock_depth -= 1
+                if self._lock_depth == 0:
+                    fcntl.flock(self._lock_file.fileno(), fcntl.LOCK_UN)
+                    self._lock_file.close()
+                    self._lock_file = None
+
+    def _read(self) -> Dict[str, Any]:
+        with open(self.path, encoding="utf-8") as f:
+            data = json.load(f)
+        if data.get("version") != MANIFEST_VERSION:
+            raise ValueError(f"지원하지 않는 manifest 버전입니다: {data.get('version')}")
+        return data
+
+    def load(self) -> None:
+        data = self._read()
+        self.segments = data["segments"]
+        self.next_id = data["next_id"]
+        self.search_params = data.get("search_params", {})
+        self._saved_names = self.names()
+
+    def save(self) -> None:
+        with self.lock():
+            if self.exists():
+                data = self._read()
+                on_disk = [segment["name"] for segment in data["segments"]]
+                if on_disk != (self._saved_names or []):
+                    raise RuntimeError(f"다른 인스턴스가 '{self.path}'의 세그먼트 목록을 바꿨습니다. "
+                                       f"같은 디렉터리에는 하나의 Faiss 인스턴스만 쓸 수 있습니다. 다시 로드하세요.")
+                self.next_id = max(self.next_id, data["next_id"])
+            staging = f"{self.path}.tmp-{os.getpid()}"
+            with open(staging, "w", encoding="utf-8") as f:
+                json.dump({"version": MANIFEST_VERSION, "segments": self.segments, "next_id": self.next_id,
+                           "search_params": self.search_params}, f, ensure_ascii=False, indent=2)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(staging, self.path)
+            self._saved_names = self.names()
+
+    def new_segment_name(self) -> str:
+        """
+        다른 인스턴스가 쓰지 않은 세그먼트 이름을 정하고, 빈 디렉터리를 만들어 예약합니다.
+        예약한 디렉터리는 write_segment가 채우거나 remove_segments가 지웁니다.
+        """
+        with self.lock():
+            if self.exists():
+                self.next_id = max(self.next_id, self._read()["next_id"])
+            os.makedirs(os.path.join(self.directory, SEGMENTS_DIR), exist_ok=True)
+            while True:
+                name = f"seg-{self.next_id:06d}"
+                self.next_id += 1
+                try:
+                    os.mkdir(self.segment_path(name))
+                except FileExistsError:
+                    continue
+                return name
+
+    def segment_path(self, name: str) -> str:
+        return os.path.join(self.directory, SEGMENTS_DIR, name)
+
+    def names(self) -> List[str]:
+        return [segment["name"] for segment in self.segments]
+
+    def write_segment(self, name: str, store: FAISS) -> None:
+        """
+        세그먼트를 임시 디렉터리에 저장한 뒤 new_segment_name이 예약한 빈 디렉터리 자리로 옮깁니다.
+        manifest에 등록하기 전까지는 검색 대상이 아닙니다. 이미 내용이 있는 세그먼트는 덮어쓰지 않고
+        FileExistsError를 발생시킵니다.
+        """
+        target = self.segment_path(name)
+        staging = f"{target}.tmp-{os.getpid()}-{threading.get_ident()}"
+        shutil.rmtree(staging, ignore_errors=True)
+        save_faiss(store, staging)
+        with self.lock():
+            if os.path.isdir(target) and os.listdir(target):
+                shutil.rmtree(staging, ignore_errors=True)
+                raise FileExistsError(f"세그먼트 '{name}'이(가) 이미 있습니다: {target}")
+            # 빈 디렉터리(예약)는 rename으로 바로 교체됩니다.
+            os.replace(staging, target)
+
+    def read_segment(self, name: str, embeddings, lazy: bool = True) -> FAISS:
+        """
+        세그먼트를 엽니다. lazy이면 인덱스를 메모리 매핑하고 문서는 검색 결과에 포함될 때만 읽습니다.
+        """
+        path = self.segment_path(name)
+        if not has_documents(path):
+            # 이전 버전이 FAISS.save_local로 기록한 세그먼트
+            return FAISS.load_local(path, embeddings, allow_dangerous_deserialization=True)
+        return load_lazy_faiss(path, embeddings) if lazy else load_eager_faiss(path, embeddings)
+
+    def write_template(self, template: faiss.Index) -> None:
+        os.makedirs(self.directory, exist_ok=True)
+        staging = f"{self.template_path}.tmp-{os.getpid()}"
+        faiss.write_index(template, staging)
+        os.replace(staging, self.template_path)
+
+    def read_template(self) -> Optional[faiss.Index]:
+        if not os.path.exists(self.template_path):
+            return None
+        return faiss.read_index(self.template_path)
+
+    def remove_segments(self, names: List[str]) -> None:
+        """
+        manifest에서 빠진 세그먼트 디렉터리를 삭제합니다.
+        """
+        for name in names:
+            shutil.rmtree(self.segment_path(name), ignore_errors=True)
@@ -0,0 +1,143 @@
+from contextlib import ExitStack, contextmanager
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple, Union
+
+from langchain.docstore.document import Document
+
+from src.modules.vector_store.vector_store import DEFAULT_COLLECTION, ChromaStore, VectorStore
+
+# 문서 도메인. route_question의 카테고리와 같은 이름을 쓰며, 어느 카테고리에도 속하지 않는 문서(슬랙 활용법 등)는 etc입니다.
+DOMAINS = ("vacation", "timetable", "legal", "etc")
+# 라우팅에 실패했거나 etc로 분류된 질문은 모든 샤드를 검색합니다.
+FALLBACK_CATEGORY = "etc"
+
+
+def check_domain_collections(persist_directory: str, domains: Sequence[str] = DOMAINS) -> None:
+    """
+    서비스할 Chroma 디렉터리에 도메인별 컬렉션의 청크가 있는지 확인합니다.
+    샤드를 열기 전에 호출해야 합니다 (ChromaStore를 열면 빈 도메인 컬렉션이 만들어집니다).
+    도메인 컬렉션이 모두 비어 있으면 모든 답변이 참고 문서 없이 생성되므로, 원인을 담아 RuntimeError를 발생시킵니다.
+    """
+    counts = ChromaStore.collection_counts(persist_directory)
+    if any(counts.get(domain) for domain in domains):
+        return
+    if counts.get(DEFAULT_COLLECTION):
+        raise RuntimeError(
+            f"'{persist_directory}'는 도메인별 컬렉션 도입 이전의 스토어입니다 "
+            f"(기본 컬렉션 '{DEFAULT_COLLECTION}'에만 청크 {counts[DEFAULT_COLLECTION]}개가 있습니다). "
+            f"src/modules/init.py의 init()을 실행해 도메인별 컬렉션으로 다시 적재하세요."
+        )
+    raise RuntimeError(f"'{persist_directory}'에 적재된 청크가 없습니다. src/modules/init.py의 init()을 먼저 실행하세요.")
+
+
+class ShardedStore(VectorStore):
+    def __init__(self, store_factory: Callable[[str], VectorStore], domains: Sequence[str] = DOMAINS):
+        """
+        도메인별로 별도의 컬렉션/인덱스(샤드)에 문서를 나누어 저장하는 벡터 스토어입니다.
+
+        문서는 metadata["domain"]에 따라 해당 샤드에만 추가되고, for_category()로 라우터가 고른 샤드만 검색합니다.
+        검색 대상이 작아지고, 시간표 질문이 법령 청크와 경쟁하지 않습니다.
+        이 스토어 자체를 검색하면 모든 샤드를 검색한 뒤 관련도 점수순으로 합칩니다.
+
+        Example:
+            store = ShardedStore(lambda domain: ChromaStore(embeddings, "../chroma2", collection_name=domain))
+            store.for_category(route_question(question)).similarity_search(question)
+
+        Args:
+            store_factory (Callable[[str], VectorStore]): 도메인 이름을 받아 그 도메인의 샤드를 만드는 함수.
+            domains (Sequence[str]): 샤드를 만들 도메인 목록.
+        """
+        self.shards: Dict[str, VectorStore] = {domain: store_factory(domain) for domain in domains}
+
+    def shard(self, domain: str) -> VectorStore:
+        if domain not in self.shards:
+            raise ValueError(f"알 수 없는 도메인입니다: {domain} (가능한 값: {tuple(self.shards)})")
+        return self.shards[domain]
+
+    def for_category(self, category: str) -> VectorStore:
+        """
+        라우팅된 카테고리의 샤드를 반환합니다. etc이거나 샤드가 없는 카테고리면 모든 샤드를 검색하도록 자기 자신을 반환합니다.
+        """
+        if category == FALLBACK_CATEGORY or category not in self.shards:
+            return self
+        return self.shards[category]
+
+    def _split(self, docs: Iterable[Document]) -> Dict[str, List[Document]]:
+        groups: Dict[str, List[Document]] = {}
+        for doc in docs:
+            domain = doc.metadata.get("domain")
+            if domain is None:
+                raise ValueError("ShardedStore에 추가하는 문서에는 metadata['domain']이 있어야 합니다.")
+            self.shard(domain)
+            groups.setdefault(domain, []).append(doc)
+        return groups
+
+    def create_store(self, docs: Iterable[Document]):
+        """
+        주어진 문서로 모든 샤드를 새로 생성합니다. 문서가 없는 도메인의 샤드도 비웁니다.
+        """
+        groups = self._split(docs)
+        for domain, shard in self.shards.items():
+            shard.create_store(groups.get(domain, []))
+
+    def add_documents(self, docs: Iterable[Document]):
+        """문서를 metadata['domain']에 해당하는 샤드에 추가합니다."""
+        for domain, group in self._split(docs).items():
+            self.shards[domain].add_documents(group)
+
+    def is_empty(self) -> bool:
+        return all(shard.is_empty() for shard in self.shards.values())
+
+    def delete_by_source(self, source: str) -> int:
+        """모든 샤드에서 metadata["source"]가 source인 청크를 삭제합니다."""
+        return sum(shard.delete_by_source(source) for shard in self.shards.values())
+
+    def delete_stale(self, source: str, keep_ids: Iterable[str]) -> int:
+        """모든 샤드에서 source의 청크 중 keep_ids에 없는 청크를 삭제합니다."""
+        keep_ids = set(keep_ids)
+        return sum(shard.delete_stale(source, keep_ids) for shard in self.shards.values())
+
+    def replace_sources(self, docs: Iterable[Document]):
+        """문서를 도메인별 샤드에서 소스 단위로 교체합니다 (VectorStore.replace_sources 참고)."""
+        for domain, group in self._split(docs).items():
+            self.shards[domain].replace_sources(group)
+
+    @contextmanager
+    def bulk(self):
+        """
+        모든 샤드의 bulk()를 함께 엽니다. 각 샤드는 블록이 끝날 때 한 번만 저장합니다.
+        """
+        with ExitStack() as stack:
+            for shard in self.shards.values():
+                stack.enter_context(shard.bulk())
+            yield self
+
+    def similarity_search_with_relevance_scores(self, query: str, k: int = 4,
+                                                filter: Optional[Union[Callable, Dict[str, Any]]] = None
+                                                ) -> List[Tuple[Document, float]]:
+        """
+        모든 샤드에서 k개씩 찾은 뒤 관련도 점수순으로 상위 k개를 반환합니다. 비어 있는 샤드는 건너뜁니다.
+        """
+        results = []
+        for shard in self.shards.values():
+            if shard.is_empty():
+                continue
+            results.extend(shard.similarity_search_with_relevance_scores(query, k=k, filter=filter))
+        results.sort(key=lambda result: result[1], reverse=True)
+        return results[:k]
+
+    def similarity_search(self, query: str, k: int = 4,
+                          filter: Optional[Union[Callable, Dict[str, Any]]] = None) -> List[Document]:
+        """모든 샤드에서 주어진 쿼리와 유사한 문서를 검색합니다."""
+        return [doc for doc, _ in self.similarity_search_with_relevance_scores(query, k=k, filter=filter)]
+
+    def get_by_metadata(self, filter: Union[Callable, Dict[str, Any]], limit: Optional[int] = None) -> List[Document]:
+        """
+        모든 샤드에서 메타데이터 조건에 맞는 문서를 도메인 순서대로 반환합니다.
+        """
+        results: List[Document] = []
+        for shard in self.shards.values():
+            remaining = None if limit is None else limit - len(results)
+            if remaining is not None and remaining <= 0:
+                break
+            results.extend(shard.get_by_metadata(filter, limit=remaining))
+        return results
@@ -1,9 +1,51 @@
+import asyncio
 import datetime
+import hashlib
+import json
+import os
+import shutil
+import threading
 from abc import ABC, abstractmethod
-from typing import List, Optional, Union, Callable, Dict, Any, Iterable
+from contextlib import contextmanager
+from typing import List, Optional, Union, Callable, Dict, Any, Iterable, Sequence, Tuple
+import numpy as np
 from langchain.docstore.document import Document
 from langchain_community.vectorstores import FAISS
-from langchain_chroma import Chroma
+
+from src.modules.embedding.executor import aembed_queries, embed_queries
+from src.modules.vector_store.metadata_index import MetadataIndex
+
+def batch_filters(filters: Optional[Sequence], count: int) -> List:
+    """
+    similarity_search_batch의 filters 인자를 쿼리 수만큼의 목록으로 맞춥니다.
+    """
+    if filters is None:
+        return [None] * count
+    filters = list(filters)
+    if len(filters) != count:
+        raise ValueError(f"filters의 길이({len(filters)})가 쿼리 수({count})와 다릅니다.")
+    return filters
+
+
+def chunk_ids(docs: Sequence[Document]) -> List[str]:
+    """
+    청크마다 (소스, 내용 해시, 같은 소스 안에서 같은 내용이 나온 순번)으로 결정되는 ID를 만듭니다.
+    같은 문서를 다시 적재하면 같은 ID가 나오므로, 스토어에 중복 없이 덮어쓸 수 있습니다.
+    소스 안의 위치는 ID에 넣지 않으므로, 앞에 청크가 끼어들거나 빠져도 나머지 청크의 ID는 바뀌지 않습니다.
+    순번은 적재 파이프라인이 기록한 metadata["chunk_occurrence"]를 쓰고, 없으면 이 목록 안에서 셉니다.
+    """
+    ids = []
+    occurrences: Dict[Tuple[str, str], int] = {}
+    for doc in docs:
+        source = str(doc.metadata.get("source", ""))
+        content_hash = hashlib.sha1(doc.page_content.encode("utf-8")).hexdigest()
+        occurrence = doc.metadata.get("chunk_occurrence")
+        if occurrence is None:
+            occurrence = occurrences.get((source, content_hash), 0)
+            occurrences[(source, content_hash)] = occurrence + 1
+        ids.append(hashlib.sha1(f"{source}\0{content_hash}\0{occurrence}".encode("utf-8")).hexdigest())
+    return ids
+
 
 class VectorStore(ABC):
     @abstractmethod
@@ -21,110 +63,568 @@ class VectorStore(ABC):
         """주어진 쿼리와 유사한 문서를 검색합니다."""
         pass
 
+    def similarity_search_batch(self, queries: Sequence[str], k: int = 4,
+                                filters: Optional[Sequence[Optional[Union[Callable, Dict[str, Any]]]]] = None
+                                ) -> List[List[Document]]:
+        """
+        여러 쿼리를 한 번에 검색하여 쿼리별 결과 목록을 입력 순서대로 반환합니다.
+        filters를 주면 filters[i]가 i번째 쿼리에 적용됩니다.
+        기본 구현은 similarity_search를 쿼리마다 호출하며, 구현체가 임베딩 요청과 인덱스 검색을 묶어 재정의합니다.
+        """
+        queries = list(queries)
+        return [self.similarity_search(query, k=k, filter=filter)
+                for query, filter in zip(queries, batch_filters(filters, len(queries)))]
+
+    async def aadd_documents(self, docs: Iterable[Document]):
+        """
+        add_documents의 비동기 버전입니다. 기본 구현은 add_documents를 스레드에서 실행하여 이벤트 루프를 막지 않습니다.
+        """
+        await asyncio.to_thread(self.add_documents, list(docs))
+
+    async def asimilarity_search(self, query: str, k: int = 4,
+                                 filter: Optional[Union[Callable, Dict[str, Any]]] = None) -> List[Document]:
+        """
+        similarity_search의 비동기 버전입니다. 하나의 이벤트 루프에서 많은 질문을 동시에 처리할 때 사용합니다.
+        기본 구현은 similarity_search를 스레드에서 실행하며, 구현체가 비동기 임베딩 요청으로 재정의합니다.
+        """
+        return await asyncio.to_thread(self.similarity_search, query, k=k, filter=filter)
+
+    async def asimilarity_search_batch(self, queries: Sequence[str], k: int = 4,
+                                       filters: Optional[Sequence[Optional[Union[Callable, Dict[str, Any]]]]] = None
+                                       ) -> List[List[Document]]:
+        """similarity_search_batch의 비동기 버전입니다."""
+        return await asyncio.to_thread(self.similarity_search_batch, list(queries), k=k, filters=filters)
+
+    def similarity_search_with_relevance_scores(self, query: str, k: int = 4,
+                                                filter: Optional[Union[Callable, Dict[str, Any]]] = None
+                                                ) -> List[Tuple[Document, float]]:
+        """
+        주어진 쿼리와 유사한 문서와 관련도 점수(클수록 유사, LangChain의 relevance score 기준)를 반환합니다.
+        거리 기준이 다른 여러 스토어의 결과를 합칠 때 사용합니다.
+        """
+        raise NotImplementedError(f"{type(self).__name__}은 관련도 점수 검색을 지원하지 않습니다.")
+
+    def get_by_metadata(self, filter: Union[Callable, Dict[str, Any]], limit: Optional[int] = None) -> List[Document]:
+        """
+        메타데이터 조건에 맞는 문서를 추가된 순서대로 반환합니다. 임베딩과 벡터 검색을 하지 않습니다.
+        """
+        raise NotImplementedError(f"{type(self).__name__}은 메타데이터 조회를 지원하지 않습니다.")
+
+    def is_empty(self) -> bool:
+        """저장된 문서가 없으면 True를 반환합니다. 여러 스토어를 검색할 때 비어 있는 스토어를 건너뛰는 데 사용합니다."""
+        raise NotImplementedError(f"{type(self).__name__}은 문서 수 확인을 지원하지 않습니다.")
+
+    @abstractmethod
+    def delete_by_source(self, source: str) -> int:
+        """
+        metadata["source"]가 source인 청크를 모두 삭제하고 삭제한 개수를 반환합니다.
+        """
+        pass
+
+    @abstractmethod
+    def delete_stale(self, source: str, keep_ids: Iterable[str]) -> int:
+        """
+        metadata["source"]가 source인 청크 중 keep_ids에 없는 청크를 삭제하고 삭제한 개수를 반환합니다.
+        큰 소스를 여러 번에 나누어 upsert한 뒤 이전 버전의 청크를 정리할 때 사용합니다.
+        """
+        pass
+
+    def replace_sources(self, docs: Iterable[Document]):
+        """
+        문서를 upsert하고, 문서에 포함된 각 소스의 청크 중 이번에 추가하지 않은 이전 청크를 삭제합니다.
+        다시 수집한 페이지의 청크가 이전 버전의 청크를 대체하도록 할 때 사용합니다. source가 없는 문서는 upsert만 합니다.
+        """
+        docs = list(docs)
+        self.add_documents(docs)
+        current: Dict[str, set] = {}
+        for doc_id, doc in zip(chunk_ids(docs), docs):
+            if doc.metadata.get("source") is not None:
+                current.setdefault(doc.metadata["source"], set()).add(doc_id)
+        stale = sum(self.delete_stale(source, ids) for source, ids in current.items())
+        if stale:
+            print(f"다시 적재한 소스 {len(current)}개에서 이전 청크 {stale}개를 삭제했습니다.")
+
+    def for_category(self, category: str) -> "VectorStore":
+        """
+        라우터(route_question)가 정한 카테고리의 문서를 검색할 스토어를 반환합니다.
+        기본 구현은 자기 자신이며, 도메인별로 나누어 저장하는 ShardedStore가 해당 샤드를 반환합니다.
+        """
+        return self
+
+    @contextmanager
+    def bulk(self):
+        """
+        여러 번의 add_documents를 하나의 적재 작업으로 묶습니다.
+        기본 구현은 아무 것도 하지 않으며, 저장 비용이 큰 구현체(Faiss)가 재정의합니다.
+        """
+        yield self
+
+
+# langchain_chroma의 기본 컬렉션 이름 (기존에 저장된 스토어와 호환)
+DEFAULT_COLLECTION = "langchain"
+
 
 class ChromaStore(VectorStore):
-    def __init__(self, embeddings, persist_directory: str = None):
+    # Chroma는 한 번에 upsert할 수 있는 개수에 제한(약 5461개)이 있으므로 나누어 추가합니다.
+    ADD_BATCH_SIZE = 5000
+
+    def __init__(self, embeddings, persist_directory: str = None, collection_name: str = DEFAULT_COLLECTION):
         """
         Chroma 기반 벡터 스토어 구현체입니다.
 
         Args:
             embeddings: 외부에서 주입된 임베딩 인스턴스.
             persist_directory (str, optional): 벡터 스토어의 상태를 저장할 로컬 경로.
+            collection_name (str): 사용할 컬렉션 이름. 같은 persist_directory에 도메인별 컬렉션을 둘 때 사용합니다.
         """
+        # chromadb는 ChromaStore를 쓸 때만 불러옵니다 (NumpyStore만 쓰는 서빙 환경은 설치하지 않아도 됩니다).
+        import chromadb
+        from langchain_chroma import Chroma
+
         self.embeddings = embeddings
         self.persist_directory = persist_directory
+        # 클라이언트를 직접 만들어 Chroma에 넘기고, 메타데이터 갱신과 묶음 조회에 쓸 컬렉션을 한 번만 가져옵니다.
+        client = chromadb.PersistentClient(path=persist_directory) if persist_directory else chromadb.Client()
         self.vectorstore = Chroma(
-            # collection_name="example_collection",
+            client=client,
+            collection_name=collection_name,
             embedding_function=embeddings,
-            persist_directory=persist_directory,  # Where to save data locally, remove if not necessary
         )
+        self.collection = client.get_collection(collection_name)
+
+    @staticmethod
+    def collection_counts(persist_directory: str) -> Dict[str, int]:
+        """
+        persist_directory에 저장된 컬렉션별 청크 수를 반환합니다. 컬렉션을 새로 만들지 않습니다.
+        """
+        if not os.path.exists(os.path.join(persist_directory, "chroma.sqlite3")):
+            return {}
+        import chromadb
+
+        client = chromadb.PersistentClient(path=persist_directory)
+        names = [getattr(collection, "name", collection) for collection in client.list_collections()]
+        return {name: client.get_collection(name).count() for name in names}
 
     def create_store(self, docs: Iterable[Document]):
         """문서 리스트를 사용하여 Chroma 벡터 스토어를 생성합니다."""
         pass
 
     def add_documents(self, docs: Iterable[Document]):
-        """기존 벡터 스토어에 문서를 추가합니다."""
-        self.vectorstore.add_documents(documents=docs)
+        """
+        문서를 결정적 ID(chunk_ids)로 upsert합니다. 같은 문서를 여러 번 적재해도 청크가 늘어나지 않습니다.
+        이미 같은 내용으로 저장된 청크는 임베딩하지 않고 건너뛰며, 메타데이터만 바뀐 청크는 메타데이터만 갱신합니다.
+        """
+        docs = list(docs)
+        # 한 번의 upsert에 같은 ID가 두 번 들어가면 Chroma가 거부하므로 마지막 청크만 남깁니다.
+        pending = dict(zip(chunk_ids(docs), docs))
+        if not pending:
+            return
+        existing = self._stored_metadatas(list(pending))
+        new = [(doc_id, doc) for doc_id, doc in pending.items() if doc_id not in existing]
+        changed = [(doc_id, doc) for doc_id, doc in pending.items()
+                   if doc_id in existing and existing[doc_id] != doc.metadata]
+        for start in range(0, len(new), self.ADD_BATCH_SIZE):
+            batch = new[start:start + self.ADD_BATCH_SIZE]
+            self.vectorstore.add_documents(documents=[doc for _, doc in batch], ids=[doc_id for doc_id, _ in batch])
+        for start in range(0, len(changed), self.ADD_BATCH_SIZE):
+            batch = changed[start:start + self.ADD_BATCH_SIZE]
+            self.collection.update(ids=[doc_id for doc_id, _ in batch], metadatas=[doc.metadata for _, doc in batch])
+        print(f"청크 {len(pending)}개 중 새 청크 {len(new)}개를 임베딩하고, 메타데이터 {len(changed)}개를 갱신했습니다. "
+              f"({len(pending) - len(new) - len(changed)}개는 변경 없음)")
+
+    def _stored_metadatas(self, ids: List[str]) -> Dict[str, Dict[str, Any]]:
+        """이미 저장된 청크의 ID별 메타데이터를 반환합니다."""
+        stored = {}
+        for start in range(0, len(ids), self.ADD_BATCH_SIZE):
+            response = self.vectorstore.get(ids=ids[start:start + self.ADD_BATCH_SIZE], include=["metadatas"])
+            for doc_id, metadata in zip(response["ids"], response["metadatas"]):
+                stored[doc_id] = metadata or {}
+        return stored
+
+    def delete_by_source(self, source: str) -> int:
+        """metadata["source"]가 source인 청크를 모두 삭제합니다."""
+        ids = self.vectorstore.get(where={"source": source}, include=[])["ids"]
+        self._delete(ids)
+        return len(ids)
+
+    def delete_stale(self, source: str, keep_ids: Iterable[str]) -> int:
+        """source의 청크 중 keep_ids에 없는 청크를 삭제합니다."""
+        keep_ids = set(keep_ids)
+        stored = self.vectorstore.get(where={"source": source}, include=[])["ids"]
+        stale = [doc_id for doc_id in stored if doc_id not in keep_ids]
+        self._delete(stale)
+        return len(stale)
+
+    def _delete(self, ids: List[str]) -> None:
+        for start in range(0, len(ids), self.ADD_BATCH_SIZE):
+            self.vectorstore.delete(ids=ids[start:start + self.ADD_BATCH_SIZE])
+
+    def is_empty(self) -> bool:
+        return not self.vectorstore.get(limit=1, include=[])["ids"]
 
     def similarity_search(self, query: str, k: int = 4, filter: Optional[Union[Callable, Dict[str, Any]]] = None) -> List[Document]:
         """주어진 쿼리와 유사한 문서를 검색합니다."""
         return self.vectorstore.similarity_search(query, k=k, filter=filter)
 
-class Faiss(VectorStore):
+    def similarity_search_with_relevance_scores(self, query: str, k: int = 4,
+                                                filter: Optional[Dict[str, Any]] = None) -> List[Tuple[Document, float]]:
+        """주어진 쿼리와 유사한 문서와 관련도 점수를 반환합니다."""
+        return self.vectorstore.similarity_search_with_relevance_scores(query, k=k, filter=filter)
+
+    def get_by_metadata(self, filter: Dict[str, Any], limit: Optional[int] = None) -> List[Document]:
+        """
+        Chroma의 메타데이터 색인(where)으로 문서를 조회합니다. 쿼리 임베딩을 만들지 않습니다.
+        """
+        response = self.vectorstore.get(where=filter, limit=limit, include=["documents", "metadatas"])
+        return [Document(id=doc_id, page_content=text, metadata=metadata or {})
+                for doc_id, text, metadata in zip(response["ids"], response["documents"], response["metadatas"])]
+
+    def similarity_search_batch(self, queries: Sequence[str], k: int = 4,
+                                filters: Optional[Sequence[Optional[Dict[str, Any]]]] = None) -> List[List[Document]]:
+        """
+        쿼리를 한 번에 임베딩하고, 같은 필터를 쓰는 쿼리끼리 묶어 컬렉션을 한 번씩 조회합니다.
+        """
+        queries = list(queries)
+        filters = batch_filters(filters, len(queries))
+        if not queries:
+            return []
+        return self._search_by_vectors(embed_queries(self.embeddings, queries), k, filters)
+
+    async def asimilarity_search(self, query: str, k: int = 4,
+                                 filter: Optional[Dict[str, Any]] = None) -> List[Document]:
+        """
+        쿼리는 비동기 임베딩 요청으로 만들고, 로컬 Chroma 조회만 스레드에서 실행합니다.
+        """
+        vector = await self.embeddings.aembed_query(query)
+        return await asyncio.to_thread(self.vectorstore.similarity_search_by_vector, vector, k=k, filter=filter)
+
+    async def asimilarity_search_batch(self, queries: Sequence[str], k: int = 4,
+                                       filters: Optional[Sequence[Optional[Dict[str, Any]]]] = None
+                                       ) -> List[List[Document]]:
+        """similarity_search_batch의 비동기 버전입니다. 쿼리 임베딩은 비동기로 동시에 요청합니다."""
+        queries = list(queries)
+        filters = batch_filters(filters, len(queries))
+        if not queries:
+            return []
+        vectors = await aembed_queries(self.embeddings, queries)
+        return await asyncio.to_thread(self._search_by_vectors, vectors, k, filters)
+
+    def _search_by_vectors(self, vectors: Sequence[List[float]], k: int,
+                           filters: List[Optional[Dict[str, Any]]]) -> List[List[Document]]:
+        groups: Dict[str, List[int]] = {}
+        for i, filter in enumerate(filters):
+            groups.setdefault(json.dumps(filter, sort_keys=True, ensure_ascii=False, default=str), []).append(i)
+        results: List[List[Document]] = [[] for _ in vectors]
+        for positions in groups.values():
+            response = self.collection.query(
+                query_embeddings=[vectors[i] for i in positions],
+                n_results=k,
+                where=filters[positions[0]] or None,
+                include=["documents", "metadatas"],
+            )
+            for row, i in enumerate(positions):
+                results[i] = [Document(id=doc_id, page_content=text, metadata=metadata or {})
+                              for doc_id, text, metadata in zip(response["ids"][row], response["documents"][row],
+                                                                response["metadatas"][row])]
+        return results
+
+class NumpyStore(VectorStore):
+    # 벡터 배열이 가득 차면 이 비율로 늘려, 추가 시 전체 복사가 상수 회에 가깝게 일어나도록 합니다.
+    GROWTH_FACTOR = 2
+    # 필터별 문서 마스크를 보관할 최대 개수 (문서가 추가되면 비웁니다)
+    MAX_CACHED_FILTERS = 64
+
     def __init__(self, embeddings, persist_directory: str = None):
         """
-        FAISS 기반 벡터 스토어 구현체입니다.
+        NumPy 배열 기반 인메모리 벡터 스토어 구현체입니다.
+
+        정규화된 float32 벡터를 하나의 연속 배열에 보관하고, 검색은 행렬-벡터 곱 한 번과
+        argpartition으로 상위 k개를 고릅니다 (코사인 유사도). 수천~수십만 청크 규모에서는
+        별도 인덱스 없이도 Chroma의 SQLite 왕복보다 훨씬 빠릅니다.
+        filter는 다른 구현체와 같은 메타데이터 조건(dict 또는 callable)을 지원하며,
+        검색 전에 적용되므로 조건에 맞는 문서가 k개 이상이면 항상 k개를 반환합니다.
+        문서는 결정적 ID(chunk_ids)로 upsert되고, 삭제하면 배열에서 바로 빠집니다.
 
         Args:
             embeddings: 외부에서 주입된 임베딩 인스턴스.
-            persist_directory (str, optional): 벡터 스토어의 상태를 저장할 로컬 경로.
+            persist_directory (str, optional): 벡터(vectors.npy)와 문서(documents.json)를 저장할 로컬 경로.
         """
         self.embeddings = embeddings
         self.persist_directory = persist_directory
-        self.vectorstore = None
-
-        # persist_directory가 주어졌으면 저장된 인덱스가 있는지 확인 후 로드합니다.
-        if self.persist_directory:
-            try:
-                print(f"'{self.persist_directory}'에 저장된 벡터 스토어를 로드합니다. ", end="\n")
-                self.vectorstore = FAISS.load_local(self.persist_directory, self.embeddings,
-                                                    allow_dangerous_deserialization=True)
-                print("로컬에서 벡터 스토어를 불러왔습니다.")
-            except Exception as e:
-                print("저장된 벡터 스토어가 없습니다. 새로 생성합니다.")
+        self.documents: List[Document] = []
+        self._vectors: Optional[np.ndarray] = None
+        self._size = 0
+        self._lock = threading.RLock()
+        self._transaction_depth = 0
+        self._filter_masks: Dict[str, np.ndarray] = {}
+        self._metadata_index = MetadataIndex()
 
-    def create_store(self, docs: Iterable[Document]):
+        if self.persist_directory and os.path.exists(os.path.join(self.persist_directory, "vectors.npy")):
+            self._load()
+
+    @property
+    def vectors(self) -> np.ndarray:
+        """저장된 (문서 수, 차원) 정규화 벡터 배열입니다."""
+        if self._vectors is None:
+            return np.zeros((0, 0), dtype=np.float32)
+        return self._vectors[:self._size]
+
+    def _load(self) -> None:
+        print(f"'{self.persist_directory}'에 저장된 벡터 스토어를 로드합니다. ", end="\n")
+        self._vectors = np.load(os.path.join(self.persist_directory, "vectors.npy"))
+        self._size = len(self._vectors)
+        with open(os.path.join(self.persist_directory, "documents.json"), encoding="utf-8") as f:
+            self.documents = [Document(id=record["id"], page_content=record["page_content"],
+                                       metadata=record["metadata"]) for record in json.load(f)]
+        self._metadata_index = MetadataIndex()
+        self._metadata_index.add(doc.metadata for doc in self.documents)
+        print(f"로컬에서 벡터 스토어를 불러왔습니다. (문서 {self._size}개)")
+
+    def _save(self) -> None:
         """
-        주어진 문서 리스트를 사용하여 FAISS 벡터 스토어를 생성합니다.
+        임시 디렉터리에 저장한 뒤 디렉터리 이름을 바꿔 교체합니다.
+        """
+        target = os.path.abspath(self.persist_directory)
+        staging = f"{target}.tmp-{os.getpid()}"
+        backup = f"{target}.old-{os.getpid()}"
+        shutil.rmtree(staging, ignore_errors=True)
+        os.makedirs(staging)
+        np.save(os.path.join(staging, "vectors.npy"), self.vectors)
+        with open(os.path.join(staging, "documents.json"), "w", encoding="utf-8") as f:
+            json.dump([{"id": doc.id, "page_content": doc.page_content, "metadata": doc.metadata}
+                       for doc in self.documents], f, ensure_ascii=False)
+        if os.path.exists(target):
+            os.replace(target, backup)
+        os.replace(staging, target)
+        shutil.rmtree(backup, ignore_errors=True)
+        print(f"벡터 스토어를 '{self.persist_directory}'에 저장했습니다.")
 
-        Args:
-            docs (List[Document]): 문서 객체 리스트.
+    @contextmanager
+    def bulk(self):
+        """
+        with 블록 안의 add_documents를 모아 블록이 끝날 때 한 번만 저장합니다.
+        """
+        with self._lock:
+            self._transaction_depth += 1
+        try:
+            yield self
+        finally:
+            with self._lock:
+                self._transaction_depth -= 1
+                if self._transaction_depth == 0 and self.persist_directory:
+                    self._save()
+
+    def create_store(self, docs: Iterable[Document]):
+        """
+        주어진 문서 리스트로 벡터 스토어를 새로 생성합니다. 기존 문서는 모두 지웁니다.
         """
-        self.vectorstore = FAISS.from_documents(docs, self.embeddings)
-        if self.persist_directory:
-            self.vectorstore.save_local(self.persist_directory)
-            print(f"벡터 스토어를 '{self.persist_directory}'에 저장했습니다.")
+        with self._lock:
+            self.documents = []
+            self._vectors = None
+            self._size = 0
+            self._metadata_index = MetadataIndex()
+            self.add_documents(docs)
+
+    def _append(self, vectors: np.ndarray) -> None:
+        needed = self._size + len(vectors)
+        if self._vectors is None:
+            self._vectors = np.empty((needed, vectors.shape[1]), dtype=np.float32)
+        elif needed > len(self._vectors):
+            grown = np.empty((max(needed, len(self._vectors) * self.GROWTH_FACTOR), vectors.shape[1]),
+                             dtype=np.float32)
+            grown[:self._size] = self._vectors[:self._size]
+            self._vectors = grown
+        self._vectors[self._size:needed] = vectors
+        self._size = needed
 
     def add_documents(self, docs: Iterable[Document]):
         """
-        벡터 스토어에 문서를 추가합니다. 아직 생성되지 않았다면, 먼저 벡터 스토어를 생성합니다.
+        문서를 결정적 ID(chunk_ids)로 upsert합니다.
+        새 문서는 임베딩하여 정규화한 뒤 벡터 배열 끝에 추가하고, 메타데이터만 바뀐 문서는 메타데이터만 갱신하며,
+        내용이 바뀐 문서는 이전 행을 지우고 다시 추가합니다. 변경이 없는 문서는 건너뜁니다.
+        """
+        docs = list(docs)
+        if not docs:
+            return
+        pending = {doc_id: Document(id=doc_id, page_content=doc.page_content, metadata=dict(doc.metadata))
+                   for doc_id, doc in zip(chunk_ids(docs), docs)}
+        with self._lock:
+            positions = self._positions_by_id()
+            new, replaced, updated = [], [], 0
+            for doc_id, doc in pending.items():
+                position = positions.get(doc_id)
+                if position is None:
+                    new.append(doc)
+                elif self.documents[position].page_content != doc.page_content:
+                    replaced.append(position)
+                    new.append(doc)
+                elif self.documents[position].metadata != doc.metadata:
+                    self.documents[position] = doc
+                    updated += 1
+        vectors = None
+        if new:
+            vectors = np.array(self.embeddings.embed_documents([doc.page_content for doc in new]), dtype=np.float32)
+            norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+            norms[norms == 0] = 1.0
+            vectors = vectors / norms
+        if not (new or updated):
+            return
+        with self._lock:
+            if replaced:
+                self._remove(replaced)
+            if vectors is not None:
+                self._append(vectors)
+                self.documents.extend(new)
+            self._reindex()
+            self._saved_if_idle()
 
-        Args:
-            docs (List[Document]): 문서 객체 리스트.
-        """
-        if self.vectorstore is None:
-            self.create_store(docs)
-        else:
-            self.vectorstore.add_documents(docs)
-            if self.persist_directory:
-                self.vectorstore.save_local(self.persist_directory)
-                print(f"업데이트된 벡터 스토어를 '{self.persist_directory}'에 저장했습니다.")
-
-    def similarity_search(self,
-                          query: str,
-                          k: int = 4,
-                          filter: Optional[Union[Callable, Dict[str, Any]]] = None,
-                          **kwargs
-                          ) -> List[Document]:
-        """
-        주어진 쿼리와 유사한 문서를 검색합니다.
-        Args:
-            query (str): 검색할 쿼리.
-            k (int): 검색할 문서의 개수.
-            filter (Optional[Union[Callable, Dict[str, Any]]]): 필터링 조건.
-            **kwargs: 추가 인자.
+    def _positions_by_id(self) -> Dict[str, int]:
+        return {doc.id: position for position, doc in enumerate(self.documents) if doc.id}
+
+    def _reindex(self) -> None:
+        """문서 목록이 바뀐 뒤 메타데이터 역색인을 다시 만들고 필터 마스크 캐시를 비웁니다."""
+        self._metadata_index = MetadataIndex()
+        self._metadata_index.add(doc.metadata for doc in self.documents)
+        self._filter_masks.clear()
+
+    def _saved_if_idle(self) -> None:
+        if self._transaction_depth == 0 and self.persist_directory:
+            self._save()
+
+    def _remove(self, positions: Iterable[int]) -> int:
+        """벡터 배열과 문서 목록에서 주어진 위치를 지웁니다. 호출자가 _reindex()해야 합니다."""
+        keep = np.ones(self._size, dtype=bool)
+        keep[list(positions)] = False
+        removed = int(self._size - keep.sum())
+        if removed:
+            self._vectors = np.ascontiguousarray(self.vectors[keep])
+            self._size = len(self._vectors)
+            self.documents = [doc for doc, kept in zip(self.documents, keep) if kept]
+        return removed
+
+    def delete_by_source(self, source: str) -> int:
+        """metadata["source"]가 source인 문서를 모두 삭제합니다."""
+        with self._lock:
+            removed = self._remove(self._metadata_index.lookup({"source": source}))
+            if removed:
+                self._reindex()
+                self._saved_if_idle()
+        return removed
+
+    def delete_stale(self, source: str, keep_ids: Iterable[str]) -> int:
+        """source의 문서 중 keep_ids에 없는 문서를 삭제합니다."""
+        keep_ids = set(keep_ids)
+        with self._lock:
+            removed = self._remove(position for position in self._metadata_index.lookup({"source": source})
+                                   if self.documents[position].id not in keep_ids)
+            if removed:
+                self._reindex()
+                self._saved_if_idle()
+        return removed
+
+    def is_empty(self) -> bool:
+        return self._size == 0
+
+    def _filter_mask(self, filter: Union[Callable, Dict[str, Any]]) -> np.ndarray:
+        """
+        필터 조건에 맞는 문서의 불리언 마스크를 반환합니다. dict 필터는 결과를 캐시합니다.
+        """
+        key = json.dumps(filter, sort_keys=True, ensure_ascii=False, default=str) if isinstance(filter, dict) else None
+        mask = self._filter_masks.get(key) if key is not None else None
+        if mask is None:
+            # LangChain FAISS와 같은 필터 문법($eq, $in, $and, callable 등)을 사용합니다.
+            filter_func = FAISS._create_filter_func(filter)
+            mask = np.fromiter((filter_func(doc.metadata) for doc in self.documents), dtype=bool,
+                               count=len(self.documents))
+            if key is not None:
+                if len(self._filter_masks) >= self.MAX_CACHED_FILTERS:
+                    self._filter_masks.clear()
+                self._filter_masks[key] = mask
+        return mask
+
+    def _search_vectors(self, query_vectors: np.ndarray, k: int, filters: List
+                        ) -> List[List[Tuple[Document, float]]]:
+        """
+        (쿼리 수, 차원) 벡터 배열을 행렬 곱 한 번으로 점수화하고, 쿼리별 상위 k개를 반환합니다.
         """
-        if self.vectorstore is None:
+        norms = np.linalg.norm(query_vectors, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        query_vectors = query_vectors / norms
+        with self._lock:
+            vectors = self.vectors
+            documents = self.documents
+            candidates = [np.flatnonzero(self._filter_mask(filter)) if filter is not None else None
+                          for filter in filters]
+
+        all_scores = query_vectors @ vectors.T
+        results = []
+        for scores, rows in zip(all_scores, candidates):
+            if rows is not None:
+                scores = scores[rows]
+            count = min(k, len(scores))
+            if count <= 0:
+                results.append([])
+                continue
+            top = np.argpartition(-scores, count - 1)[:count] if count < len(scores) else np.arange(len(scores))
+            top = top[np.argsort(-scores[top], kind="stable")]
+            positions = rows[top] if rows is not None else top
+            results.append([(documents[position], float(scores[i])) for position, i in zip(positions, top)])
+        return results
+
+    def get_by_metadata(self, filter: Union[Callable, Dict[str, Any]], limit: Optional[int] = None) -> List[Document]:
+        """
+        메타데이터 조건에 맞는 문서를 추가된 순서대로 반환합니다. 임베딩과 벡터 연산을 하지 않습니다.
+        """
+        with self._lock:
+            positions = self._metadata_index.lookup(filter)
+            if positions is None:
+                positions = np.flatnonzero(self._filter_mask(filter))
+            return [self.documents[position] for position in positions[:limit]]
+
+    def similarity_search_with_score(self, query: str, k: int = 4,
+                                     filter: Optional[Union[Callable, Dict[str, Any]]] = None
+                                     ) -> List[Tuple[Document, float]]:
+        """
+        주어진 쿼리와 유사한 문서와 코사인 유사도(클수록 유사)를 반환합니다.
+        """
+        query_vector = np.array([self.embeddings.embed_query(query)], dtype=np.float32)
+        return self._search_vectors(query_vector, k, [filter])[0]
+
+    def similarity_search_batch(self, queries: Sequence[str], k: int = 4,
+                                filters: Optional[Sequence[Optional[Union[Callable, Dict[str, Any]]]]] = None
+                                ) -> List[List[Document]]:
+        """
+        여러 쿼리를 임베딩 요청 한 번과 행렬 곱 한 번으로 검색합니다.
+        """
+        queries = list(queries)
+        filters = batch_filters(filters, len(queries))
+        if not queries:
+            return []
+        if self._size == 0:
             raise ValueError("벡터 스토어가 초기화되지 않았습니다. 먼저 문서를 추가해주세요.")
-        return self.vectorstore.similarity_search(query, k=k, filter=filter, **kwargs)
+        query_vectors = np.array(embed_queries(self.embeddings, queries), dtype=np.float32)
+        return [[doc for doc, _ in results] for results in self._search_vectors(query_vectors, k, filters)]
 
+    def similarity_search_with_relevance_scores(self, query: str, k: int = 4,
+                                                filter: Optional[Union[Callable, Dict[str, Any]]] = None
+                                                ) -> List[Tuple[Document, float]]:
+        """코사인 유사도를 그대로 관련도 점수로 사용합니다 (LangChain의 cosine relevance와 같습니다)."""
+        return self.similarity_search_with_score(query, k=k, filter=filter)
+
+    def similarity_search(self, query: str, k: int = 4,
+                          filter: Optional[Union[Callable, Dict[str, Any]]] = None) -> List[Document]:
+        """주어진 쿼리와 유사한 문서를 검색합니다."""
+        if self._size == 0:
+            raise ValueError("벡터 스토어가 초기화되지 않았습니다. 먼저 문서를 추가해주세요.")
+        return [doc for doc, _ in self.similarity_search_with_score(query, k=k, filter=filter)]
 
 
 def search(category: str, vector_store, query: str):
     """
     전달받은 vector_store 인스턴스를 사용하여 주어진 질의(query)로 유사 청크를 검색합니다.
+    도메인별로 샤딩된 스토어면 카테고리에 해당하는 샤드만 검색합니다.
     """
+    vector_store = vector_store.for_category(category)
     if category == "vacation":
         return vector_store.similarity_search(query)
     elif category == "timetable":
@@ -144,3 +644,10 @@ today: {formatted_date}
         # etc인 경우 기본 검색
         return vector_store.similarity_search(query)
 
+
+def __getattr__(name: str):
+    # Faiss 구현(faiss_store)은 faiss 패키지가 필요하므로 처음 참조할 때 불러옵니다.
+    if name == "Faiss":
+        from src.modules.vector_store.faiss_store import Faiss
+        return Faiss
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
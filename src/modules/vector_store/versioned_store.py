@@ -0,0 +1,294 @@
+import datetime
+import json
+import os
+import shutil
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple, Union
+
+from langchain.docstore.document import Document
+
+from src.modules.vector_store.vector_store import VectorStore
+
+# 버전별 인덱스 디렉터리 구조
+#   CURRENT        : 서비스 중인 버전 이름 한 줄 (임시 파일에 쓴 뒤 os.replace로 교체)
+#   versions.json  : 게시 이력 [{"name", "published_at"}]. 이전 버전이 언제 서비스에서 빠졌는지 계산합니다.
+#   versions/NAME  : 버전 하나의 스토어 디렉터리 (ChromaStore/Faiss의 persist_directory)
+CURRENT_FILE = "CURRENT"
+HISTORY_FILE = "versions.json"
+VERSIONS_DIR = "versions"
+# 서비스에서 빠진 버전을 지우기 전에 기다리는 시간(초). 이전 버전으로 진행 중인 요청이 끝날 시간을 줍니다.
+DEFAULT_GRACE_PERIOD = 300
+# 게시되지 않은 버전 디렉터리(다른 프로세스가 적재 중이거나 중단된 적재)를 지우기 전에 기다리는 시간(초).
+ABANDONED_BUILD_TIMEOUT = 24 * 3600
+
+
+def _write_atomic(path: str, text: str) -> None:
+    staging = f"{path}.tmp-{os.getpid()}-{threading.get_ident()}"
+    with open(staging, "w", encoding="utf-8") as f:
+        f.write(text)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(staging, path)
+
+
+class IndexVersions:
+    """
+    root 아래의 버전별 인덱스 디렉터리와 "현재 버전" 포인터(CURRENT)를 관리합니다.
+
+    새 인덱스는 prepare()로 만든 새 버전 디렉터리에 기록하고, 다 쓴 뒤 publish()로 CURRENT를 원자적으로 바꿉니다.
+    읽는 쪽은 CURRENT가 가리키는 완성된 버전만 열기 때문에, 재적재 중에도 반쯤 기록된 스토어를 보지 않습니다.
+    CURRENT가 없으면 root 자체를 (버전 도입 이전의) 스토어 디렉터리로 취급합니다.
+    """
+
+    def __init__(self, root: str, grace_period: float = DEFAULT_GRACE_PERIOD, keep_previous: int = 1):
+        """
+        Args:
+            root (str): 버전 디렉터리들을 둘 경로.
+            grace_period (float): 서비스에서 빠진 버전을 삭제하기까지 기다리는 시간(초).
+            keep_previous (int): 유예 시간과 관계없이 남겨 둘 직전 버전 수 (롤백용).
+        """
+        self.root = root
+        self.grace_period = grace_period
+        self.keep_previous = keep_previous
+        self._lock = threading.Lock()
+
+    @property
+    def current_file(self) -> str:
+        return os.path.join(self.root, CURRENT_FILE)
+
+    @property
+    def history_file(self) -> str:
+        return os.path.join(self.root, HISTORY_FILE)
+
+    def version_path(self, name: str) -> str:
+        return os.path.join(self.root, VERSIONS_DIR, name)
+
+    def current(self) -> Optional[str]:
+        """서비스 중인 버전 이름을 반환합니다. 아직 게시된 버전이 없으면 None입니다."""
+        try:
+            with open(self.current_file, encoding="utf-8") as f:
+                return f.read().strip() or None
+        except FileNotFoundError:
+            return None
+
+    def current_path(self) -> str:
+        """서비스 중인 버전의 스토어 디렉터리입니다."""
+        name = self.current()
+        return self.version_path(name) if name is not None else self.root
+
+    def _history(self) -> List[Dict[str, Any]]:
+        try:
+            with open(self.history_file, encoding="utf-8") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return []
+
+    def prepare(self, seed: bool = True) -> str:
+        """
+        새 버전 디렉터리를 만들고 이름을 반환합니다.
+        seed이면 현재 버전의 내용을 복사해 두어, 바뀐 청크만 다시 임베딩하는 증분 적재를 할 수 있습니다.
+        """
+        name = f"v-{datetime.datetime.now().strftime('%Y%m%d-%H%M%S-%f')}-{os.getpid()}"
+        path = self.version_path(name)
+        current = self.current_path()
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        if seed and os.path.isdir(current) and current != self.root:
+            shutil.copytree(current, path)
+        elif seed and os.path.isdir(current):
+            # 버전 도입 이전의 스토어: root의 파일 중 버전 관리용 항목을 제외하고 복사합니다.
+            shutil.copytree(current, path, ignore=lambda directory, names: (
+                [n for n in names if n in (CURRENT_FILE, HISTORY_FILE, VERSIONS_DIR)] if directory == current else []))
+        else:
+            os.makedirs(path)
+        return name
+
+    def publish(self, name: str) -> None:
+        """
+        CURRENT를 name으로 원자적으로 바꿉니다. 이후 refresh()하는 스토어는 이 버전을 엽니다.
+        """
+        if not os.path.isdir(self.version_path(name)):
+            raise ValueError(f"존재하지 않는 버전입니다: {name}")
+        with self._lock:
+            history = self._history()
+            history.append({"name": name, "published_at": time.time()})
+            _write_atomic(self.history_file, json.dumps(history, ensure_ascii=False, indent=2))
+            _write_atomic(self.current_file, name)
+        print(f"인덱스 버전 '{name}'을 게시했습니다.")
+
+    def collect_garbage(self, now: Optional[float] = None) -> List[str]:
+        """
+        서비스에서 빠진 지 grace_period가 지난 버전을 삭제하고, 삭제한 이름을 반환합니다.
+        게시되지 않은 디렉터리(중단된 적재)는 마지막 수정 후 ABANDONED_BUILD_TIMEOUT이 지나면 삭제합니다.
+        """
+        now = time.time() if now is None else now
+        versions_dir = os.path.join(self.root, VERSIONS_DIR)
+        if not os.path.isdir(versions_dir):
+            return []
+        with self._lock:
+            current = self.current()
+            history = self._history()
+            retired_at: Dict[str, float] = {}
+            for entry, successor in zip(history, history[1:]):
+                retired_at[entry["name"]] = successor["published_at"]
+            protected = {current}
+            published = [entry["name"] for entry in history if entry["name"] != current]
+            protected.update(published[-self.keep_previous:] if self.keep_previous else [])
+
+            removed = []
+            for name in os.listdir(versions_dir):
+                path = os.path.join(versions_dir, name)
+                if name in protected or not os.path.isdir(path):
+                    continue
+                if name in retired_at:
+                    expired = now - retired_at[name] >= self.grace_period
+                else:
+                    expired = now - os.path.getmtime(path) >= max(self.grace_period, ABANDONED_BUILD_TIMEOUT)
+                if expired:
+                    shutil.rmtree(path, ignore_errors=True)
+                    removed.append(name)
+            if removed:
+                history = [entry for entry in history if entry["name"] not in removed]
+                _write_atomic(self.history_file, json.dumps(history, ensure_ascii=False, indent=2))
+        if removed:
+            print(f"이전 인덱스 버전 {len(removed)}개를 삭제했습니다: {', '.join(sorted(removed))}")
+        return removed
+
+    def build(self, build_fn: Callable[[str], Optional[bool]], seed: bool = True) -> Optional[str]:
+        """
+        새 버전을 만들어 build_fn(경로)로 기록한 뒤 게시하고, 오래된 버전을 정리합니다.
+        build_fn이 실패하거나 False를 반환하면(바뀐 내용 없음) 게시하지 않고 새 디렉터리를 지운 뒤 None을 반환합니다.
+        """
+        name = self.prepare(seed=seed)
+        try:
+            result = build_fn(self.version_path(name))
+        except BaseException:
+            shutil.rmtree(self.version_path(name), ignore_errors=True)
+            raise
+        if result is False:
+            shutil.rmtree(self.version_path(name), ignore_errors=True)
+            print("바뀐 내용이 없어 새 인덱스 버전을 게시하지 않았습니다.")
+            return None
+        self.publish(name)
+        self.collect_garbage()
+        return name
+
+
+class VersionedStore(VectorStore):
+    def __init__(self, versions: IndexVersions, store_factory: Callable[[str], VectorStore]):
+        """
+        IndexVersions의 현재 버전을 여는 서비스용 벡터 스토어입니다.
+
+        refresh()를 요청 사이에 호출하면 CURRENT가 바뀌었을 때 새 버전을 열어 참조를 한 번에 교체합니다.
+        진행 중인 요청은 이전 버전의 스토어 객체를 계속 사용하며, 이전 버전의 디렉터리는 유예 시간이 지난 뒤 삭제됩니다.
+
+        Example:
+            versions = IndexVersions("src/chroma")
+            store = VersionedStore(versions, lambda path: ChromaStore(embeddings, persist_directory=path))
+            store.rebuild_in_background(lambda path: ingest(path))
+            store.refresh()  # 요청마다
+
+        Args:
+            versions (IndexVersions): 버전 디렉터리 관리자.
+            store_factory (Callable[[str], VectorStore]): 버전 디렉터리 경로를 받아 스토어를 여는 함수.
+        """
+        self.versions = versions
+        self.store_factory = store_factory
+        self._lock = threading.Lock()
+        self._version = versions.current()
+        self._store = store_factory(versions.current_path())
+
+    @property
+    def version(self) -> Optional[str]:
+        """현재 열려 있는 버전 이름입니다."""
+        return self._version
+
+    @property
+    def store(self) -> VectorStore:
+        """현재 열려 있는 버전의 스토어입니다."""
+        return self._store
+
+    def refresh(self) -> bool:
+        """
+        CURRENT가 가리키는 버전이 열려 있는 버전과 다르면 새 버전을 열어 교체합니다. 교체했으면 True를 반환합니다.
+        """
+        name = self.versions.current()
+        if name == self._version:
+            return False
+        with self._lock:
+            if name == self._version:
+                return False
+            store = self.store_factory(self.versions.current_path())
+            self._store, self._version = store, name
+        print(f"인덱스 버전 '{name}'으로 교체했습니다.")
+        return True
+
+    def rebuild_in_background(self, build_fn: Callable[[str], Optional[bool]], seed: bool = True) -> threading.Thread:
+        """
+        새 버전을 백그라운드 스레드에서 만들고 게시한 뒤 이 스토어를 교체합니다.
+        다른 프로세스의 VersionedStore는 다음 refresh()에서 새 버전을 엽니다.
+        """
+        def run():
+            self.versions.build(build_fn, seed=seed)
+            self.refresh()
+
+        thread = threading.Thread(target=run, daemon=True)
+        thread.start()
+        return thread
+
+    def create_store(self, docs: Iterable[Document]):
+        """현재 버전의 스토어를 새로 생성합니다. 서비스 중에는 rebuild_in_background를 사용하세요."""
+        self._store.create_store(docs)
+
+    def add_documents(self, docs: Iterable[Document]):
+        """현재 버전의 스토어에 문서를 추가합니다."""
+        self._store.add_documents(docs)
+
+    def is_empty(self) -> bool:
+        return self._store.is_empty()
+
+    def delete_by_source(self, source: str) -> int:
+        return self._store.delete_by_source(source)
+
+    def delete_stale(self, source: str, keep_ids: Iterable[str]) -> int:
+        return self._store.delete_stale(source, keep_ids)
+
+    def replace_sources(self, docs: Iterable[Document]):
+        self._store.replace_sources(docs)
+
+    def similarity_search(self, query: str, k: int = 4,
+                          filter: Optional[Union[Callable, Dict[str, Any]]] = None) -> List[Document]:
+        """현재 버전에서 주어진 쿼리와 유사한 문서를 검색합니다."""
+        return self._store.similarity_search(query, k=k, filter=filter)
+
+    def similarity_search_batch(self, queries: Sequence[str], k: int = 4,
+                                filters: Optional[Sequence[Optional[Union[Callable, Dict[str, Any]]]]] = None
+                                ) -> List[List[Document]]:
+        return self._store.similarity_search_batch(queries, k=k, filters=filters)
+
+    async def asimilarity_search(self, query: str, k: int = 4,
+                                 filter: Optional[Union[Callable, Dict[str, Any]]] = None) -> List[Document]:
+        return await self._store.asimilarity_search(query, k=k, filter=filter)
+
+    async def asimilarity_search_batch(self, queries: Sequence[str], k: int = 4,
+                                       filters: Optional[Sequence[Optional[Union[Callable, Dict[str, Any]]]]] = None
+                                       ) -> List[List[Document]]:
+        return await self._store.asimilarity_search_batch(queries, k=k, filters=filters)
+
+    def similarity_search_with_relevance_scores(self, query: str, k: int = 4,
+                                                filter: Optional[Union[Callable, Dict[str, Any]]] = None
+                                                ) -> List[Tuple[Document, float]]:
+        return self._store.similarity_search_with_relevance_scores(query, k=k, filter=filter)
+
+    def get_by_metadata(self, filter: Union[Callable, Dict[str, Any]], limit: Optional[int] = None) -> List[Document]:
+        return self._store.get_by_metadata(filter, limit=limit)
+
+    def for_category(self, category: str) -> VectorStore:
+        """현재 버전 스토어의 카테고리 샤드를 반환합니다. 한 요청 안에서는 같은 버전을 계속 사용합니다."""
+        return self._store.for_category(category)
+
+    @contextmanager
+    def bulk(self):
+        with self._store.bulk():
+            yield self
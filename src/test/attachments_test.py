@@ -0,0 +1,216 @@
+import json
+import os
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import quote, unquote
+
+import pytest
+
+from src.modules.loader.attachments import (ATTACHMENT_MANIFEST_FILE, BROWSER_DOWNLOAD_DIR, AttachmentDownloader,
+                                            attachment_key, wait_for_download)
+from src.modules.loader.notion_loader import NotionLoader
+
+
+class FileServer:
+    """서명 쿼리가 붙은 노션 파일 URL을 흉내 내는 로컬 서버입니다. 쿼리와 관계없이 경로의 파일을 돌려줍니다."""
+
+    def __init__(self):
+        self.files = {"/files/f1/휴가신청서.docx": b"PK vacation v1", "/files/f2/출장신청서.docx": b"PK trip"}
+        self.requests = []
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, format, *args):
+                pass
+
+            def do_GET(self):
+                path = unquote(self.path.split("?")[0])
+                server.requests.append(path)
+                body = server.files.get(path)
+                self.send_response(200 if body is not None else 404)
+                self.send_header("Content-Length", str(len(body or b"")))
+                self.end_headers()
+                self.wfile.write(body or b"")
+
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.httpd.server_port}"
+        threading.Thread(target=self.httpd.serve_forever, daemon=True).start()
+
+    def signed(self, path: str, signature: str) -> str:
+        return f"{self.url}{quote(path)}?signature={signature}&expirationTimestamp=1700000000"
+
+    def close(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+@pytest.fixture
+def server():
+    server = FileServer()
+    yield server
+    server.close()
+
+
+def docx_files(directory):
+    return sorted(name for name in os.listdir(directory) if name.endswith(".docx"))
+
+
+def test_signed_urls_of_the_same_file_are_downloaded_once(server, tmp_path):
+    path = "/files/f1/휴가신청서.docx"
+    first = AttachmentDownloader(str(tmp_path)).download_all([server.signed(path, "a")], ["휴가신청서.docx"])
+    second = AttachmentDownloader(str(tmp_path)).download_all([server.signed(path, "b")], ["휴가신청서.docx"])
+
+    assert first == second
+    assert server.requests == [path]
+    assert docx_files(tmp_path) == ["휴가신청서.docx"]
+
+
+def test_damaged_file_is_downloaded_again_into_the_same_path(server, tmp_path):
+    path = "/files/f1/휴가신청서.docx"
+    local = AttachmentDownloader(str(tmp_path)).download_all([server.signed(path, "a")], ["휴가신청서.docx"])[0]
+    with open(local, "wb") as f:
+        f.write(b"PK")
+
+    downloaded = AttachmentDownloader(str(tmp_path)).download_all([server.signed(path, "b")], ["휴가신청서.docx"])
+
+    assert downloaded == [local]
+    assert docx_files(tmp_path) == ["휴가신청서.docx"]
+    assert open(local, "rb").read() == b"PK vacation v1"
+
+
+def test_manifest_keyed_by_signed_url_is_migrated(server, tmp_path):
+    path = "/files/f1/휴가신청서.docx"
+    local = tmp_path / "휴가신청서.docx"
+    local.write_bytes(server.files[path])
+    legacy = {server.signed(path, "old"): {"path": str(local), "size": local.stat().st_size, "sha256": ""}}
+    (tmp_path / ATTACHMENT_MANIFEST_FILE).write_text(json.dumps(legacy), encoding="utf-8")
+
+    downloader = AttachmentDownloader(str(tmp_path))
+    assert downloader.download_all([server.signed(path, "new")], ["휴가신청서.docx"]) == [str(local)]
+    assert server.requests == []
+    # 블록 ID로 키를 바꾸어도 같은 파일을 씁니다.
+    assert downloader.download(server.signed(path, "newer"), "휴가신청서.docx", key="block-1") == str(local)
+    assert list(downloader.manifest.entries) == ["block-1"]
+
+
+def test_different_files_with_the_same_name_get_distinct_paths(server, tmp_path):
+    server.files["/files/f3/휴가신청서.docx"] = b"PK other form"
+    urls = [server.signed("/files/f1/휴가신청서.docx", "a"), server.signed("/files/f3/휴가신청서.docx", "a")]
+
+    AttachmentDownloader(str(tmp_path)).download_all(urls, ["휴가신청서.docx"] * 2)
+
+    assert docx_files(tmp_path) == ["휴가신청서 (1).docx", "휴가신청서.docx"]
+    assert attachment_key(urls[0]) == server.url + quote("/files/f1/휴가신청서.docx")
+
+
+def test_wait_for_download_ignores_known_partial_and_queued_files(tmp_path):
+    (tmp_path / "old.docx").write_bytes(b"old")
+    (tmp_path / "출장신청서 (1).docx").write_bytes(b"duplicate")
+    assert wait_for_download(str(tmp_path), ["old.docx"], timeout=0, ignore=["출장신청서.docx"]) is None
+
+    (tmp_path / "new.docx.crdownload").write_bytes(b"partial")
+    (tmp_path / "new.docx").write_bytes(b"new")
+    assert wait_for_download(str(tmp_path), ["old.docx"], timeout=0) is None
+
+    os.remove(tmp_path / "new.docx.crdownload")
+    assert wait_for_download(str(tmp_path), ["old.docx"], timeout=0) == str(tmp_path / "new.docx")
+
+
+class FakeElement:
+    def __init__(self, text="", href=None):
+        self.text = text
+        self.href = href
+
+    def get_attribute(self, name):
+        return self.href
+
+
+class FakeBlock:
+    """
+    노션 파일 블록. kind가 "link"이면 링크가, "tab"이면 클릭할 때 새 탭이 열리며 브라우저도 함께 내려받고,
+    "direct"이면 새 탭 없이 브라우저가 바로 내려받습니다.
+    """
+
+    def __init__(self, driver, block_id, name, kind, url=None, body=b""):
+        self.driver, self.block_id, self.name, self.kind, self.url, self.body = driver, block_id, name, kind, url, body
+
+    def get_attribute(self, name):
+        return self.block_id if name == "data-block-id" else None
+
+    def find_element(self, by, value):
+        return FakeElement(self.name)
+
+    def find_elements(self, by, value):
+        return [FakeElement(href=self.url)] if self.kind == "link" else []
+
+    def click(self):
+        self.driver.clicked.append(self.block_id)
+        download_dir = self.driver.download_path
+        if self.kind == "tab":
+            self.driver.window_handles.append(self.url)
+        with open(os.path.join(download_dir, self.name.replace("+", " ")), "wb") as f:
+            f.write(self.body)
+
+
+class FakeSwitchTo:
+    def __init__(self, driver):
+        self.driver = driver
+
+    def window(self, handle):
+        self.driver.current_window_handle = handle
+
+
+class FakeDriver:
+    def __init__(self):
+        self.blocks = []
+        self.clicked = []
+        self.download_path = None
+        self.window_handles = ["main"]
+        self.current_window_handle = "main"
+        self.switch_to = FakeSwitchTo(self)
+
+    @property
+    def current_url(self):
+        return self.current_window_handle
+
+    def close(self):
+        self.window_handles.remove(self.current_window_handle)
+
+    def find_elements(self, by, value):
+        return self.blocks
+
+    def get_cookies(self):
+        return []
+
+    def execute_cdp_cmd(self, command, params):
+        assert command == "Browser.setDownloadBehavior"
+        self.download_path = params["downloadPath"]
+
+
+def test_browser_blocks_are_downloaded_once_and_cached_blocks_are_not_clicked(server, tmp_path, monkeypatch):
+    monkeypatch.setattr(NotionLoader, "NEW_TAB_TIMEOUT", 0.1)
+    monkeypatch.setattr(NotionLoader, "DOWNLOAD_TIMEOUT", 1)
+    driver = FakeDriver()
+    driver.blocks = [
+        FakeBlock(driver, "b1", "휴가신청서.docx", "link", server.signed("/files/f1/휴가신청서.docx", "a")),
+        FakeBlock(driver, "b2", "출장+신청서.docx", "tab", server.signed("/files/f2/출장신청서.docx", "a"), b"PK trip"),
+        FakeBlock(driver, "b3", "보안+서약서.docx", "direct", body=b"PK pledge"),
+    ]
+    loader = NotionLoader(driver=driver)
+
+    first = loader.download_docx_files(str(tmp_path))
+
+    assert driver.download_path == str(tmp_path / BROWSER_DOWNLOAD_DIR)
+    assert driver.clicked == ["b2", "b3"]
+    assert sorted(os.path.basename(path) for path in first) == ["보안+서약서.docx", "출장+신청서.docx", "휴가신청서.docx"]
+    assert open(tmp_path / "보안+서약서.docx", "rb").read() == b"PK pledge"
+    # 새 탭 블록을 브라우저가 함께 내려받은 파일은 남기지 않습니다.
+    assert docx_files(tmp_path) == ["보안+서약서.docx", "출장+신청서.docx", "휴가신청서.docx"]
+    assert not os.path.exists(tmp_path / BROWSER_DOWNLOAD_DIR)
+
+    driver.clicked.clear()
+    server.requests.clear()
+    second = loader.download_docx_files(str(tmp_path))
+
+    assert sorted(second) == sorted(first)
+    assert driver.clicked == [] and server.requests == []
@@ -0,0 +1,74 @@
+import json
+
+from langchain_core.documents import Document
+
+from src.modules.init import load_schedule_csv_2
+from src.modules.loader.dedup import NearDuplicateFilter
+from src.modules.loader.notion_loader import CSVLoader
+
+PARAGRAPH = ("연차 휴가는 입사일 기준으로 매년 15일이 부여되며, 사용하려면 3일 전까지 그룹웨어에서 "
+             "휴가 신청서를 작성하고 팀장 승인을 받아야 합니다. 반차는 오전과 오후로 나누어 사용할 수 있습니다.")
+
+
+def test_exact_and_near_duplicates_are_merged_into_first_chunk():
+    dedup = NearDuplicateFilter()
+    docs = [
+        Document(page_content=PARAGRAPH, metadata={"source": "a.md", "attached_file": '["a.docx"]'}),
+        Document(page_content="  " + PARAGRAPH.upper() + "\n", metadata={"source": "b.md"}),
+        Document(page_content=PARAGRAPH.replace("15일", "16일"),
+                 metadata={"source": "c.md", "attached_file": '["c.docx"]'}),
+        Document(page_content="출장 신청은 출장 전날까지 전자결재로 올립니다.", metadata={"source": "d.md"}),
+    ]
+
+    kept = dedup.filter(docs)
+
+    assert [doc.metadata["source"] for doc in kept] == ["a.md", "d.md"]
+    assert dedup.stats == {"kept": 2, "exact": 1, "near": 1}
+    assert json.loads(kept[0].metadata["attached_file"]) == ["a.docx", "c.docx"]
+    assert kept[0].metadata["duplicate_count"] == 2
+
+
+def test_protected_fields_keep_chunks_apart():
+    dedup = NearDuplicateFilter()
+    docs = [Document(page_content=PARAGRAPH, metadata={"domain": domain}) for domain in ("hr", "law")]
+
+    assert len(dedup.filter(docs)) == 2
+
+
+def test_merge_into_earlier_call_is_reported_by_take_updated():
+    dedup = NearDuplicateFilter()
+    first = dedup.filter([Document(page_content=PARAGRAPH, metadata={"attached_file": '["a.docx"]'})])
+    second = dedup.filter([Document(page_content=PARAGRAPH, metadata={"attached_file": '["b.docx"]'})])
+
+    updated = dedup.take_updated()
+
+    assert second == []
+    assert updated == first
+    assert json.loads(updated[0].metadata["attached_file"]) == ["a.docx", "b.docx"]
+    assert dedup.take_updated() == []
+
+
+def test_lecture_rows_that_differ_only_by_date_are_kept(tmp_path):
+    path = tmp_path / "online_lecture.csv"
+    timetable = "정보보호 온라인 강의 1차시 - 개인정보 처리 방침과 보안 서약서 작성 안내 (필수 수강, 60분)"
+    path.write_text("date,timetable\n"
+                    f"2024.11.14,{timetable}\n"
+                    f"2024.11.15,{timetable}\n"
+                    f"2024.11.15,{timetable}\n", encoding="utf-8")
+
+    kept = NearDuplicateFilter().filter(CSVLoader().load(str(path)))
+
+    # 날짜만 다른 행은 모두 남기고, 완전히 같은 행만 제거합니다.
+    assert [doc.page_content.splitlines()[0] for doc in kept] == ["Date: 2024.11.14", "Date: 2024.11.15"]
+
+
+def test_schedule_rows_without_date_are_not_merged(tmp_path):
+    path = tmp_path / "schedule.csv"
+    path.write_text('date,timetable\n'
+                    '미정,"{\'교육\': \'신입사원 온보딩 1회차\', \'장소\': \'본사 3층 대회의실\'}"\n'
+                    '미정,"{\'교육\': \'신입사원 온보딩 2회차\', \'장소\': \'본사 3층 대회의실\'}"\n',
+                    encoding="utf-8")
+
+    kept = NearDuplicateFilter().filter(load_schedule_csv_2(str(path)))
+
+    assert len(kept) == 2
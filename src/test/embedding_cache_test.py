@@ -0,0 +1,61 @@
+from typing import List
+
+from langchain_core.embeddings import Embeddings
+
+from src.modules.embedding.cache import EmbeddingCache
+from src.modules.embedding.embedding import Embedding
+from src.modules.embedding.executor import EmbeddingExecutor
+
+
+class CountingEmbeddings(Embeddings):
+    """호출된 텍스트를 기록하는 가짜 임베딩 모델입니다."""
+
+    def __init__(self):
+        self.document_calls: List[List[str]] = []
+        self.query_calls: List[str] = []
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        self.document_calls.append(list(texts))
+        return [[float(len(text)), 1.0] for text in texts]
+
+    def embed_query(self, text: str) -> List[float]:
+        self.query_calls.append(text)
+        return [float(len(text)), 0.0]
+
+
+def make_embedding(model, cache):
+    return Embedding(model=model, cache=cache, executor=EmbeddingExecutor(model, max_workers=1))
+
+
+def test_unchanged_documents_are_served_from_disk_cache(tmp_path):
+    path = str(tmp_path / "cache.sqlite")
+    model = CountingEmbeddings()
+    first = make_embedding(model, EmbeddingCache(path)).embed_documents(["a", "bb", "a"])
+
+    # 새 프로세스와 같이 캐시를 다시 열면, 바뀐 텍스트만 모델로 보냅니다.
+    second = make_embedding(model, EmbeddingCache(path)).embed_documents(["bb", "ccc", "a"])
+
+    assert first == [[1.0, 1.0], [2.0, 1.0], [1.0, 1.0]]
+    assert second == [[2.0, 1.0], [3.0, 1.0], [1.0, 1.0]]
+    assert model.document_calls == [["a", "bb"], ["ccc"]]
+
+
+def test_max_entries_evicts_least_recently_used(tmp_path):
+    cache = EmbeddingCache(str(tmp_path / "cache.sqlite"), max_entries=2, max_age=None)
+    cache.set_many("m", ["a", "b"], [[1.0], [2.0]])
+    cache.get_many("m", ["a"])
+    cache.set_many("m", ["c"], [[3.0]])
+
+    assert cache.get_many("m", ["a", "b", "c"]) == [[1.0], None, [3.0]]
+    assert cache.stats()["entries"] == 2
+
+
+def test_set_many_counts_entries_without_evicting_below_the_limit(tmp_path):
+    cache = EmbeddingCache(str(tmp_path / "cache.sqlite"), max_entries=10, max_age=None)
+    evictions = []
+    cache.evict = lambda: evictions.append(1) or 0
+    cache.set_many("m", ["a", "b"], [[1.0], [2.0]])
+    cache.set_many("m", ["c"], [[3.0]])
+
+    assert evictions == []
+
@@ -0,0 +1,130 @@
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+from langchain_upstage import UpstageEmbeddings
+
+from src.modules.embedding.executor import EmbeddingExecutor
+
+
+class FakeEmbeddingServer:
+    """
+    OpenAI 호환 /embeddings 엔드포인트를 흉내 내는 로컬 서버입니다.
+    요청마다 배치 크기와 동시 요청 수를 기록하고, rate_limited개의 요청에는 429를 반환합니다.
+    """
+
+    def __init__(self, rate_limited: int = 0, delay: float = 0.05):
+        self.batches = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.rate_limited = rate_limited
+        self.delay = delay
+        self.lock = threading.Lock()
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, format, *args):
+                pass
+
+            def do_POST(self):
+                payload = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+                with server.lock:
+                    limited = server.rate_limited > 0
+                    if limited:
+                        server.rate_limited -= 1
+                    else:
+                        server.batches.append(list(payload["input"]))
+                    server.in_flight += 1
+                    server.max_in_flight = max(server.max_in_flight, server.in_flight)
+                time.sleep(server.delay)
+                with server.lock:
+                    server.in_flight -= 1
+                if limited:
+                    body = json.dumps({"error": {"message": "rate limited", "type": "rate_limit"}}).encode()
+                    self.send_response(429)
+                    self.send_header("Retry-After", "0")
+                else:
+                    data = [{"object": "embedding", "index": i, "embedding": [float(len(text)), 1.0]}
+                            for i, text in enumerate(payload["input"])]
+                    body = json.dumps({"object": "list", "data": data, "model": payload["model"],
+                                       "usage": {"prompt_tokens": 0, "total_tokens": 0}}).encode()
+                    self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.httpd.server_port}/v1"
+        threading.Thread(target=self.httpd.serve_forever, daemon=True).start()
+
+    def close(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+@pytest.fixture
+def fake_server():
+    servers = []
+
+    def start(**kwargs):
+        servers.append(FakeEmbeddingServer(**kwargs))
+        return servers[-1]
+
+    yield start
+    for server in servers:
+        server.close()
+
+
+def upstage_model(server: FakeEmbeddingServer, batch_size: int) -> UpstageEmbeddings:
+    # 클라이언트 자체 재시도를 끄고, 재시도는 실행기가 담당하게 합니다.
+    return UpstageEmbeddings(model="embedding-passage", api_key="test", base_url=server.url,
+                             embed_batch_size=batch_size, max_retries=0)
+
+
+def test_batches_respect_size_and_character_limits(fake_server):
+    server = fake_server()
+    texts = ["a" * 10] * 7 + ["b" * 35]
+    executor = EmbeddingExecutor(upstage_model(server, 3), max_batch_size=3, max_batch_chars=40, max_workers=1)
+
+    vectors = executor.embed_documents(texts)
+
+    assert vectors == [[float(len(text)), 1.0] for text in texts]
+    assert [len(batch) for batch in server.batches] == [3, 3, 1, 1]
+    assert all(sum(len(text) for text in batch) <= 40 or len(batch) == 1 for batch in server.batches)
+
+
+def test_concurrent_requests_are_limited_to_max_workers(fake_server):
+    server = fake_server(delay=0.1)
+    texts = [f"text {i}" for i in range(40)]
+    executor = EmbeddingExecutor(upstage_model(server, 4), max_batch_size=4, max_workers=3)
+
+    vectors = executor.embed_documents(texts)
+
+    assert vectors == [[float(len(text)), 1.0] for text in texts]
+    assert len(server.batches) == 10
+    assert 1 < server.max_in_flight <= 3
+
+
+def test_rate_limited_batches_are_retried(fake_server):
+    server = fake_server(rate_limited=2)
+    executor = EmbeddingExecutor(upstage_model(server, 2), max_batch_size=2, max_workers=1, base_delay=0.01)
+
+    vectors = executor.embed_documents(["x", "yy", "zzz"])
+
+    assert vectors == [[1.0, 1.0], [2.0, 1.0], [3.0, 1.0]]
+    assert executor.retries == 2
+    assert server.batches == [["x", "yy"], ["zzz"]]
+
+
+def test_rate_limit_retries_are_bounded(fake_server):
+    server = fake_server(rate_limited=10)
+    executor = EmbeddingExecutor(upstage_model(server, 2), max_batch_size=2, max_workers=1, max_retries=2)
+
+    with pytest.raises(Exception) as error:
+        executor.embed_documents(["x"])
+
+    assert getattr(error.value, "status_code", None) == 429
+    assert executor.retries == 2
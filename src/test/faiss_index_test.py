@@ -0,0 +1,157 @@
+import faiss
+import numpy as np
+import pytest
+from langchain.docstore.document import Document
+
+from src.modules.embedding.hashing import HashingEmbeddings
+from src.modules.vector_store.faiss_index import ann_index, build_index, default_nlist, index_description, search_subset
+from src.modules.vector_store.faiss_store import Faiss
+
+EMBEDDINGS = HashingEmbeddings(dimension=64)
+TEXTS = [f"{i}번 문서 {i % 7}장 {i % 11}절 휴가 {i % 13} 출장 {i % 17} 교육 {i % 19}" for i in range(300)]
+DOCS = [Document(page_content=text, metadata={"source": f"{i % 5}.md"}) for i, text in enumerate(TEXTS)]
+
+
+def vectors(count=len(TEXTS)):
+    return np.array(EMBEDDINGS.embed_documents(TEXTS[:count]), dtype=np.float32)
+
+
+def top1(store, texts):
+    return [store.similarity_search(text, k=1)[0].page_content for text in texts]
+
+
+@pytest.mark.parametrize("compression, rerank, description", [
+    (None, False, "Flat"),
+    ("fp16", False, "SQfp16"),
+    ("sq8", True, "SQ8,RFlat"),
+    ("pq", False, "PQ8np"),
+])
+def test_compression_modes_map_to_index_factory(compression, rerank, description):
+    assert index_description(64, compression, pq_m=8, rerank=rerank) == description
+
+
+def test_invalid_compression_settings_are_rejected():
+    with pytest.raises(ValueError):
+        index_description(64, "int4")
+    with pytest.raises(ValueError):
+        index_description(64, "pq", pq_m=10)
+
+
+@pytest.mark.parametrize("compression, index_class", [
+    ("fp16", faiss.IndexScalarQuantizer),
+    ("sq8", faiss.IndexScalarQuantizer),
+    ("pq", faiss.IndexRefine),
+])
+def test_compressed_store_survives_reload(tmp_path, compression, index_class):
+    # PQ는 거리가 근사이므로 원본 벡터로 재정렬하여 같은 문장을 가장 가깝게 찾습니다.
+    store = Faiss(EMBEDDINGS, persist_directory=str(tmp_path), compression=compression, pq_m=8,
+                  rerank=compression == "pq", auto_compact=False)
+    store.add_documents(DOCS)
+
+    reloaded = Faiss(EMBEDDINGS, persist_directory=str(tmp_path), auto_compact=False)
+
+    assert isinstance(faiss.downcast_index(reloaded.template), index_class)
+    assert top1(reloaded, TEXTS[:20]) == TEXTS[:20]
+
+
+def test_pq_with_too_few_training_vectors_falls_back_to_sq8():
+    index = faiss.downcast_index(build_index(vectors(100), "pq", pq_m=8))
+
+    assert isinstance(index, faiss.IndexScalarQuantizer) and index.ntotal == 0
+    assert index.code_size == 64
+
+
+def test_pca_projection_is_stored_with_the_index_and_applied_to_queries(tmp_path):
+    store = Faiss(EMBEDDINGS, persist_directory=str(tmp_path), projection_dim=16, auto_compact=False)
+    store.add_documents(DOCS)
+
+    reloaded = Faiss(EMBEDDINGS, persist_directory=str(tmp_path), auto_compact=False)
+    index = faiss.downcast_index(reloaded.template)
+    pca = faiss.downcast_VectorTransform(index.chain.at(0))
+
+    assert isinstance(index, faiss.IndexPreTransform) and (index.d, index.index.d) == (64, 16)
+    # 변환에 쓰이지 않는 공분산 고유벡터는 저장하지 않습니다.
+    assert pca.PCAMat.size() == 0
+    assert top1(reloaded, TEXTS[:20]) == TEXTS[:20]
+
+
+def test_pca_with_rerank_scores_candidates_in_the_original_space():
+    index = build_index(vectors(), "sq8", rerank=True, projection_dim=16)
+    index.add(vectors())
+
+    distances, labels = index.search(vectors(5), 3)
+
+    assert isinstance(faiss.downcast_index(index.refine_index), faiss.IndexFlat)
+    assert list(labels[:, 0]) == list(range(5)) and np.allclose(distances[:, 0], 0, atol=1e-4)
+
+
+def test_pca_is_skipped_without_enough_training_vectors():
+    assert not isinstance(faiss.downcast_index(build_index(vectors(10), projection_dim=16)), faiss.IndexPreTransform)
+    with pytest.raises(ValueError):
+        index_description(64, projection_dim=64)
+
+
+@pytest.mark.parametrize("settings", [
+    {},
+    {"index_type": "hnsw"},
+    {"index_type": "ivf", "nprobe": 1},
+    {"compression": "sq8", "rerank": True},
+    {"projection_dim": 16, "rerank": True, "compression": "fp16"},
+])
+def test_search_subset_is_exact_within_allowed_positions(settings):
+    data = vectors()
+    index = build_index(data, **settings)
+    index.add(data)
+    allowed = np.arange(1, len(data), 7)
+
+    distances, labels = search_subset(index, data[:3], 5, allowed)
+
+    exact = ((data[:3, None, :] - data[None, allowed, :]) ** 2).sum(axis=2)
+    assert labels.tolist() == allowed[np.argsort(exact, axis=1, kind="stable")[:, :5]].tolist()
+    assert np.allclose(distances, np.sort(exact, axis=1)[:, :5], atol=1e-3)
+
+
+def test_search_subset_on_pq_stays_within_allowed_positions():
+    data = vectors()
+    index = build_index(data, "pq", pq_m=8)
+    index.add(data)
+    allowed = np.arange(0, len(data), 50)
+
+    distances, labels = search_subset(index, data[:2], 10, allowed)
+
+    assert labels.shape == (2, len(allowed)) and set(labels.ravel()) == set(allowed)
+
+
+@pytest.mark.parametrize("index_type, ann_class", [("hnsw", faiss.IndexHNSW), ("ivf", faiss.IndexIVF)])
+def test_ann_store_finds_exact_matches_after_reload(tmp_path, index_type, ann_class):
+    store = Faiss(EMBEDDINGS, persist_directory=str(tmp_path), index_type=index_type, auto_compact=False)
+    store.add_documents(DOCS)
+
+    reloaded = Faiss(EMBEDDINGS, persist_directory=str(tmp_path), auto_compact=False)
+
+    assert all(isinstance(ann_index(segment.index), ann_class) for _, segment in reloaded.segments)
+    assert top1(reloaded, TEXTS[:20]) == TEXTS[:20]
+
+
+def test_search_params_are_applied_to_every_segment_and_saved(tmp_path):
+    store = Faiss(EMBEDDINGS, persist_directory=str(tmp_path), index_type="ivf", ivf_nlist=8, nprobe=2,
+                  auto_compact=False)
+    store.add_documents(DOCS[:150])
+    store.add_documents(DOCS[150:])
+    store.set_search_params(nprobe=5)
+
+    reloaded = Faiss(EMBEDDINGS, persist_directory=str(tmp_path), auto_compact=False)
+
+    assert [ann_index(segment.index).nprobe for _, segment in reloaded.segments] == [5, 5]
+    assert ann_index(reloaded.template).nlist == 8
+    # 생성자에 준 값은 저장된 값보다 우선합니다.
+    overridden = Faiss(EMBEDDINGS, persist_directory=str(tmp_path), nprobe=20, auto_compact=False)
+    assert [ann_index(segment.index).nprobe for _, segment in overridden.segments] == [8, 8]
+
+
+def test_default_nlist_keeps_enough_training_points_per_cluster():
+    assert default_nlist(300) == 300 // 39
+    assert default_nlist(1_000_000) == 10_000 // 39
+    assert default_nlist(10) == 1
+    index = ann_index(build_index(vectors(), index_type="hnsw", ef_search=77))
+    assert index.hnsw.efSearch == 77 and ann_index(build_index(vectors())) is None
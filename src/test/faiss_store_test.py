@@ -0,0 +1,175 @@
+import os
+
+import pytest
+from langchain.docstore.document import Document
+
+from src.modules.embedding.hashing import HashingEmbeddings
+from src.modules.vector_store import faiss_store
+from src.modules.vector_store.faiss_store import Faiss
+
+EMBEDDINGS = HashingEmbeddings(dimension=64)
+TEXTS = [f"사내 규정 {i}번 조항 휴가 출장 교육 {'신청' * (i % 4)}" for i in range(40)]
+
+
+def docs(source, texts, **metadata):
+    return [Document(page_content=text, metadata={"source": source, **metadata})
+            for text in texts]
+
+
+def contents(results):
+    return {doc.page_content for doc in results}
+
+
+@pytest.fixture
+def no_exhaustive_search(monkeypatch):
+    """필터가 없는 검색이 허용 위치 전수 탐색으로 빠지면 실패하게 합니다."""
+    def fail(*args, **kwargs):
+        raise AssertionError("필터 없는 검색이 전수 탐색을 사용했습니다.")
+
+    monkeypatch.setattr(faiss_store, "prefiltered_search_with_score", fail)
+
+
+def test_tombstoned_chunks_are_skipped_by_the_ann_index(no_exhaustive_search):
+    store = Faiss(EMBEDDINGS, index_type="hnsw", auto_compact=False)
+    store.add_documents(docs("a", TEXTS[:20]) + docs("b", TEXTS[20:]))
+    store.delete_by_source("a")
+
+    results = store.similarity_search(TEXTS[3], k=5)
+    batch = store.similarity_search_batch([TEXTS[3], TEXTS[30]], k=5)
+
+    assert len(results) == 5 and contents(results) <= set(TEXTS[20:])
+    assert all(len(rows) == 5 and contents(rows) <= set(TEXTS[20:]) for rows in batch)
+
+
+def test_deleting_everything_returns_no_results(no_exhaustive_search):
+    store = Faiss(EMBEDDINGS, index_type="hnsw", auto_compact=False)
+    store.add_documents(docs("a", TEXTS[:5]))
+    store.delete_by_source("a")
+
+    assert store.similarity_search(TEXTS[0], k=3) == []
+
+
+def test_search_kwargs_are_honoured_when_filtered():
+    store = Faiss(EMBEDDINGS, auto_compact=False)
+    store.add_documents(docs("a", TEXTS[:20]) + docs("b", TEXTS[20:]))
+    store.delete_stale("b", [])
+
+    # 같은 문장은 거리 0이므로 임계값 안에는 하나만 남습니다.
+    nearest = store.similarity_search(TEXTS[3], k=5, filter={"source": "a"}, score_threshold=1e-4)
+    assert [doc.page_content for doc in nearest] == [TEXTS[3]]
+    assert len(store.similarity_search(TEXTS[3], k=5, filter={"source": "a"}, fetch_k=2)) == 5
+    with pytest.raises(TypeError):
+        store.similarity_search(TEXTS[3], k=5, filter={"source": "a"}, lambda_mult=0.5)
+
+
+def test_tombstones_survive_reload_and_are_dropped_by_compaction(tmp_path):
+    path = str(tmp_path)
+    store = Faiss(EMBEDDINGS, persist_directory=path, auto_compact=False)
+    store.add_documents(docs("a", TEXTS[:10]))
+    store.add_documents(docs("b", TEXTS[10:20]))
+    store.delete_by_source("a")
+
+    reloaded = Faiss(EMBEDDINGS, persist_directory=path, auto_compact=False)
+    assert contents(reloaded.similarity_search(TEXTS[0], k=20)) == set(TEXTS[10:20])
+
+    merged = reloaded.compact([name for name, _ in reloaded.segments])
+    assert [name for name, _ in reloaded.segments] == [merged]
+    assert reloaded.segments[0][1].index.ntotal == 10
+    assert sorted(os.listdir(tmp_path / "segments")) == [merged]
+
+    compacted = Faiss(EMBEDDINGS, persist_directory=path, auto_compact=False)
+    assert compacted.manifest.segments == [{"name": merged, "count": 10}]
+    assert contents(compacted.get_by_metadata({})) == set(TEXTS[10:20])
+
+
+def test_upsert_skips_unchanged_chunks_and_replaces_changed_ones(tmp_path):
+    store = Faiss(EMBEDDINGS, persist_directory=str(tmp_path), auto_compact=False)
+    store.add_documents(docs("a", TEXTS[:3]))
+    store.add_documents(docs("a", TEXTS[:3]))
+    assert len(store.segments) == 1
+
+    changed = docs("a", TEXTS[:3])
+    changed[1].metadata["attached_file"] = "[\"규정.docx\"]"
+    store.add_documents(changed)
+
+    reloaded = Faiss(EMBEDDINGS, persist_directory=str(tmp_path), auto_compact=False)
+    stored = reloaded.get_by_metadata({"source": "a"})
+    assert len(stored) == 3
+    assert [doc.metadata.get("attached_file") for doc in stored if doc.page_content == TEXTS[1]] == ["[\"규정.docx\"]"]
+
+
+def test_second_instance_on_the_same_directory_fails_without_touching_segments(tmp_path):
+    path = str(tmp_path)
+    first = Faiss(EMBEDDINGS, persist_directory=path, auto_compact=False)
+    second = Faiss(EMBEDDINGS, persist_directory=path, auto_compact=False)
+    first.add_documents(docs("a", TEXTS[:5]))
+
+    with pytest.raises(RuntimeError):
+        second.add_documents(docs("b", TEXTS[5:10]))
+
+    # 두 번째 인스턴스는 다른 이름의 세그먼트를 만들었고, 첫 번째 세그먼트와 manifest는 그대로입니다.
+    assert len(os.listdir(tmp_path / "segments")) == 2
+    reloaded = Faiss(EMBEDDINGS, persist_directory=path, auto_compact=False)
+    assert contents(reloaded.get_by_metadata({})) == set(TEXTS[:5])
+
+
+def test_write_segment_refuses_to_replace_an_existing_segment(tmp_path):
+    store = Faiss(EMBEDDINGS, persist_directory=str(tmp_path), auto_compact=False)
+    store.add_documents(docs("a", TEXTS[:5]))
+    name, segment = store.segments[0]
+
+    with pytest.raises(FileExistsError):
+        store.manifest.write_segment(name, segment)
+    assert contents(Faiss(EMBEDDINGS, persist_directory=str(tmp_path)).get_by_metadata({})) == set(TEXTS[:5])
+
+
+def test_bulk_load_writes_one_segment_at_the_end(tmp_path):
+    store = Faiss(EMBEDDINGS, persist_directory=str(tmp_path), auto_compact=False)
+    with store.bulk():
+        store.add_documents(docs("a", TEXTS[:5]))
+        store.add_documents(docs("b", TEXTS[5:10]))
+        assert not store.manifest.exists()
+
+    assert len(store.segments) == 1
+    reloaded = Faiss(EMBEDDINGS, persist_directory=str(tmp_path), auto_compact=False)
+    assert contents(reloaded.get_by_metadata({})) == set(TEXTS[:10])
+
+
+def test_failed_bulk_load_is_rolled_back(tmp_path):
+    store = Faiss(EMBEDDINGS, persist_directory=str(tmp_path), auto_compact=False)
+    store.add_documents(docs("a", TEXTS[:5]))
+
+    with pytest.raises(OSError):
+        with store.bulk():
+            store.add_documents(docs("b", TEXTS[5:10]))
+            store.delete_by_source("a")
+            raise OSError("소스 적재 실패")
+
+    assert contents(store.get_by_metadata({})) == set(TEXTS[:5])
+    reloaded = Faiss(EMBEDDINGS, persist_directory=str(tmp_path), auto_compact=False)
+    assert contents(reloaded.get_by_metadata({})) == set(TEXTS[:5])
+
+
+def test_write_behind_saves_on_close(tmp_path):
+    store = Faiss(EMBEDDINGS, persist_directory=str(tmp_path), flush_interval=3600, auto_compact=False)
+    store.add_documents(docs("a", TEXTS[:5]))
+
+    assert contents(store.similarity_search(TEXTS[0], k=5)) == set(TEXTS[:5])
+    assert not store.manifest.exists()
+
+    store.close()
+    reloaded = Faiss(EMBEDDINGS, persist_directory=str(tmp_path), auto_compact=False)
+    assert contents(reloaded.get_by_metadata({})) == set(TEXTS[:5])
+
+
+@pytest.mark.parametrize("index_type", [None, "hnsw", "ivf"])
+def test_filtered_search_finds_k_matches_outside_the_nearest_candidates(index_type):
+    store = Faiss(EMBEDDINGS, index_type=index_type, nprobe=1, auto_compact=False)
+    others = [f"출장 경비 정산 {i}회차 영수증 첨부" for i in range(5)]
+    store.add_documents(docs("a", TEXTS) + docs("b", others))
+
+    # 쿼리와 가장 가까운 fetch_k개는 모두 "a" 문서이지만, 필터에 맞는 문서를 k개 찾습니다.
+    results = store.similarity_search(TEXTS[3], k=5, filter={"source": "b"}, fetch_k=2)
+
+    assert contents(results) == set(others)
+    assert contents(store.similarity_search(TEXTS[3], k=3, filter={"source": {"$in": ["b"]}})) < set(others)
@@ -0,0 +1,31 @@
+import numpy as np
+
+from src.modules.embedding.embedding import create_embedding_model
+from src.modules.embedding.hashing import HashingEmbeddings
+
+
+def test_vectors_are_deterministic_and_normalized():
+    texts = ["휴가 신청 방법", "온라인 강의 시간표"]
+    first = HashingEmbeddings(dimension=256).embed_documents(texts)
+    second = HashingEmbeddings(dimension=256).embed_documents(texts)
+
+    assert first == second
+    assert np.allclose(np.linalg.norm(np.array(first), axis=1), 1.0, atol=1e-5)
+
+
+def test_similar_texts_score_higher_than_unrelated_ones():
+    model = HashingEmbeddings(dimension=1024)
+    query = np.array(model.embed_query("휴가 신청은 어떻게 하나요"))
+    near, far = np.array(model.embed_documents(["휴가 신청 방법 안내", "슬랙 채널 활용법"]))
+
+    assert query @ near > query @ far
+
+
+def test_backend_is_selected_from_environment(monkeypatch):
+    monkeypatch.setenv("EMBEDDING_BACKEND", "hashing")
+    monkeypatch.setenv("EMBEDDING_DIMENSION", "64")
+
+    model = create_embedding_model()
+
+    assert isinstance(model, HashingEmbeddings)
+    assert len(model.embed_query("테스트")) == 64
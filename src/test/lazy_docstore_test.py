@@ -0,0 +1,64 @@
+import os
+
+import pytest
+from langchain.docstore.document import Document
+from langchain_community.vectorstores import FAISS
+
+from src.modules.embedding.hashing import HashingEmbeddings
+from src.modules.vector_store.lazy_docstore import (DOCSTORE_FILE, SQLiteDocstore, load_eager_faiss, load_lazy_faiss,
+                                                     save_faiss)
+
+EMBEDDINGS = HashingEmbeddings(dimension=64)
+DOCS = [Document(page_content=f"{i}번 안내 휴가 출장 {'교육' * (i % 3)}",
+                 metadata={"source": f"{i % 3}.md", "page": i}) for i in range(30)]
+
+
+@pytest.fixture
+def saved(tmp_path):
+    save_faiss(FAISS.from_documents(DOCS, EMBEDDINGS), str(tmp_path))
+    return str(tmp_path)
+
+
+def results(store, query, **kwargs):
+    return [(doc.page_content, doc.metadata, round(float(score), 4))
+            for doc, score in store.similarity_search_with_score(query, k=5, **kwargs)]
+
+
+@pytest.mark.parametrize("kwargs", [{}, {"filter": {"source": "1.md"}}, {"score_threshold": 0.5}])
+def test_lazy_store_returns_the_same_results_as_the_eager_store(saved, kwargs):
+    lazy = load_lazy_faiss(saved, EMBEDDINGS)
+    eager = load_eager_faiss(saved, EMBEDDINGS)
+
+    assert isinstance(lazy.docstore, SQLiteDocstore)
+    assert results(lazy, DOCS[4].page_content, **kwargs) == results(eager, DOCS[4].page_content, **kwargs)
+
+
+def test_lazy_store_reads_only_the_documents_it_returns(saved):
+    lazy = load_lazy_faiss(saved, EMBEDDINGS)
+    statements = []
+    lazy.docstore._conn.set_trace_callback(statements.append)
+
+    lazy.similarity_search(DOCS[0].page_content, k=3)
+
+    # 상위 3개 문서만 쿼리 한 번으로 읽습니다.
+    assert len(statements) == 1 and statements[0].endswith("IN (0,3,6)")
+
+
+def test_pickle_docstore_is_converted_once(tmp_path):
+    FAISS.from_documents(DOCS, EMBEDDINGS).save_local(str(tmp_path))
+
+    load_lazy_faiss(str(tmp_path), EMBEDDINGS)
+    os.remove(tmp_path / "index.pkl")
+    reloaded = load_lazy_faiss(str(tmp_path), EMBEDDINGS)
+
+    assert (tmp_path / DOCSTORE_FILE).exists()
+    assert reloaded.similarity_search(DOCS[7].page_content, k=1)[0].page_content == DOCS[7].page_content
+
+
+def test_indexed_metadata_columns_answer_filters(saved):
+    docstore = load_lazy_faiss(saved, EMBEDDINGS).docstore
+
+    assert list(docstore.positions_where({"source": {"$in": ["0.md", "2.md"]}})) == \
+        [i for i in range(30) if i % 3 != 1]
+    # 인덱스 컬럼이 아닌 필드는 SQL로 처리하지 않습니다.
+    assert docstore.positions_where({"page": 3}) is None
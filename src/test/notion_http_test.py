@@ -0,0 +1,165 @@
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from src.modules.loader.notion_http import LOAD_PAGE_CHUNK_PATH, SYNC_RECORD_VALUES_PATH
+from src.modules.loader.notion_loader import NotionLoader
+
+PAGE_ID = "0123456789abcdef0123456789abcdef"
+EMPTY_PAGE_ID = "fedcba9876543210fedcba9876543210"
+EXPORT_ETAG = '"export-v1"'
+APP_SHELL = "<html><head><script src=\"/app.js\"></script></head><body><div id=\"notion-app\"></div></body></html>"
+
+
+def uuid(raw: str) -> str:
+    return f"{raw[:8]}-{raw[8:12]}-{raw[12:16]}-{raw[16:20]}-{raw[20:]}"
+
+
+def block(block_id: str, kind: str, title: str = "", content=None, **properties) -> dict:
+    value = {"id": block_id, "type": kind, "properties": {"title": [[title]], **properties}}
+    if content is not None:
+        value["content"] = content
+    return {"value": value}
+
+
+class FakeNotionServer:
+    """
+    노션 공개 페이지 API(loadPageChunk, syncRecordValues)와 JSON/HTML 주소, 첨부 파일을 흉내 내는 로컬 서버입니다.
+    """
+
+    def __init__(self):
+        self.requests = []
+        self.version = 1
+        self.title = "신청서를 제출합니다"
+        self.sync_available = True
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, format, *args):
+                pass
+
+            def send(self, status: int, body: bytes = b"", content_type: str = "text/html", headers=None):
+                self.send_response(status)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(body)))
+                for name, value in (headers or {}).items():
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(body)
+
+            def send_json(self, data):
+                self.send(200, json.dumps(data, ensure_ascii=False).encode("utf-8"), "application/json")
+
+            def do_POST(self):
+                payload = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+                server.requests.append(("POST", self.path, payload.get("chunkNumber")))
+                if self.path == LOAD_PAGE_CHUNK_PATH:
+                    return self.send_json(server.page_chunks(payload["pageId"])[payload["chunkNumber"]])
+                if self.path == SYNC_RECORD_VALUES_PATH and server.sync_available:
+                    page = payload["requests"][0]["pointer"]["id"]
+                    return self.send_json({"recordMap": {"block": {page: {"value": {
+                        "id": page, "type": "page", "version": server.version,
+                        "last_edited_time": 1700000000000 + server.version}}}}})
+                self.send(404)
+
+            def do_GET(self):
+                server.requests.append(("GET", self.path, self.headers.get("If-None-Match")))
+                if self.path == "/export.json":
+                    if self.headers.get("If-None-Match") == EXPORT_ETAG:
+                        return self.send(304)
+                    body = json.dumps({"recordMap": server.page_chunks(uuid(PAGE_ID))[0]["recordMap"]},
+                                      ensure_ascii=False)
+                    return self.send(200, body.encode("utf-8"), "application/json", {"ETag": EXPORT_ETAG})
+                if self.path == "/shell":
+                    return self.send(200, APP_SHELL.encode("utf-8"))
+                if self.path == "/files/vacation.docx":
+                    return self.send(200, b"PK docx bytes", "application/octet-stream")
+                self.send(404)
+
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.httpd.server_port}"
+        threading.Thread(target=self.httpd.serve_forever, daemon=True).start()
+
+    def page_chunks(self, page: str) -> list:
+        """loadPageChunk 응답 두 개. 첫 응답의 cursor가 남아 있어 두 번째 요청이 필요합니다."""
+        if page == uuid(EMPTY_PAGE_ID):
+            # 권한이 없거나 내용을 받지 못하면 빈 recordMap이 옵니다.
+            return [{"recordMap": {}, "cursor": {"stack": []}}]
+        first = {"recordMap": {"block": {page: block(page, "page", "휴가 안내", ["b1", "b2", "b3"]),
+                                         "b1": block("b1", "header", "휴가 신청 방법")}},
+                 "cursor": {"stack": [[{"table": "block", "id": page, "index": 1}]]}}
+        second = {"recordMap": {"block": {"b2": block("b2", "bulleted_list", self.title),
+                                          "b3": block("b3", "file", "휴가신청서.docx",
+                                                      source=[["/files/vacation.docx"]])}},
+                  "cursor": {"stack": []}}
+        return [first, second]
+
+    def page_chunk_requests(self) -> list:
+        return [chunk for method, path, chunk in self.requests if path == LOAD_PAGE_CHUNK_PATH]
+
+    def close(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+@pytest.fixture
+def server():
+    server = FakeNotionServer()
+    yield server
+    server.close()
+
+
+@pytest.fixture
+def loader(tmp_path):
+    loader = NotionLoader(mode="http", cache_path=str(tmp_path / "cache.json"))
+    loader.file_dir = str(tmp_path)
+    return loader
+
+
+def test_page_url_is_loaded_through_paginated_page_chunks(server, loader):
+    doc = loader.load_http(f"{server.url}/휴가-안내-{PAGE_ID}")[0]
+
+    assert "휴가 신청 방법" in doc.page_content and "신청서를 제출합니다" in doc.page_content
+    assert server.page_chunk_requests() == [0, 1]
+    assert any(path.endswith("vacation.docx") for path in json.loads(doc.metadata["attached_file"]))
+
+
+def test_unchanged_page_version_skips_the_record_map(server, loader):
+    url = f"{server.url}/휴가-안내-{PAGE_ID}"
+    first = loader.load_http(url)[0]
+    server.requests.clear()
+
+    second = loader.load_http(url)[0]
+
+    assert server.requests == [("POST", SYNC_RECORD_VALUES_PATH, None)]
+    assert second.page_content == first.page_content
+
+    server.version += 1
+    server.title = "신청서를 이메일로 제출합니다"
+    assert "이메일로" in loader.load_http(url)[0].page_content
+    assert server.page_chunk_requests() == [0, 1]
+
+
+def test_without_version_api_the_record_map_is_fetched_every_time(server, loader):
+    server.sync_available = False
+    url = f"{server.url}/휴가-안내-{PAGE_ID}"
+    loader.load_http(url)
+    loader.load_http(url)
+
+    assert server.page_chunk_requests() == [0, 1, 0, 1]
+
+
+def test_json_url_uses_conditional_get(server, loader):
+    loader.load_http(f"{server.url}/export.json")
+    doc = loader.load_http(f"{server.url}/export.json")[0]
+
+    assert server.requests[1] == ("GET", "/export.json", EXPORT_ETAG)
+    assert "휴가 신청 방법" in doc.page_content
+
+
+@pytest.mark.parametrize("path", ["/shell", f"/빈-페이지-{EMPTY_PAGE_ID}"])
+def test_responses_without_blocks_are_rejected(server, loader, path):
+    with pytest.raises(ValueError):
+        loader.load_http(server.url + path)
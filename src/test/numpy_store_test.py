@@ -0,0 +1,66 @@
+import os
+import subprocess
+import sys
+
+import numpy as np
+from langchain.docstore.document import Document
+
+from src.modules.embedding.hashing import HashingEmbeddings
+from src.modules.vector_store.vector_store import NumpyStore
+
+EMBEDDINGS = HashingEmbeddings(dimension=128)
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+
+
+def docs(source, texts, **metadata):
+    return [Document(page_content=text, metadata={"source": source, **metadata})
+            for text in texts]
+
+
+def brute_force_top_k(store, query, k):
+    query_vector = np.array(EMBEDDINGS.embed_query(query), dtype=np.float32)
+    vectors = np.array(EMBEDDINGS.embed_documents([doc.page_content for doc in store.get_by_metadata({})]))
+    return list(np.argsort(-(vectors @ query_vector))[:k])
+
+
+def test_top_k_matches_brute_force_and_filters():
+    store = NumpyStore(EMBEDDINGS)
+    texts = [f"문서 {i} 휴가 신청 {'강의' * (i % 3)}" for i in range(50)]
+    store.add_documents(docs("a", texts[:25], domain="vacation") + docs("b", texts[25:], domain="timetable"))
+
+    results = store.similarity_search("휴가 신청 강의강의", k=5)
+    expected = brute_force_top_k(store, "휴가 신청 강의강의", 5)
+    assert [doc.page_content for doc in results] == [texts[i] for i in expected]
+
+    filtered = store.similarity_search("휴가 신청", k=30, filter={"domain": "timetable"})
+    assert len(filtered) == 25 and all(doc.metadata["source"] == "b" for doc in filtered)
+
+
+def test_upsert_delete_and_reload(tmp_path):
+    store = NumpyStore(EMBEDDINGS, persist_directory=str(tmp_path))
+    store.add_documents(docs("a", ["하나", "둘"]) + docs("b", ["셋"]))
+    store.add_documents(docs("a", ["하나", "둘"]))
+    assert len(store.get_by_metadata({})) == 3
+
+    assert store.delete_by_source("b") == 1
+    reloaded = NumpyStore(EMBEDDINGS, persist_directory=str(tmp_path))
+    assert [doc.page_content for doc in reloaded.get_by_metadata({})] == ["하나", "둘"]
+
+
+def test_numpy_store_imports_without_faiss_or_chromadb():
+    # faiss와 chromadb를 import할 수 없게 막은 프로세스에서도 NumpyStore만으로 검색할 수 있어야 합니다.
+    code = (
+        "import sys\n"
+        "sys.modules['faiss'] = None\n"
+        "sys.modules['chromadb'] = None\n"
+        "from langchain.docstore.document import Document\n"
+        "from src.modules.embedding.hashing import HashingEmbeddings\n"
+        "from src.modules.vector_store.vector_store import NumpyStore\n"
+        "store = NumpyStore(HashingEmbeddings(dimension=16))\n"
+        "store.add_documents([Document(page_content='휴가', metadata={'source': 'a'})])\n"
+        "print(store.similarity_search('휴가', k=1)[0].page_content)\n"
+    )
+    result = subprocess.run([sys.executable, "-c", code], cwd=REPO_ROOT, capture_output=True, text=True)
+
+    assert result.returncode == 0, result.stderr
+    assert result.stdout.strip().endswith("휴가")
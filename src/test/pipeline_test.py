@@ -0,0 +1,171 @@
+import threading
+from typing import List
+
+import pytest
+from langchain_core.documents import Document
+
+from src.modules.embedding.hashing import HashingEmbeddings
+from src.modules.loader.docs_loader import DocsLoader
+from src.modules.loader.pipeline import FunctionLoader, IngestionPipeline, SourceJob
+from src.modules.vector_store.vector_store import NumpyStore, chunk_ids
+
+
+class CountingEmbeddings(HashingEmbeddings):
+    """임베딩한 텍스트를 기록합니다."""
+
+    def __init__(self):
+        super().__init__(dimension=64)
+        self.embedded: List[str] = []
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        self.embedded.extend(texts)
+        return super().embed_documents(texts)
+
+
+class FailingLoader(DocsLoader):
+    def load(self, source: str):
+        raise OSError("연결 실패")
+
+
+def paragraphs(*texts):
+    return FunctionLoader(lambda source: [Document(page_content=text, metadata={"source": source})
+                                          for text in texts])
+
+
+def ingest(store, *jobs, batch_size=256):
+    return IngestionPipeline(store, load_batch_size=batch_size, max_loaders=1).run(jobs)
+
+
+def stored(store, source="a.md"):
+    return {doc.id: doc.page_content for doc in store.get_by_metadata({"source": source})}
+
+
+def test_inserting_a_chunk_keeps_the_ids_of_the_others():
+    embeddings = CountingEmbeddings()
+    store = NumpyStore(embeddings)
+    ingest(store, SourceJob("a.md", paragraphs("연차", "반차", "병가")))
+    before = stored(store)
+
+    embeddings.embedded.clear()
+    ingest(store, SourceJob("a.md", paragraphs("경조사 휴가", "연차", "반차", "병가")), batch_size=1)
+    after = stored(store)
+
+    assert embeddings.embedded == ["경조사 휴가"]
+    assert set(before.items()) < set(after.items())
+    assert sorted(after.values()) == sorted(["경조사 휴가", "연차", "반차", "병가"])
+
+
+def test_removed_chunks_are_deleted_as_stale():
+    store = NumpyStore(HashingEmbeddings(dimension=64))
+    ingest(store, SourceJob("a.md", paragraphs("연차", "반차", "병가")), SourceJob("b.md", paragraphs("출장")))
+    ingest(store, SourceJob("a.md", paragraphs("반차")))
+
+    assert list(stored(store).values()) == ["반차"]
+    assert list(stored(store, "b.md").values()) == ["출장"]
+
+
+def test_repeated_chunks_get_distinct_ids_across_batches():
+    embeddings = CountingEmbeddings()
+    store = NumpyStore(embeddings)
+    ingest(store, SourceJob("a.md", paragraphs("서명", "본문", "서명")), batch_size=1)
+    first = stored(store)
+
+    embeddings.embedded.clear()
+    ingest(store, SourceJob("a.md", paragraphs("서명", "본문", "서명")), batch_size=2)
+
+    assert sorted(first.values()) == ["본문", "서명", "서명"]
+    assert stored(store) == first
+    assert embeddings.embedded == []
+
+
+def test_failed_source_keeps_its_previous_chunks():
+    store = NumpyStore(HashingEmbeddings(dimension=64))
+    ingest(store, SourceJob("a.md", paragraphs("연차", "반차")))
+    pipeline = IngestionPipeline(store)
+
+    assert pipeline.run([SourceJob("a.md", FailingLoader())]) == []
+    assert [job.source for job in pipeline.failed] == ["a.md"]
+    assert sorted(stored(store).values()) == ["반차", "연차"]
+
+
+def test_chunk_ids_do_not_depend_on_position():
+    docs = [Document(page_content=text, metadata={"source": "a.md"}) for text in ("가", "나", "가")]
+    shifted = [Document(page_content="다", metadata={"source": "a.md"})] + docs
+
+    assert chunk_ids(shifted)[1:] == chunk_ids(docs)
+    assert len(set(chunk_ids(docs))) == 3
+
+
+class BlockingLoader(DocsLoader):
+    """release가 설정될 때까지(최대 5초) 로드를 끝내지 않는 느린 로더 (Selenium 크롤링 흉내)."""
+
+    def __init__(self, release: threading.Event):
+        self.release = release
+        self.released = None
+
+    def load(self, source: str):
+        self.released = self.release.wait(5)
+        return [Document(page_content="크롤링한 페이지", metadata={"source": source})]
+
+
+def test_slow_source_does_not_hold_back_the_others():
+    store = NumpyStore(HashingEmbeddings(dimension=64))
+    fast_written = threading.Event()
+    slow = BlockingLoader(fast_written)
+    order = []
+
+    def on_written(job, ids_by_source):
+        order.append((job.source, {source: len(ids) for source, ids in ids_by_source.items()}))
+        if job.source == "fast.md":
+            fast_written.set()
+
+    pipeline = IngestionPipeline(store, on_written=on_written)
+    pipeline.run([SourceJob("notion", slow), SourceJob("fast.md", paragraphs("연차", "반차"))])
+
+    assert slow.released
+    assert order == [("fast.md", {"fast.md": 2}), ("notion", {"notion": 1})]
+
+
+def test_large_source_is_written_in_bounded_batches():
+    store = NumpyStore(HashingEmbeddings(dimension=64))
+    generated = []
+    written = []
+
+    class ManyLoader(DocsLoader):
+        def load(self, source: str):
+            return list(self.load_iter(source))
+
+        def load_iter(self, source: str):
+            for i in range(1000):
+                generated.append(i)
+                yield Document(page_content=f"{i}번 행", metadata={"source": source})
+
+    original = store.add_documents
+
+    def add_documents(docs):
+        docs = list(docs)
+        written.append((len(generated), len(docs)))
+        original(docs)
+
+    store.add_documents = add_documents
+    IngestionPipeline(store, queue_size=2, load_batch_size=50, write_batch_size=100).run(
+        [SourceJob("big.csv", ManyLoader())])
+
+    assert sum(size for _, size in written) == 1000 and max(size for _, size in written) <= 100
+    # 로더는 큐 두 개와 각 단계가 들고 있는 배치만큼만 앞서 갑니다.
+    done = 0
+    for generated_then, size in written:
+        done += size
+        assert generated_then - done <= 50 * 7
+
+
+def test_errors_in_prepare_are_raised_without_hanging():
+    store = NumpyStore(HashingEmbeddings(dimension=64))
+
+    def broken(docs):
+        raise ValueError("분할 실패")
+
+    jobs = [SourceJob(f"{i}.md", paragraphs(*(f"문단 {j}" for j in range(20))), prepare=broken) for i in range(10)]
+    with pytest.raises(ValueError):
+        IngestionPipeline(store, queue_size=1, load_batch_size=1).run(jobs)
+    assert store.get_by_metadata({}) == []
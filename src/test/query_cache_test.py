@@ -0,0 +1,55 @@
+from typing import List
+
+from langchain_core.embeddings import Embeddings
+
+from src.modules.embedding.cache import QueryEmbeddingCache
+from src.modules.embedding.embedding import Embedding
+
+
+class CountingEmbeddings(Embeddings):
+    """embed_query 호출을 기록하는 가짜 임베딩 모델입니다."""
+
+    def __init__(self):
+        self.query_calls: List[str] = []
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return [[float(len(text))] for text in texts]
+
+    def embed_query(self, text: str) -> List[float]:
+        self.query_calls.append(text)
+        return [float(len(text))]
+
+
+def test_repeated_questions_use_the_normalized_query_cache():
+    model = CountingEmbeddings()
+    embedding = Embedding(model=model, cache_path=None, query_cache=QueryEmbeddingCache(max_size=4))
+
+    first = embedding.embed_query("휴가  신청 ")
+    second = embedding.embed_query(" 휴가 신청")
+
+    assert first == second
+    assert model.query_calls == ["휴가 신청"]
+
+
+def test_lru_keeps_recently_used_queries():
+    cache = QueryEmbeddingCache(max_size=2, ttl=None)
+    cache.set("a", [1.0])
+    cache.set("b", [2.0])
+    cache.get("a")
+    cache.set("c", [3.0])
+
+    assert cache.get("a") == [1.0]
+    assert cache.get("b") is None
+    assert cache.stats()["entries"] == 2
+
+
+def test_expired_queries_are_embedded_again(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr("src.modules.embedding.cache.time.monotonic", lambda: now[0])
+    cache = QueryEmbeddingCache(max_size=2, ttl=60)
+    cache.set("a", [1.0])
+
+    now[0] += 30
+    assert cache.get("a") == [1.0]
+    now[0] += 61
+    assert cache.get("a") is None
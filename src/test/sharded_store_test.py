@@ -0,0 +1,55 @@
+import pytest
+from langchain.docstore.document import Document
+
+from src.modules.embedding.hashing import HashingEmbeddings
+from src.modules.vector_store.sharded_store import ShardedStore, check_domain_collections
+from src.modules.vector_store.vector_store import ChromaStore, NumpyStore
+
+EMBEDDINGS = HashingEmbeddings(dimension=64)
+
+
+def doc(text, domain, source="src"):
+    return Document(page_content=text, metadata={"source": source, "domain": domain})
+
+
+def test_documents_go_to_their_domain_shard_and_routing_searches_one_shard():
+    store = ShardedStore(lambda domain: NumpyStore(EMBEDDINGS))
+    store.add_documents([doc("휴가 신청 방법", "vacation"), doc("월요일 강의 시간표", "timetable"),
+                         doc("근로기준법 휴가 조항", "legal")])
+
+    assert [d.page_content for d in store.for_category("vacation").similarity_search("휴가", k=4)] == ["휴가 신청 방법"]
+    assert store.shard("legal").get_by_metadata({})[0].page_content == "근로기준법 휴가 조항"
+    # etc(또는 알 수 없는 카테고리)는 모든 샤드를 검색합니다.
+    assert len(store.for_category("etc").similarity_search("휴가", k=4)) == 3
+    assert store.for_category("unknown") is store
+
+
+def test_documents_without_domain_are_rejected():
+    store = ShardedStore(lambda domain: NumpyStore(EMBEDDINGS))
+
+    with pytest.raises(ValueError):
+        store.add_documents([Document(page_content="도메인 없음", metadata={"source": "x"})])
+
+
+def test_empty_shards_are_skipped_when_merging_results():
+    store = ShardedStore(lambda domain: NumpyStore(EMBEDDINGS))
+    store.add_documents([doc("슬랙 활용법", "etc")])
+
+    assert [d.page_content for d in store.similarity_search("슬랙", k=2)] == ["슬랙 활용법"]
+
+
+def test_legacy_single_collection_store_fails_loudly(tmp_path):
+    ChromaStore(EMBEDDINGS, persist_directory=str(tmp_path)).add_documents([doc("휴가 신청 방법", "vacation")])
+
+    with pytest.raises(RuntimeError, match="init"):
+        check_domain_collections(str(tmp_path))
+
+
+def test_missing_store_fails_loudly_and_domain_store_passes(tmp_path):
+    with pytest.raises(RuntimeError, match="적재된 청크가 없습니다"):
+        check_domain_collections(str(tmp_path))
+
+    path = str(tmp_path / "sharded")
+    store = ShardedStore(lambda domain: ChromaStore(EMBEDDINGS, persist_directory=path, collection_name=domain))
+    store.add_documents([doc("휴가 신청 방법", "vacation")])
+    check_domain_collections(path)
@@ -0,0 +1,52 @@
+import os
+
+from src.modules.loader import source_manifest
+from src.modules.loader.source_manifest import SourceManifest, content_digest
+
+
+def test_unchanged_file_is_skipped_without_reading_it(tmp_path, monkeypatch):
+    path = tmp_path / "schedule.csv"
+    path.write_text("date,timetable\n", encoding="utf-8")
+    manifest = SourceManifest(str(tmp_path / "sources.json"))
+    assert manifest.file_changed(str(path))
+    manifest.record(str(path), ["id-1"])
+    manifest.save()
+
+    reloaded = SourceManifest(str(tmp_path / "sources.json"))
+    monkeypatch.setattr(source_manifest, "file_digest", None)
+
+    assert not reloaded.file_changed(str(path))
+    assert reloaded.removed_sources() == []
+
+
+def test_touched_file_with_the_same_content_is_not_reloaded(tmp_path):
+    path = tmp_path / "slack.md"
+    path.write_text("# 슬랙", encoding="utf-8")
+    manifest = SourceManifest(str(tmp_path / "sources.json"))
+    manifest.file_changed(str(path))
+    manifest.record(str(path), [])
+    os.utime(path, (1, 1))
+
+    assert not manifest.file_changed(str(path))
+    assert manifest.sources[str(path)]["mtime"] == 1
+
+    path.write_text("# 슬랙 활용법", encoding="utf-8")
+    assert manifest.file_changed(str(path))
+
+
+def test_sources_not_seen_again_are_reported_as_removed(tmp_path):
+    manifest = SourceManifest(str(tmp_path / "sources.json"))
+    for source in ("a.md", "notion", "law.txt"):
+        manifest.content_changed(source, content_digest([source]))
+        manifest.record(source, [f"{source}-chunk"])
+
+    rerun = SourceManifest(str(tmp_path / "sources.json"))
+    rerun.sources = manifest.sources
+    assert not rerun.content_changed("a.md", content_digest(["a.md"]))
+    rerun.keep("notion")
+    # 파일이 사라진 소스는 확인한 것으로 표시하지 않습니다.
+    assert not rerun.file_changed("law.txt", str(tmp_path / "law.txt"))
+
+    assert rerun.removed_sources() == ["law.txt"]
+    assert rerun.forget("law.txt") == ["law.txt-chunk"]
+    assert set(rerun.sources) == {"a.md", "notion"}
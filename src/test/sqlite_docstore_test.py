@@ -0,0 +1,61 @@
+import os
+import pickle
+
+from langchain.docstore.document import Document
+from langchain_community.vectorstores import FAISS
+
+from src.modules.embedding.hashing import HashingEmbeddings
+from src.modules.vector_store.lazy_docstore import (DOCSTORE_FILE, SQLiteDocstore, load_eager_faiss, load_lazy_faiss,
+                                                    save_faiss, store_ids)
+
+EMBEDDINGS = HashingEmbeddings(dimension=64)
+DOCS = [
+    Document(page_content="휴가 신청 방법", metadata={"source": "notion", "domain": "vacation"}),
+    Document(page_content="온라인 강의 시간표", metadata={"source": "lecture.csv", "domain": "timetable", "day": 1}),
+    Document(page_content="슬랙 활용법", metadata={"source": "slack.md", "domain": "etc"}),
+]
+
+
+def test_saved_store_has_no_pickle_and_loads_lazily(tmp_path):
+    store = FAISS.from_documents(DOCS, EMBEDDINGS, ids=["a", "b", "c"])
+    save_faiss(store, str(tmp_path))
+
+    assert sorted(os.listdir(tmp_path)) == [DOCSTORE_FILE, "index.faiss"]
+    lazy = load_lazy_faiss(str(tmp_path), EMBEDDINGS)
+    assert isinstance(lazy.docstore, SQLiteDocstore)
+    assert store_ids(lazy) == ["a", "b", "c"]
+    hit = lazy.similarity_search("온라인 강의 시간표", k=1)[0]
+    assert (hit.id, hit.page_content, hit.metadata) == ("b", DOCS[1].page_content, DOCS[1].metadata)
+
+
+def test_indexed_metadata_columns_answer_filters(tmp_path):
+    save_faiss(FAISS.from_documents(DOCS, EMBEDDINGS), str(tmp_path))
+    docstore = SQLiteDocstore(os.path.join(tmp_path, DOCSTORE_FILE))
+
+    assert docstore.positions_where({"domain": "timetable"}).tolist() == [1]
+    assert docstore.positions_where({"source": {"$in": ["notion", "slack.md"]}}).tolist() == [0, 2]
+    # 색인되지 않은 필드는 처리하지 않고 호출하는 쪽이 메타데이터를 직접 검사합니다.
+    assert docstore.positions_where({"day": 1}) is None
+
+
+def test_pickle_docstore_is_converted_once(tmp_path):
+    store = FAISS.from_documents(DOCS, EMBEDDINGS, ids=["a", "b", "c"])
+    store.save_local(str(tmp_path))
+
+    loaded = load_eager_faiss(str(tmp_path), EMBEDDINGS)
+
+    assert os.path.exists(os.path.join(tmp_path, DOCSTORE_FILE))
+    assert [loaded.docstore.search(loaded.index_to_docstore_id[i]).page_content for i in range(3)] == \
+        [doc.page_content for doc in DOCS]
+
+
+def test_legacy_texts_and_metadatas_pickle_is_converted(tmp_path):
+    store = FAISS.from_documents(DOCS, EMBEDDINGS)
+    store.save_local(str(tmp_path))
+    with open(os.path.join(tmp_path, "index.pkl"), "wb") as f:
+        pickle.dump(([doc.page_content for doc in DOCS], [doc.metadata for doc in DOCS]), f)
+
+    lazy = load_lazy_faiss(str(tmp_path), EMBEDDINGS)
+
+    assert store_ids(lazy) == ["0", "1", "2"]
+    assert lazy.docstore.search(2).metadata == DOCS[2].metadata
@@ -0,0 +1,52 @@
+import random
+
+from src.modules.loader.notion_loader import MarkDownLoader
+from src.modules.loader.streaming import iter_paragraphs, iter_segments, iter_text_segments
+
+
+def pieces_of(text, sizes):
+    start = 0
+    for size in sizes:
+        yield text[start:start + size]
+        start += size
+    yield text[start:]
+
+
+def test_paragraphs_match_split_for_any_piece_boundaries():
+    rng = random.Random(0)
+    text = "".join(rng.choice(["가", "b", " ", "\n", "\n\n", "\n\n\n"]) for _ in range(5000))
+    for _ in range(50):
+        sizes = [rng.randint(0, 7) for _ in range(1000)]
+        assert list(iter_paragraphs(pieces_of(text, sizes))) == text.split("\n\n")
+
+
+def test_separator_split_across_pieces():
+    assert list(iter_paragraphs(["첫 문단\n", "\n둘째", " 문단\n", "", "\n"])) == ["첫 문단", "둘째 문단", ""]
+
+
+def test_paragraph_without_separator_is_flushed_at_max_chars():
+    pieces = ("x" * 7 for _ in range(1000))
+    paragraphs = list(iter_paragraphs(pieces, max_chars=100))
+
+    assert max(len(paragraph) for paragraph in paragraphs) <= 100
+    assert "".join(paragraphs) == "x" * 7000
+
+
+def test_segments_keep_paragraph_boundaries(tmp_path):
+    path = tmp_path / "slack.md"
+    paragraphs = [f"## 채널 {i}\n" + "메시지 " * 30 for i in range(100)]
+    path.write_text("\n\n".join(paragraphs), encoding="utf-8")
+
+    segments = [doc.page_content for doc in iter_text_segments(str(path), max_chars=1000)]
+
+    assert all(len(segment) <= 1000 for segment in segments)
+    assert "\n\n".join(segments) == path.read_text(encoding="utf-8")
+    assert list(iter_segments(["a" * 30, "b"], max_chars=10)) == ["a" * 30, "b"]
+
+
+def test_markdown_load_returns_the_whole_file(tmp_path):
+    path = tmp_path / "slack.md"
+    path.write_text("\n\n".join("문단 " * 50 for _ in range(2000)), encoding="utf-8")
+
+    assert [doc.page_content for doc in MarkDownLoader().load(str(path))] == [path.read_text(encoding="utf-8")]
+    assert len(list(MarkDownLoader().load_iter(str(path)))) > 1
@@ -0,0 +1,162 @@
+import asyncio
+import time
+import uuid
+from typing import List
+
+import pytest
+from langchain.docstore.document import Document
+from langchain_core.embeddings import Embeddings
+
+from src.modules.embedding.embedding import Embedding
+from src.modules.embedding.executor import embed_queries
+from src.modules.embedding.hashing import HashingEmbeddings
+from src.modules.vector_store.faiss_store import Faiss
+from src.modules.vector_store.metadata_index import MetadataIndex
+from src.modules.vector_store.vector_store import ChromaStore, NumpyStore
+
+TEXTS = [f"{i}번 공지 휴가 출장 {'교육' * (i % 4)} {'보안' * (i % 5)}" for i in range(40)]
+DOCS = [Document(page_content=text, metadata={"source": f"{i % 4}.md", "domain": ["hr", "law"][i % 2]})
+        for i, text in enumerate(TEXTS)]
+QUERIES = [TEXTS[3], TEXTS[10], "보안 교육 공지"]
+
+
+class CountingEmbeddings(HashingEmbeddings):
+    """쿼리 임베딩 호출 횟수를 기록합니다."""
+
+    def __init__(self):
+        super().__init__(dimension=64)
+        self.query_calls = 0
+
+    def embed_query(self, text: str) -> List[float]:
+        self.query_calls += 1
+        return super().embed_query(text)
+
+    def embed_queries(self, texts: List[str]) -> List[List[float]]:
+        self.query_calls += 1
+        return super().embed_queries(texts)
+
+
+def chroma(embeddings):
+    return ChromaStore(embeddings, collection_name=f"test-{uuid.uuid4().hex}")
+
+
+STORES = {
+    "numpy": NumpyStore,
+    "faiss": lambda embeddings: Faiss(embeddings, auto_compact=False),
+    "chroma": chroma,
+}
+
+
+@pytest.fixture(params=list(STORES))
+def store(request):
+    store = STORES[request.param](CountingEmbeddings())
+    store.add_documents(DOCS)
+    store.embeddings.query_calls = 0
+    return store
+
+
+def contents(docs):
+    return [doc.page_content for doc in docs]
+
+
+def test_batch_search_matches_single_searches_with_one_embedding_call(store):
+    filters = [None, {"domain": "law"}, {"source": "2.md"}]
+
+    batch = store.similarity_search_batch(QUERIES, k=3, filters=filters)
+
+    assert store.embeddings.query_calls == 1
+    assert [contents(rows) for rows in batch] == \
+        [contents(store.similarity_search(query, k=3, filter=filter)) for query, filter in zip(QUERIES, filters)]
+
+
+def test_batch_search_of_no_queries_is_empty(store):
+    assert store.similarity_search_batch([], k=3) == []
+
+
+class SingleQueryEmbeddings(Embeddings):
+    """embed_queries가 없는 임베딩 모델 (UpstageEmbeddings 등)."""
+
+    def __init__(self):
+        self.model = HashingEmbeddings(dimension=64)
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return self.model.embed_documents(texts)
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.model.embed_query(text)
+
+
+def test_models_without_batch_query_api_are_embedded_in_order():
+    queries = [f"질문 {i}" for i in range(10)]
+
+    assert embed_queries(SingleQueryEmbeddings(), queries) == HashingEmbeddings(dimension=64).embed_queries(queries)
+
+
+@pytest.mark.parametrize("filter, expected", [
+    ({"source": "1.md"}, [i for i in range(40) if i % 4 == 1]),
+    ({"source": {"$in": ["0.md", "3.md"]}}, [i for i in range(40) if i % 4 in (0, 3)]),
+    ({"$and": [{"domain": "hr"}, {"source": "2.md"}]}, [i for i in range(40) if i % 4 == 2]),
+    ({"domain": "none"}, []),
+])
+def test_get_by_metadata_returns_matches_without_embedding(store, filter, expected):
+    store.embeddings.embed_documents = None
+
+    assert contents(store.get_by_metadata(filter)) == [TEXTS[i] for i in expected]
+    assert len(store.get_by_metadata(filter, limit=2)) == min(2, len(expected))
+    assert store.embeddings.query_calls == 0
+
+
+def test_metadata_index_leaves_unsupported_filters_to_a_scan():
+    index = MetadataIndex()
+    index.add(doc.metadata for doc in DOCS)
+
+    assert index.lookup({"source": {"$ne": "1.md"}}) is None
+    assert index.lookup({"$or": [{"source": "1.md"}]}) is None
+    assert index.lookup(lambda metadata: True) is None
+    assert index.lookup({}) == list(range(40))
+
+    # 역색인으로 처리할 수 없는 필터(callable)는 전체 스캔으로 찾습니다.
+    store = NumpyStore(HashingEmbeddings(dimension=64))
+    store.add_documents(DOCS)
+    assert contents(store.get_by_metadata(lambda metadata: metadata["source"] == "1.md", limit=3)) == \
+        [TEXTS[1], TEXTS[5], TEXTS[9]]
+
+
+class SlowAsyncEmbeddings(SingleQueryEmbeddings):
+    """비동기 쿼리 임베딩 요청마다 0.1초가 걸리는 모델 (원격 API 흉내)."""
+
+    def __init__(self):
+        super().__init__()
+        self.async_calls = 0
+
+    async def aembed_query(self, text: str) -> List[float]:
+        self.async_calls += 1
+        await asyncio.sleep(0.1)
+        return self.embed_query(text)
+
+
+@pytest.mark.parametrize("name", ["faiss", "chroma"])
+def test_concurrent_async_searches_share_one_event_loop(name):
+    model = SlowAsyncEmbeddings()
+    store = STORES[name](Embedding(model=model, cache_path=None))
+    asyncio.run(store.aadd_documents(DOCS))
+    queries = [f"{i}번 공지 교육" for i in range(20)]
+
+    async def search_all():
+        return await asyncio.gather(*(store.asimilarity_search(query, k=3) for query in queries))
+
+    started = time.perf_counter()
+    results = asyncio.run(search_all())
+
+    assert time.perf_counter() - started < 1.0
+    assert model.async_calls == len(queries)
+    assert [contents(rows) for rows in results] == [contents(store.similarity_search(query, k=3)) for query in queries]
+
+
+def test_async_methods_match_sync_results(store):
+    batch = asyncio.run(store.asimilarity_search_batch(QUERIES, k=3, filters=[None, {"domain": "law"}, None]))
+    single = asyncio.run(store.asimilarity_search(QUERIES[0], k=3, filter={"source": "3.md"}))
+
+    assert [contents(rows) for rows in batch] == \
+        [contents(rows) for rows in store.similarity_search_batch(QUERIES, k=3, filters=[None, {"domain": "law"}, None])]
+    assert contents(single) == contents(store.similarity_search(QUERIES[0], k=3, filter={"source": "3.md"}))
@@ -0,0 +1,107 @@
+import json
+import os
+import threading
+
+import pytest
+from langchain.docstore.document import Document
+
+from src.modules.embedding.hashing import HashingEmbeddings
+from src.modules.vector_store.vector_store import NumpyStore
+from src.modules.vector_store.versioned_store import CURRENT_FILE, VERSIONS_DIR, IndexVersions, VersionedStore
+
+EMBEDDINGS = HashingEmbeddings(dimension=64)
+
+
+def docs(*texts):
+    return [Document(page_content=text, metadata={"source": "a.md"}) for text in texts]
+
+
+def writer(*texts):
+    def build(path):
+        store = NumpyStore(EMBEDDINGS, persist_directory=path)
+        store.replace_sources(docs(*texts))
+    return build
+
+
+def contents(store):
+    return sorted(doc.page_content for doc in store.get_by_metadata({}))
+
+
+@pytest.fixture
+def versions(tmp_path):
+    return IndexVersions(str(tmp_path), grace_period=60, keep_previous=0)
+
+
+@pytest.fixture
+def served(versions):
+    versions.build(writer("연차", "반차"))
+    return VersionedStore(versions, lambda path: NumpyStore(EMBEDDINGS, persist_directory=path))
+
+
+def test_readers_keep_the_open_version_until_refresh(versions, served):
+    before = served.store
+    started, release = threading.Event(), threading.Event()
+
+    def slow_build(path):
+        writer("연차", "반차", "병가")(path)
+        started.set()
+        release.wait()
+
+    thread = served.rebuild_in_background(slow_build)
+    started.wait()
+    # 게시 전에는 새 버전이 반쯤 기록되어 있어도 서비스 중인 버전만 보입니다.
+    assert not served.refresh()
+    assert contents(served) == ["반차", "연차"]
+
+    release.set()
+    thread.join()
+
+    assert served.store is not before and contents(served) == ["반차", "병가", "연차"]
+    # 이전 버전을 잡고 있는 요청은 끝까지 같은 결과를 봅니다.
+    assert contents(before) == ["반차", "연차"]
+
+
+def test_other_processes_pick_up_the_published_version_on_refresh(versions, served):
+    name = versions.build(writer("출장"))
+
+    assert served.version != name
+    assert served.refresh() and served.version == name
+    assert not served.refresh()
+    assert contents(served) == ["출장"]
+
+
+def test_failed_or_unchanged_builds_are_not_published(versions, served):
+    current = versions.current()
+
+    def fail(path):
+        raise OSError("소스 적재 실패")
+
+    with pytest.raises(OSError):
+        versions.build(fail)
+    assert versions.build(lambda path: False) is None
+
+    assert versions.current() == current
+    assert os.listdir(os.path.join(versions.root, VERSIONS_DIR)) == [current]
+
+
+def test_retired_versions_are_removed_after_the_grace_period(versions, served):
+    first = versions.current()
+    second = versions.build(writer("출장"))
+    with open(versions.history_file, encoding="utf-8") as f:
+        retired_at = json.load(f)[-1]["published_at"]
+
+    assert versions.collect_garbage(now=retired_at + 30) == []
+    assert versions.collect_garbage(now=retired_at + 61) == [first]
+    assert os.listdir(os.path.join(versions.root, VERSIONS_DIR)) == [second]
+
+
+def test_store_without_current_serves_the_root_and_seeds_the_first_version(tmp_path):
+    writer("연차")(str(tmp_path))
+    versions = IndexVersions(str(tmp_path))
+    store = VersionedStore(versions, lambda path: NumpyStore(EMBEDDINGS, persist_directory=path))
+    assert store.version is None and contents(store) == ["연차"]
+
+    name = versions.prepare()
+
+    assert CURRENT_FILE not in os.listdir(versions.version_path(name))
+    assert contents(NumpyStore(EMBEDDINGS, persist_directory=versions.version_path(name))) == ["연차"]
@@ -16,10 +16,13 @@ class VectorDBStore:
     #API 키 가져오기
     api_key = os.getenv("UPSTAGE_API_KEY")
 
-    def __init__(self, html_file_path):
+    def __init__(self, html_file_path, embeddings=None):
         self.html_file_path = html_file_path
         self.text_file_path = html_file_path.replace(".html", ".txt")
-        self.embeddings = UpstageEmbeddings(model="solar-embedding-1-large", api_key=self.api_key)
+        # embeddings를 주입하면(예: 오프라인 HashingEmbeddings) Upstage API 없이 벡터DB를 만들 수 있음
+        if embeddings is None:
+            embeddings = UpstageEmbeddings(model="solar-embedding-1-large", api_key=self.api_key)
+        self.embeddings = embeddings
         self.docs = []  # 문서 저장 리스트 초기화
         self.preprocessed_docs = []  # 전처리된 문서 리스트 초기화
         self.split_documents = []  # 분할된 문서 저장